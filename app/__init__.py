@@ -1 +1 @@
-__all__ = ['main','database','models','schemas','crud','routers','etl']
+__all__ = ['main','database','pool_metrics','async_db','models','schemas','crud','pagination','serialization','export','request_log','metrics','query_stats','indexes','locks','expand','versions','cache','pricing','player_search','ratings','analytics','startup','change_tracking','conditional','routers','admin','etl']
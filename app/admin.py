@@ -0,0 +1,16 @@
+import os
+import secrets
+from typing import Optional
+from fastapi import Header, HTTPException
+
+# shared secret for the state-changing /internal endpoints; unset disables them
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+
+def require_admin(x_admin_token: Optional[str] = Header(None, alias=ADMIN_TOKEN_HEADER)):
+    """Dependency for operator-only endpoints: the request must carry
+    ADMIN_TOKEN in the X-Admin-Token header."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(403, 'Admin endpoints are disabled (ADMIN_TOKEN is not set)')
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        raise HTTPException(401, 'Invalid admin token', headers={'WWW-Authenticate': ADMIN_TOKEN_HEADER})
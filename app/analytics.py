@@ -0,0 +1,463 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, event, func, insert, inspect, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.change_tracking import mark_changed
+from app.database import SessionLocal
+from app.pricing import hourly_rate
+from app.versions import bump_versions
+
+logger = logging.getLogger('colizeum')
+
+# trailing window re-aggregated from the raw facts every ANALYTICS_COMPACT_SECONDS (0 = only on demand)
+COMPACT_SECONDS = float(os.getenv('ANALYTICS_COMPACT_SECONDS', '0'))
+COMPACT_DAYS = int(os.getenv('ANALYTICS_COMPACT_DAYS', '2'))
+GRAINS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+GRAIN_PATTERN = '^(hour|day)$'
+# buckets returned when ``from`` is omitted
+DEFAULT_BUCKETS = {'hour': 48, 'day': 31}
+MAX_BUCKETS = 2000
+HOUR = timedelta(hours=1)
+VALUE_COLUMNS = ('bookings', 'booked_seconds', 'sessions', 'session_seconds', 'revenue')
+ROLLUP_KEYS = ('grain', 'scope', 'scope_id', 'bucket') + VALUE_COLUMNS
+FACT_TABLES = {'Booking', 'GameSession'}
+WRITE_BATCH = 5000
+IN_CHUNK = 1000
+# ChangeVersion row locked by rollup writers: incremental flushes and compaction
+ROLLUPS_LOCK = 'analytics'
+_BULK_KEY = 'analytics_bulk'
+
+def bucket_start(moment: datetime, grain: str) -> datetime:
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if grain == 'day' else moment
+
+
+def split_hours(start: datetime, end: datetime):
+    """(hour bucket, seconds of [start, end) inside it) pairs."""
+    bucket = bucket_start(start, 'hour')
+    while bucket < end:
+        following = bucket + HOUR
+        yield bucket, (min(end, following) - max(start, bucket)).total_seconds()
+        bucket = following
+
+
+def lock_rollups(conn):
+    """Serialize rollup writers across processes until the transaction ends:
+    a no-op UPDATE on a ChangeVersion row, as in app.ratings. Compaction takes
+    it before reading the facts, so no flush can add to rollups it is about to
+    replace, and a flush waiting on it applies its deltas to the new ones."""
+    table = models.ChangeVersion.__table__
+    stmt = update(table).where(table.c.name == ROLLUPS_LOCK).values(version=table.c.version)
+    if not conn.execute(stmt).rowcount:
+        bump_versions(conn, [ROLLUPS_LOCK])
+
+
+def _room_info(db: Session, room_ids):
+    """{room_id: (club_id, current hourly rate)}; the rate values facts
+    written without a snapshot of their own."""
+    stmt = (select(models.Room.room_id, models.Room.room_type, models.Arena.club_id)
+            .join(models.Arena, models.Arena.arena_id == models.Room.arena_id))
+    if room_ids is not None:
+        stmt = stmt.where(models.Room.room_id.in_(room_ids))
+    return {room_id: (club_id, hourly_rate(db, club_id, room_type)) for room_id, room_type, club_id in db.execute(stmt).all()}
+
+
+# Incremental path: every flush that adds, changes or deletes a Booking or a
+# GameSession adds the difference of its before/after contribution to the
+# rollup rows, in the same transaction as the write itself.
+
+FACT_COLUMNS = {
+    'Booking': ('status', 'room_id', 'start_time', 'end_time', 'hourly_rate'),
+    'GameSession': ('room_id', 'started_at', 'ended_at'),
+}
+
+def _fact(values: dict, kind: str):
+    """(kind, room_id, start, end, hourly rate) a Booking/GameSession row
+    contributes, or None. Only bookings carry revenue, at the rate they were
+    priced at."""
+    if kind == 'booking':
+        if values['status'] == 'cancelled':
+            return None
+        fact = ('booking', values['room_id'], values['start_time'], values['end_time'])
+        rate = values['hourly_rate']
+    else:
+        fact = ('session', values['room_id'], values['started_at'], values['ended_at'])
+        rate = None
+    # open sessions are counted once they end
+    return fact + (rate,) if None not in fact and fact[3] > fact[2] else None
+
+
+def _current(obj):
+    return {name: getattr(obj, name) for name in FACT_COLUMNS[type(obj).__name__]}
+
+
+def _committed(session, obj):
+    state = inspect(obj)
+    values, missing = {}, []
+    for name in FACT_COLUMNS[type(obj).__name__]:
+        history = state.attrs[name].history
+        if history.deleted or history.unchanged:
+            values[name] = (history.deleted or history.unchanged)[0]
+        elif history.added:
+            # set after the object was expired (e.g. by a rollback): the old value is only in the database
+            missing.append(name)
+        else:
+            values[name] = getattr(obj, name)
+    if missing:
+        table = type(obj).__table__
+        key = [column == value for column, value in zip(table.primary_key.columns, state.identity)]
+        values.update(session.connection().execute(select(*(table.c[name] for name in missing)).where(*key)).one()._mapping)
+    return values
+
+
+def _room_deltas(facts, rooms):
+    """{(room_id, hour): [bookings, booked_seconds, sessions, session_seconds, revenue]} for (fact, sign) pairs."""
+    deltas = {}
+    for (kind, room_id, start, end, rate), sign in facts:
+        offset = 0 if kind == 'booking' else 2
+        if rate is None:
+            rate = rooms.get(room_id, (None, 0.0))[1]
+        for hour, seconds in split_hours(start, end):
+            values = deltas.setdefault((room_id, hour), [0, 0.0, 0, 0.0, 0.0])
+            values[offset + 1] += sign * seconds
+            if kind == 'booking':
+                values[4] += sign * seconds / 3600 * rate
+        deltas.setdefault((room_id, bucket_start(start, 'hour')), [0, 0.0, 0, 0.0, 0.0])[offset] += sign
+    return deltas
+
+
+def _rollup_deltas(room_deltas, rooms):
+    rollups = {}
+    for (room_id, hour), values in room_deltas.items():
+        club_id = rooms.get(room_id, (None, 0.0))[0]
+        for grain in GRAINS:
+            bucket = bucket_start(hour, grain)
+            for scope, scope_id in (('room', room_id), ('club', club_id)):
+                if scope_id is None:
+                    continue
+                total = rollups.setdefault((grain, scope, scope_id, bucket), [0, 0.0, 0, 0.0, 0.0])
+                for i, v in enumerate(values):
+                    total[i] += v
+    return rollups
+
+
+def apply_deltas(conn, rollups: dict):
+    table = models.UsageRollup.__table__
+    for (grain, scope, scope_id, bucket), values in rollups.items():
+        if not any(values):
+            continue
+        key = (table.c.grain == grain, table.c.scope == scope, table.c.scope_id == scope_id, table.c.bucket == bucket)
+        stmt = update(table).where(*key).values({name: table.c[name] + v for name, v in zip(VALUE_COLUMNS, values)})
+        if conn.execute(stmt).rowcount:
+            continue
+        try:
+            # in a savepoint: a failed INSERT must not abort the enclosing transaction (PostgreSQL)
+            with conn.begin_nested():
+                conn.execute(insert(table).values(grain=grain, scope=scope, scope_id=scope_id, bucket=bucket, **dict(zip(VALUE_COLUMNS, values))))
+        except IntegrityError:
+            # another transaction created the bucket first; add to it instead
+            conn.execute(stmt)
+
+
+def _kind(obj) -> str:
+    return 'booking' if isinstance(obj, models.Booking) else 'session'
+
+
+@event.listens_for(SessionLocal, 'before_flush')
+def _roll_up_flush(session, flush_context, instances):
+    facts = []
+    for obj in session.new:
+        if isinstance(obj, (models.Booking, models.GameSession)):
+            facts.append((_fact(_current(obj), _kind(obj)), 1))
+    for obj in session.dirty:
+        if isinstance(obj, (models.Booking, models.GameSession)) and session.is_modified(obj):
+            facts += [(_fact(_committed(session, obj), _kind(obj)), -1), (_fact(_current(obj), _kind(obj)), 1)]
+    for obj in session.deleted:
+        if isinstance(obj, (models.Booking, models.GameSession)):
+            facts.append((_fact(_committed(session, obj), _kind(obj)), -1))
+    facts = [(fact, sign) for fact, sign in facts if fact is not None]
+    if facts:
+        conn = session.connection()
+        lock_rollups(conn)
+        rooms = _room_info(session, sorted({fact[1] for fact, _ in facts}))
+        apply_deltas(conn, _rollup_deltas(_room_deltas(facts, rooms), rooms))
+        mark_changed(session, models.UsageRollup.__tablename__)
+
+
+def _fact_times(model):
+    return (model.start_time, model.end_time) if model is models.Booking else (model.started_at, model.ended_at)
+
+
+def _bulk_window(state, model):
+    """[since, until) covering the facts a bulk statement writes, before and
+    after it runs; None bounds when they cannot be told from the statement."""
+    start, end = _fact_times(model)
+    pk = model.__mapper__.primary_key[0]
+    params = state.parameters
+    rows = params if isinstance(params, list) else [params] if params else []
+    spans = []
+    if state.is_update or state.is_delete:
+        ids = [row[pk.key] for row in rows if row.get(pk.key) is not None]
+        where = state.statement.whereclause
+        if ids:
+            # bulk UPDATE by primary key: the rows as they are now
+            found = select(func.min(start), func.max(end))
+            spans += [state.session.execute(found.where(pk.in_(ids[i:i + IN_CHUNK]))).one() for i in range(0, len(ids), IN_CHUNK)]
+        elif where is not None:
+            spans.append(state.session.execute(select(func.min(start), func.max(end)).where(where)).one())
+        else:
+            return None, None
+    if not state.is_delete:
+        if not rows:
+            return None, None
+        # rows without new times keep the ones already covered above
+        spans += [(row.get(start.key), row.get(end.key)) for row in rows]
+    starts = [s for s, _ in spans if s is not None]
+    ends = [e for _, e in spans if e is not None]
+    if not starts and not ends:
+        # matched no facts
+        return None
+    return (min(starts) if starts else None, max(ends) if ends else None)
+
+
+def _union(window, other):
+    """Smallest window covering both; None is empty, a None bound unbounded."""
+    if window is None:
+        return other
+    if other is None:
+        return window
+    since = None if window[0] is None or other[0] is None else min(window[0], other[0])
+    until = None if window[1] is None or other[1] is None else max(window[1], other[1])
+    return since, until
+
+
+@event.listens_for(SessionLocal, 'do_orm_execute')
+def _note_bulk_facts(state):
+    # bulk statements carry no objects; the compactor re-aggregates the window they touch
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(getattr(state.statement, 'table', None), 'name', None)
+        if table in FACT_TABLES:
+            model = models.Booking if table == models.Booking.__tablename__ else models.GameSession
+            window = _bulk_window(state, model)
+            state.session.info[_BULK_KEY] = _union(state.session.info.get(_BULK_KEY), window)
+
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _compact_after_bulk(session):
+    window = session.info.pop(_BULK_KEY, None)
+    if window is not None:
+        compactor.request(*window)
+
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _forget_bulk(session):
+    session.info.pop(_BULK_KEY, None)
+
+
+# Compaction: re-aggregate a window of raw facts with pandas and replace the
+# rollup rows in it, repairing whatever the incremental path could not see
+# (bulk writes, other tools writing the tables). numpy and
+# pandas are imported where they are used, to keep them out of app startup.
+
+def _hour_pieces(facts, since, until):
+    """One row per (fact, hour it overlaps) inside [since, until), with the
+    seconds spent in that hour and whether the fact started in it."""
+    import numpy as np
+    import pandas as pd
+    first = facts.start.dt.floor('h')
+    hours = np.ceil((facts.end - first) / pd.Timedelta(hours=1)).astype('int64').to_numpy()
+    pieces = facts.loc[facts.index.repeat(hours)].reset_index(drop=True)
+    offset = pieces.groupby(facts.index.repeat(hours)).cumcount().to_numpy()
+    pieces['hour'] = pieces.start.dt.floor('h') + pd.to_timedelta(offset, unit='h')
+    following = pieces.hour + pd.Timedelta(hours=1)
+    pieces['seconds'] = (pieces.end.where(pieces.end < following, following)
+                         - pieces.start.where(pieces.start > pieces.hour, pieces.hour)).dt.total_seconds()
+    pieces['count'] = (offset == 0).astype('int64')
+    if since is not None:
+        pieces = pieces[pieces.hour >= since]
+    if until is not None:
+        pieces = pieces[pieces.hour < until]
+    return pieces
+
+
+def _load_facts(db: Session, stmt, columns=('room_id', 'start', 'end')):
+    import pandas as pd
+    frame = pd.DataFrame.from_records(db.execute(stmt).all(), columns=list(columns))
+    frame['start'] = pd.to_datetime(frame.start)
+    frame['end'] = pd.to_datetime(frame.end)
+    return frame[frame.end > frame.start].reset_index(drop=True)
+
+
+def compact(db: Session, since: datetime=None, until: datetime=None) -> dict:
+    """Rebuild the rollups of whole days in [since, until) (everything when
+    omitted) from Booking and GameSession, and commit. Bookings are valued at
+    their own hourly_rate, the current price when they have none. Returns the
+    window, the bookings and sessions overlapping it and the rollup rows written."""
+    import pandas as pd
+    started = time.perf_counter()
+    since = bucket_start(since, 'day') if since is not None else None
+    until = bucket_start(until, 'day') + GRAINS['day'] if until is not None else None
+    lock_rollups(db.connection())
+    booking, session = models.Booking, models.GameSession
+    bookings = select(booking.room_id, booking.start_time, booking.end_time, booking.hourly_rate).where(or_(booking.status.is_(None), booking.status != 'cancelled'))
+    sessions = select(session.room_id, session.started_at, session.ended_at).where(session.ended_at.is_not(None))
+    if since is not None:
+        bookings, sessions = bookings.where(booking.end_time > since), sessions.where(session.ended_at > since)
+    if until is not None:
+        bookings, sessions = bookings.where(booking.start_time < until), sessions.where(session.started_at < until)
+    booking_facts = _load_facts(db, bookings, ('room_id', 'start', 'end', 'rate'))
+    session_facts = _load_facts(db, sessions)
+    booked = _hour_pieces(booking_facts, since, until)
+    played = _hour_pieces(session_facts, since, until)
+
+    rooms = _room_info(db, None)
+    clubs = pd.Series({room_id: club_id for room_id, (club_id, _) in rooms.items()}, dtype='float64')
+    rates = pd.Series({room_id: rate for room_id, (_, rate) in rooms.items()}, dtype='float64')
+    per_hour = pd.concat([
+        pd.DataFrame({'room_id': booked.room_id, 'hour': booked.hour, 'bookings': booked['count'], 'booked_seconds': booked.seconds,
+                      'revenue': booked.seconds / 3600 * booked.rate.fillna(booked.room_id.map(rates)).fillna(0.0).to_numpy()}),
+        pd.DataFrame({'room_id': played.room_id, 'hour': played.hour, 'sessions': played['count'], 'session_seconds': played.seconds}),
+    ]).fillna({name: 0 for name in VALUE_COLUMNS})
+    per_hour['club_id'] = per_hour.room_id.map(clubs)
+
+    rows = []
+    for grain in GRAINS:
+        per_hour['bucket'] = per_hour.hour.dt.floor('D') if grain == 'day' else per_hour.hour
+        for scope, column in (('room', 'room_id'), ('club', 'club_id')):
+            totals = per_hour.dropna(subset=[column]).groupby([column, 'bucket'])[list(VALUE_COLUMNS)].sum().reset_index()
+            totals = totals.astype({column: 'int64', 'bookings': 'int64', 'sessions': 'int64'})
+            columns = [totals[column].tolist(), list(totals.bucket.dt.to_pydatetime())] + [totals[name].tolist() for name in VALUE_COLUMNS]
+            rows += [dict(zip(ROLLUP_KEYS, (grain, scope) + values)) for values in zip(*columns)]
+
+    stmt = delete(models.UsageRollup)
+    if since is not None:
+        stmt = stmt.where(models.UsageRollup.bucket >= since)
+    if until is not None:
+        stmt = stmt.where(models.UsageRollup.bucket < until)
+    db.execute(stmt.execution_options(synchronize_session=False))
+    # plain executemany: the ORM bulk path costs more than the aggregation itself
+    conn = db.connection()
+    for i in range(0, len(rows), WRITE_BATCH):
+        conn.execute(insert(models.UsageRollup.__table__), rows[i:i + WRITE_BATCH])
+    mark_changed(db, models.UsageRollup.__tablename__)
+    db.commit()
+    return {'from': since, 'to': until, 'bookings': len(booking_facts), 'sessions': len(session_facts), 'rollups': len(rows),
+            'seconds': round(time.perf_counter() - started, 3)}
+
+
+class RollupCompactor:
+    """Background compaction: the trailing COMPACT_DAYS every COMPACT_SECONDS
+    (when set), and the window passed to ``request`` (after bulk writes).
+    Requests made while a compaction runs fold into one follow-up run over
+    the union of their windows."""
+    def __init__(self, interval: float=COMPACT_SECONDS, days: int=COMPACT_DAYS):
+        self.interval = interval
+        self.days = days
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='analytics-compactor', daemon=True)
+                self._thread.start()
+
+    def request(self, since: datetime=None, until: datetime=None):
+        """Compact [since, until) soon; a None bound is unbounded."""
+        with self._lock:
+            self._pending = _union(self._pending, (since, until))
+        self._wake.set()
+        self.start()
+
+    def stop(self, timeout: float=30.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval or None)
+            if self._stop.is_set():
+                return
+            self._wake.clear()
+            with self._lock:
+                window, self._pending = self._pending, None
+            if window is None:
+                window = (datetime.now() - timedelta(days=self.days), None)
+            try:
+                with SessionLocal() as db:
+                    stats = compact(db, *window)
+                logger.info(f"Analytics rollups compacted: {stats['rollups']} rows in {stats['seconds']}s")
+            except Exception:
+                logger.exception('Failed to compact analytics rollups')
+
+
+compactor = RollupCompactor()
+
+
+# Reads: one row per bucket from the rollups, zero-filled.
+
+def bucket_range(grain: str, since: datetime=None, until: datetime=None):
+    """Aligned [since, until) covering the request, or ValueError."""
+    step = GRAINS[grain]
+    until = bucket_start(until if until is not None else datetime.now(), grain) + step
+    since = bucket_start(since, grain) if since is not None else until - step * DEFAULT_BUCKETS[grain]
+    if since >= until:
+        raise ValueError('to must be after from')
+    if (until - since) / step > MAX_BUCKETS:
+        raise ValueError(f'At most {MAX_BUCKETS} {grain} buckets per request')
+    return since, until
+
+
+def usage_series(db: Session, scope: str, scope_id: int, grain: str, since: datetime, until: datetime, rooms: int=1):
+    """UsageBucket per ``grain`` in [since, until); utilization is the booked
+    (played) share of the ``rooms``' time in the bucket."""
+    rollup = models.UsageRollup
+    stmt = select(rollup).where(rollup.grain == grain, rollup.scope == scope, rollup.scope_id == scope_id,
+                                rollup.bucket >= since, rollup.bucket < until)
+    found = {row.bucket: row for row in db.scalars(stmt)}
+    step = GRAINS[grain]
+    capacity = step.total_seconds() * max(rooms, 1)
+    series, bucket = [], since
+    while bucket < until:
+        row = found.get(bucket)
+        values = [getattr(row, name) or 0 for name in VALUE_COLUMNS] if row is not None else [0, 0.0, 0, 0.0, 0.0]
+        series.append(_usage(schemas.UsageBucket, capacity, *values, bucket=bucket, session_utilization=round(values[3] / capacity, 4)))
+        bucket += step
+    return series
+
+
+def room_totals(db: Session, club_id: int, since: datetime, until: datetime):
+    """RoomUsage per room of the club over whole days in [since, until), busiest first."""
+    rollup, room = models.UsageRollup, models.Room
+    club_rooms = (select(room.room_id, room.name)
+                  .join(models.Arena, models.Arena.arena_id == room.arena_id)
+                  .where(models.Arena.club_id == club_id))
+    names = dict(db.execute(club_rooms).all())
+    stmt = (select(rollup.scope_id, *(func.sum(getattr(rollup, name)) for name in VALUE_COLUMNS))
+            .where(rollup.grain == 'day', rollup.scope == 'room', rollup.scope_id.in_(club_rooms.with_only_columns(room.room_id)),
+                   rollup.bucket >= since, rollup.bucket < until)
+            .group_by(rollup.scope_id))
+    totals = {room_id: values for room_id, *values in db.execute(stmt).all()}
+    capacity = (until - since).total_seconds()
+    usage = [_usage(schemas.RoomUsage, capacity, *[v or 0 for v in totals.get(room_id, (0, 0.0, 0, 0.0, 0.0))], room_id=room_id, name=name)
+             for room_id, name in names.items()]
+    usage.sort(key=lambda u: (-u.booked_hours, u.room_id))
+    return usage
+
+
+def _usage(schema, capacity, bookings, booked_seconds, sessions, session_seconds, revenue, **extra):
+    return schema(bookings=bookings, booked_hours=round(booked_seconds / 3600, 3), sessions=sessions,
+                  session_hours=round(session_seconds / 3600, 3), revenue=round(revenue, 2),
+                  utilization=round(booked_seconds / capacity, 4), **extra)
@@ -0,0 +1,145 @@
+import asyncio
+import functools
+import os
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from fastapi.routing import APIRoute, request_response
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import await_only
+from app.database import DATABASE_URL, SessionLocal, _env_bool, get_db, pool_settings
+from app.query_stats import instrument_engine
+
+ASYNC_DB = _env_bool('DB_ASYNC', False)
+# async DBAPI driver per backend, used when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {'sqlite': 'aiosqlite', 'mssql': 'aioodbc', 'postgresql': 'asyncpg'}
+# Session.info flag telling shared sync code it runs inside AsyncSession.run_sync
+ASYNC_SESSION_KEY = 'async'
+
+def async_database_url(url=DATABASE_URL) -> str:
+    explicit = os.getenv('ASYNC_DATABASE_URL')
+    if explicit:
+        return explicit
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver known for {backend}; set ASYNC_DATABASE_URL')
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}').render_as_string(hide_password=False)
+
+
+# called with the sync engine behind the async one when it is created
+_engine_hooks = [instrument_engine]
+
+def on_async_engine(hook):
+    """Run ``hook(sync_engine)`` on the async engine's sync engine, now if it
+    already exists, else when it is created."""
+    _engine_hooks.append(hook)
+    if get_async_engine.cache_info().currsize:
+        hook(get_async_engine().sync_engine)
+
+
+@lru_cache(maxsize=None)
+def get_async_engine():
+    """AsyncEngine on the async driver, with the same DB_POOL_* settings as
+    the sync engine (some async dialects, e.g. aiosqlite, default to NullPool)."""
+    url = async_database_url()
+    kwargs = pool_settings(url)
+    if kwargs:
+        kwargs['poolclass'] = AsyncAdaptedQueuePool
+    engine = create_async_engine(url, **kwargs)
+    for hook in _engine_hooks:
+        hook(engine.sync_engine)
+    return engine
+
+
+@lru_cache(maxsize=None)
+def get_async_sessionmaker():
+    # the sync session class is SessionLocal's, so the change-tracking events apply;
+    # nothing is expired on commit because lazy loads cannot run after run_sync returns
+    return async_sessionmaker(get_async_engine(), sync_session_class=SessionLocal.class_, autoflush=False,
+                              expire_on_commit=False, info={ASYNC_SESSION_KEY: True})
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+
+
+def is_async_session(db) -> bool:
+    return bool(db.info.get(ASYNC_SESSION_KEY))
+
+
+def pause(db, seconds: float):
+    """time.sleep that yields to the event loop when ``db`` is an async session."""
+    if is_async_session(db):
+        await_only(asyncio.sleep(seconds))
+    else:
+        time.sleep(seconds)
+
+
+@contextmanager
+def hold(db, lock):
+    """Hold a threading.Lock without blocking the event loop in async mode.
+
+    Async requests share one thread, so a blocking acquire there would
+    deadlock against the request holding the lock across a DB await.
+    """
+    if is_async_session(db):
+        while not lock.acquire(blocking=False):
+            pause(db, 0.001)
+    else:
+        lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def in_session(func, names):
+    """Async twin of a sync endpoint or dependency taking Session parameters:
+    the same code runs in ``AsyncSession.run_sync``, so each query awaits the
+    async driver instead of blocking a threadpool worker."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        db = kwargs[names[0]]
+        def call(sync_session):
+            return func(*args, **{**kwargs, **{name: sync_session for name in names}})
+        return await db.run_sync(call)
+    wrapper.__wrapped_in_session__ = True
+    return wrapper
+
+
+def _wrap_dependant(dependant):
+    for sub in dependant.dependencies:
+        _wrap_dependant(sub)
+    names = [sub.name for sub in dependant.dependencies if sub.call is get_db]
+    call = dependant.call
+    if names and not asyncio.iscoroutinefunction(call) and not getattr(call, '__wrapped_in_session__', False):
+        dependant.call = in_session(call, names)
+
+
+def use_async_sessions(app):
+    """Switch every route of ``app`` that depends on get_db to AsyncSession.
+
+    get_db is overridden with get_async_db and each sync endpoint/dependency
+    receiving it is wrapped with ``in_session``; routes without a database
+    session (exports stream from their own sync session) are left as they are.
+    """
+    app.dependency_overrides[get_db] = get_async_db
+    wrap_routes(app.routes)
+    app.add_event_handler('shutdown', dispose_async_engine)
+
+
+def wrap_routes(routes):
+    """The per-route part of use_async_sessions, for routes added later."""
+    for route in routes:
+        if isinstance(route, APIRoute):
+            _wrap_dependant(route.dependant)
+            route.app = request_response(route.get_route_handler())
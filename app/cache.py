@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.versions import bump_version, get_version
+
+CACHE_TTL_SECONDS = float(os.getenv('KV_CACHE_TTL_SECONDS', '300'))
+CACHE_MAX_ENTRIES = int(os.getenv('KV_CACHE_MAX_ENTRIES', '10000'))
+VERSION_CHECK_SECONDS = float(os.getenv('KV_CACHE_VERSION_CHECK_SECONDS', '1'))
+
+class VersionedCache:
+    """In-process read-through LRU cache with per-entry TTL.
+
+    Writers call ``invalidate``, which clears the local entries and bumps the
+    ChangeVersion row ``name`` in the database; every worker compares that
+    counter with the one it loaded under (at most once per
+    VERSION_CHECK_SECONDS) and drops its entries when it moved.
+    """
+    def __init__(self, name: str, ttl: float=CACHE_TTL_SECONDS, maxsize: int=CACHE_MAX_ENTRIES, version_check: float=VERSION_CHECK_SECONDS):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.version_check = version_check
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+
+    def get_or_load(self, db: Session, key, loader):
+        self._sync_version(db)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        value = loader()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, db: Session):
+        bump_version(db, self.name)
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._checked_at = 0.0
+
+    def _sync_version(self, db: Session):
+        now = time.monotonic()
+        if now - self._checked_at < self.version_check:
+            return
+        version = get_version(db, self.name)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._checked_at = now
+
+
+config_cache = VersionedCache('ConfigKV')
+price_cache = VersionedCache('PriceKV')
+
+
+def get_config(db: Session, key: str, club_id=None):
+    """ConfigKV entry for (club_id, key), falling back to the global (club_id NULL) one."""
+    return config_cache.get_or_load(db, (club_id, key), lambda: _lookup(db, models.ConfigKV, models.ConfigKV.config_key, schemas.ConfigKVRead, key, club_id))
+
+
+def get_price(db: Session, key: str, club_id=None):
+    """PriceKV entry for (club_id, key), falling back to the global (club_id NULL) one."""
+    return price_cache.get_or_load(db, (club_id, key), lambda: _lookup(db, models.PriceKV, models.PriceKV.price_key, schemas.PriceKVRead, key, club_id))
+
+
+def _lookup(db: Session, model, key_column, read_schema, key, club_id):
+    # cached values are detached pydantic models, never session-bound ORM rows
+    for scope in ([club_id, None] if club_id is not None else [None]):
+        obj = db.scalars(select(model).where(key_column == key, model.club_id.is_(None) if scope is None else model.club_id == scope)).first()
+        if obj is not None:
+            return read_schema.model_validate(obj)
+    return None
@@ -0,0 +1,65 @@
+import re
+from sqlalchemy import event
+from app.database import engine
+from app.async_db import on_async_engine
+from app.versions import bump_versions
+
+# tables whose writes do not change any API resource
+UNTRACKED_TABLES = {'ChangeVersion', 'RequestLog', 'SchemaVersion'}
+# execution option for writes that must not bump a version (e.g. the no-op
+# UPDATE used as a row lock in app.locks)
+TRACK_CHANGES_OPTION = 'track_changes'
+_KEY = 'changed_tables'
+# target table of textual INSERT/UPDATE/DELETE (exec_driver_sql, text())
+_WRITTEN_TABLE = re.compile(r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+[\["`]?(\w+)', re.IGNORECASE)
+
+def _remember(conn, tables):
+    tables = {t for t in tables if t and t not in UNTRACKED_TABLES}
+    if tables:
+        conn.info.setdefault(_KEY, set()).update(tables)
+
+
+def mark_changed(session, *tables):
+    """Bump ``tables`` when ``session`` commits, for writes the statement
+    hooks cannot attribute to a table."""
+    _remember(session.connection(), tables)
+
+
+def _written_table(statement, context):
+    compiled = getattr(context, 'compiled', None)
+    if compiled is not None and (context.isinsert or context.isupdate or context.isdelete):
+        return getattr(getattr(compiled.statement, 'table', None), 'name', None)
+    match = _WRITTEN_TABLE.match(statement)
+    return match.group(1) if match else None
+
+
+def _collect(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and context.execution_options.get(TRACK_CHANGES_OPTION, True) is False:
+        return
+    _remember(conn, {_written_table(statement, context)})
+
+
+def _bump_on_commit(conn):
+    # runs before the DBAPI commit: the versions move in the same transaction
+    # as the write, and a failed bump fails the commit instead of leaving
+    # stale ETags and caches behind
+    tables = conn.info.pop(_KEY, None)
+    if tables:
+        bump_versions(conn, tables)
+
+
+def _forget(conn):
+    conn.info.pop(_KEY, None)
+
+
+def track_changes(bind):
+    """Bump the ChangeVersion row of every table written through ``bind``
+    (ORM flushes, bulk statements, Core and textual SQL alike) when the
+    transaction commits; rollbacks discard them."""
+    event.listen(bind, 'after_cursor_execute', _collect)
+    event.listen(bind, 'commit', _bump_on_commit)
+    event.listen(bind, 'rollback', _forget)
+
+
+track_changes(engine)
+on_async_engine(track_changes)
@@ -0,0 +1,74 @@
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import timezone
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app import models as models_module
+from app.expand import parse_include
+from app.versions import get_versions
+
+def etag_for(*model_names):
+    """Dependency for GET routes whose payload depends only on the named models.
+
+    The ETag hashes the request URL with the ChangeVersion counters of the
+    models' tables (plus any ``include=`` tables), which the write paths bump
+    on commit (app.change_tracking). A matching If-None-Match, or an
+    If-Modified-Since not older than the newest change, short-circuits with
+    304 before the handler queries or serializes anything.
+    """
+    def dependency(request: Request, response: Response, db: Session = Depends(get_db)):
+        models = [getattr(models_module, name) for name in model_names]
+        tables = {m.__tablename__ for m in models}
+        include = request.query_params.get('include')
+        if include:
+            tables |= _included_tables(models[0], parse_include(models[0], include))
+        versions = get_versions(db, tables)
+        digest = hashlib.sha1(str(request.url).encode('utf-8'))
+        for name, (version, _) in versions.items():
+            digest.update(f'|{name}:{version}'.encode('utf-8'))
+        etag = f'W/"{digest.hexdigest()}"'
+        headers = {'ETag': etag}
+        stamps = [updated_at for _, updated_at in versions.values()]
+        last_modified = max(stamps) if stamps and None not in stamps else None
+        if last_modified is not None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+            headers['Last-Modified'] = format_datetime(last_modified, usegmt=True)
+        if _not_modified(request, etag, last_modified):
+            raise HTTPException(304, headers=headers)
+        response.headers.update(headers)
+        request.state.conditional_headers = headers
+    return dependency
+
+
+async def conditional_headers_middleware(request: Request, call_next):
+    """Copy the validators onto responses that handlers build themselves
+    (ORJSONResponse/Response/StreamingResponse bypass the injected Response's headers)."""
+    response = await call_next(request)
+    for name, value in getattr(request.state, 'conditional_headers', {}).items():
+        if name not in response.headers:
+            response.headers[name] = value
+    return response
+
+
+def _not_modified(request: Request, etag: str, last_modified) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = {t.strip() for t in if_none_match.split(',')}
+        return '*' in tags or etag in tags or etag[2:] in tags
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since and last_modified is not None:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _included_tables(model, tree):
+    tables = set()
+    for name, children in tree.items():
+        target = model.__mapper__.relationships[name].mapper.class_
+        tables.add(target.__tablename__)
+        tables |= _included_tables(target, children)
+    return tables
@@ -1,5 +1,11 @@
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import delete as sa_delete, insert, select, update as sa_update
+
+MAX_BULK_ITEMS = 5000
+IN_CHUNK = 1000  # keeps IN (...) lists under MSSQL's 2100 parameter limit
 
 def get_all(db: Session, model):
     return db.scalars(select(model)).all()
@@ -24,3 +30,115 @@ def delete(db: Session, obj):
     db.delete(obj)
     db.commit()
     return True
+
+# Bulk operations used by the /<resource>/bulk endpoints. Each validates every
+# item, collects per-item errors ({'index', 'error'}) and writes the accepted
+# items with one executemany in a single transaction. With atomic=True any
+# item error rejects the whole request (422) and nothing is written.
+# ``check(db, items)`` is an optional resource-specific hook that receives the
+# validated (index, data) pairs and returns the (index, message) pairs to reject.
+
+def bulk_create(db: Session, model, schema, items: list, atomic: bool=False, check=None):
+    _check_size(items)
+    valid, errors = _validate(schema, items)
+    valid = _run_check(db, check, valid, errors)
+    _reject_if_atomic(db, atomic, errors)
+    pk = _pk(model)
+    ids = []
+    if valid:
+        stmt = insert(model).returning(pk, sort_by_parameter_order=True)
+        ids = _write(db, lambda: list(db.scalars(stmt, [data for _, data in valid])))
+    return _result(ids, errors)
+
+def bulk_update(db: Session, model, schema, items: list, atomic: bool=False, check=None):
+    _check_size(items)
+    pk = _pk(model)
+    keyed, errors = [], []
+    for i, raw in enumerate(items):
+        if not isinstance(raw, dict) or raw.get(pk.key) is None:
+            errors.append({'index': i, 'error': f'{pk.key} is required'})
+        else:
+            keyed.append((i, raw))
+    existing = existing_ids(db, pk, [raw[pk.key] for _, raw in keyed])
+    candidates = []
+    for i, raw in keyed:
+        if raw[pk.key] not in existing:
+            errors.append({'index': i, 'error': f'{model.__name__} not found'})
+        else:
+            candidates.append((i, raw))
+    valid, validation_errors = _validate(schema, [raw for _, raw in candidates], [i for i, _ in candidates])
+    errors.extend(validation_errors)
+    ids_by_index = {i: raw[pk.key] for i, raw in candidates}
+    valid = [(i, {**data, pk.key: ids_by_index[i]}) for i, data in valid]
+    valid = _run_check(db, check, valid, errors)
+    _reject_if_atomic(db, atomic, errors)
+    ids = []
+    if valid:
+        rows = [data for _, data in valid]
+        _write(db, lambda: db.execute(sa_update(model), rows))
+        ids = [data[pk.key] for data in rows]
+    return _result(ids, errors)
+
+def bulk_delete(db: Session, model, ids: list, atomic: bool=False):
+    _check_size(ids)
+    pk = _pk(model)
+    existing = existing_ids(db, pk, ids)
+    errors = [{'index': i, 'error': f'{model.__name__} not found'} for i, id_ in enumerate(ids) if id_ not in existing]
+    _reject_if_atomic(db, atomic, errors)
+    found = [id_ for id_ in dict.fromkeys(ids) if id_ in existing]
+
+    def run():
+        for i in range(0, len(found), IN_CHUNK):
+            db.execute(sa_delete(model).where(pk.in_(found[i:i+IN_CHUNK])).execution_options(synchronize_session=False))
+    if found:
+        _write(db, run)
+    return _result(found, errors)
+
+
+def _pk(model):
+    return model.__mapper__.primary_key[0]
+
+def _check_size(items):
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(413, f'At most {MAX_BULK_ITEMS} items per bulk request')
+
+def _validate(schema, items, indexes=None):
+    valid, errors = [], []
+    for n, raw in enumerate(items):
+        i = indexes[n] if indexes is not None else n
+        try:
+            valid.append((i, schema.model_validate(raw).model_dump()))
+        except ValidationError as e:
+            errors.append({'index': i, 'error': '; '.join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+    return valid, errors
+
+def _run_check(db, check, valid, errors):
+    if not check or not valid:
+        return valid
+    rejected = dict(check(db, valid))
+    errors.extend({'index': i, 'error': msg} for i, msg in rejected.items())
+    return [(i, data) for i, data in valid if i not in rejected]
+
+def _reject_if_atomic(db, atomic, errors):
+    if atomic and errors:
+        db.rollback()
+        raise HTTPException(422, {'errors': sorted(errors, key=lambda e: e['index'])})
+
+def existing_ids(db, pk, ids):
+    ids = list(dict.fromkeys(ids))
+    found = set()
+    for i in range(0, len(ids), IN_CHUNK):
+        found.update(db.scalars(select(pk).where(pk.in_(ids[i:i+IN_CHUNK]))))
+    return found
+
+def _write(db, fn):
+    try:
+        result = fn()
+        db.commit()
+        return result
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(409, f'Bulk write rejected by the database: {e.orig}')
+
+def _result(ids, errors):
+    return {'succeeded': len(ids), 'ids': ids, 'errors': sorted(errors, key=lambda e: e['index'])}
@@ -1,10 +1,43 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from dotenv import load_dotenv
+from app.pool_metrics import TimedQueuePool, pool_metrics
+from app.query_stats import instrument_engine
 load_dotenv()
 DATABASE_URL = os.getenv('DATABASE_URL') or 'sqlite:///./test.db'
-engine = create_engine(DATABASE_URL, future=True)
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    return default if value is None else value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def pool_settings(url=DATABASE_URL):
+    """QueuePool settings from DB_POOL_* environment variables.
+
+    Unset variables keep SQLAlchemy's defaults (5 + 10 overflow, 30 s timeout,
+    no recycle, no pre-ping). In-memory SQLite keeps its single-connection pool.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '-1')),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', False),
+    }
+
+engine_kwargs = pool_settings()
+if DATABASE_URL.startswith('mssql+pyodbc'):
+    # send executemany() batches (ETL bulk loads) as a single parameter array
+    engine_kwargs['fast_executemany'] = True
+engine = create_engine(DATABASE_URL, future=True, **engine_kwargs)
+engine.pool.metrics = pool_metrics
+pool_metrics.listen(engine.pool)
+instrument_engine(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 class Base(DeclarativeBase):
     pass
@@ -1,6 +1,6 @@
 import pandas as pd
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 
 SUPPORTED = ['.csv', '.xls', '.xlsx']
 
@@ -28,6 +28,32 @@ class DataExtractor:
                 frames.append(sheet_df)
             df = pd.concat(frames, ignore_index=True)
             meta['sheets'] = list(xls.keys())
+        return self._clean(df), meta
+
+    def iter_extract(self, file_path: Path, chunk_size: int) -> Iterator[Tuple[pd.DataFrame, dict]]:
+        """Yield the file as DataFrames of at most ``chunk_size`` rows.
+
+        CSV files are streamed, so memory use depends on the chunk size only.
+        Excel workbooks cannot be read incrementally by pandas; they are read
+        one sheet at a time and the sheet is sliced into chunks.
+        """
+        suffix = file_path.suffix.lower()
+        if suffix == '.csv':
+            with pd.read_csv(file_path, chunksize=chunk_size) as reader:
+                for i, chunk in enumerate(reader):
+                    yield self._clean(chunk), {'source': str(file_path.name), 'chunk': i}
+            return
+        sheets = pd.ExcelFile(file_path)
+        i = 0
+        for sheet_name in sheets.sheet_names:
+            sheet_df = sheets.parse(sheet_name)
+            sheet_df['__sheet'] = sheet_name
+            for start in range(0, len(sheet_df), chunk_size):
+                meta = {'source': str(file_path.name), 'chunk': i, 'sheets': [sheet_name]}
+                yield self._clean(sheet_df.iloc[start:start+chunk_size]), meta
+                i += 1
+            del sheet_df
+
+    def _clean(self, df: pd.DataFrame) -> pd.DataFrame:
         df.columns = [str(c).strip() for c in df.columns]
-        df = df.dropna(how='all')
-        return df, meta
+        return df.dropna(how='all')
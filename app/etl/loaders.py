@@ -1,50 +1,233 @@
+import threading
+import time
+from contextlib import contextmanager
 from typing import List, Dict, Any, Optional
+from sqlalchemy import insert, select, update
 from sqlalchemy.orm import Session
 from app import models
 from app.database import SessionLocal
+from app import change_tracking  # player writes bump the Player change version
 from pathlib import Path
 
 BATCH = 200
+# Core path: executemany batches start at CORE_BATCH and are resized between
+# MIN_BATCH and MAX_BATCH so each round trip takes about BATCH_TARGET_SECONDS.
+CORE_BATCH = 2000
+MIN_BATCH = 200
+MAX_BATCH = 50000
+BATCH_TARGET_SECONDS = 0.5
+PLAYER_COLUMNS = ('first_name', 'last_name', 'email', 'rating')
+# Upsert: parameters per email IN (...) lookup (stays under MSSQL's 2100 parameter limit)
+UPSERT_LOOKUP_CHUNK = 1000
+UPSERT_FIELDS = ('first_name', 'last_name', 'rating')
 
 class DataLoader:
-    def __init__(self, db_session: Optional[Session]=None, output_dir: str='data/output', errors_dir: str='data/errors'):
+    def __init__(self, db_session: Optional[Session]=None, output_dir: str='data/output', errors_dir: str='data/errors', use_core: bool=True, commit_per_file: bool=False, upsert: bool=False, skip_existing: bool=False):
         self.db_session = db_session
+        self.upsert = upsert
+        # insert only players whose email is not in the table yet (no updates)
+        self.skip_existing = skip_existing
+        self.use_core = use_core
+        # commit once per file_transaction() (once per bulk_insert_players call outside one)
+        self.commit_per_file = commit_per_file
+        self._local = threading.local()
         self.output_dir = Path(output_dir)
         self.errors_dir = Path(errors_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.errors_dir.mkdir(parents=True, exist_ok=True)
 
-    def bulk_insert_players(self, records: List[Dict[str, Any]]):
+    @contextmanager
+    def file_transaction(self):
+        """With ``commit_per_file``, run every load inside the block in one
+        transaction that commits when the block exits (and rolls back if it
+        raises); the orchestrator wraps each input file in it. Without
+        ``commit_per_file`` this is a no-op and loads commit on their own. The
+        transaction belongs to the calling thread, so parallel writers each
+        get their own."""
+        if not self.commit_per_file:
+            yield
+            return
         db = self.db_session or SessionLocal()
-        created = 0
+        self._local.db = db
         try:
-            for i in range(0, len(records), BATCH):
-                chunk = records[i:i+BATCH]
-                objs = []
-                for r in chunk:
-                    obj = models.Player(
-                        first_name=r.get('first_name'),
-                        last_name=r.get('last_name'),
-                        email=r.get('email'),
-                        rating=r.get('rating') if r.get('rating') is not None else None
-                    )
-                    objs.append(obj)
-                db.add_all(objs)
-                db.commit()
-                created += len(objs)
-            return created
+            yield
+            db.commit()
         except Exception:
             db.rollback()
             raise
         finally:
+            self._local.db = None
             if self.db_session is None:
                 db.close()
 
-    def save_errors(self, invalid_df, source_name: str):
+    @contextmanager
+    def _session(self):
+        """(session, commit) for one load: the file transaction's session and
+        no commit inside it, otherwise the loader's session committing as
+        configured."""
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            yield db, False
+            return
+        db = self.db_session or SessionLocal()
+        try:
+            yield db, True
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            if self.db_session is None:
+                db.close()
+
+    def bulk_insert_players(self, records: List[Dict[str, Any]]):
+        if self.upsert or self.skip_existing:
+            return self.upsert_players(records, update_existing=self.upsert)['created']
+        if self.use_core:
+            return self.core_insert_players(records)
+        return self.orm_insert_players(records)
+
+    def core_insert_players(self, records: List[Dict[str, Any]]):
+        """Insert through a Core ``insert()`` executemany (fast_executemany on
+        pyodbc, see app.database) without building ORM objects."""
+        if not records:
+            return 0
+        with self._session() as (db, commit):
+            created = self._core_insert(db, records, commit_batches=commit and not self.commit_per_file)
+            if commit and self.commit_per_file:
+                db.commit()
+        return created
+
+    def _core_insert(self, db: Session, records: List[Dict[str, Any]], commit_batches: bool) -> int:
+        columns = [c for c in PLAYER_COLUMNS if c in records[0]]
+        default_rating = models.Player.__table__.c.rating.default.arg
+        stmt = insert(models.Player)
+        created = 0
+        batch = CORE_BATCH
+        i = 0
+        while i < len(records):
+            rows = [{c: r.get(c) for c in columns} for r in records[i:i+batch]]
+            for row in rows:
+                row.update(models.search_keys(row))
+            if 'rating' in columns:
+                for row in rows:
+                    if row['rating'] is None:
+                        row['rating'] = default_rating
+            started = time.perf_counter()
+            db.execute(stmt, rows)
+            if commit_batches:
+                db.commit()
+            batch = _adapt_batch(batch, time.perf_counter() - started)
+            created += len(rows)
+            i += len(rows)
+        return created
+
+    def upsert_players(self, records: List[Dict[str, Any]], update_existing: bool=True) -> Dict[str, int]:
+        """Insert new players and update existing ones, keyed by email.
+
+        Emails are matched stripped and by their search key (casefolded,
+        ё-folded: models.search_key, as /players/search does), and duplicates
+        inside ``records`` collapse to the last occurrence. Existing players
+        are found with chunked ``email_key IN (...)`` queries on the indexed
+        Player.email_key, and only rows whose name or rating differ are
+        updated, so re-importing the same file is a no-op. Updates and
+        inserts run in one transaction (the file's with ``commit_per_file``);
+        new players go through Core or the ORM as ``use_core`` says.
+        With ``update_existing=False`` existing players are left as they are
+        and counted as unchanged."""
+        by_email = {}
+        without_email = []
+        for r in records:
+            row = {c: r.get(c) for c in PLAYER_COLUMNS}
+            if isinstance(row['email'], str) and row['email'].strip():
+                row['email'] = row['email'].strip()
+                by_email[models.search_key(row['email'])] = row
+            else:
+                without_email.append(row)
+        fields = [c for c in UPSERT_FIELDS if records and c in records[0]]
+        stats = {'created': 0, 'updated': 0, 'unchanged': 0}
+        with self._session() as (db, commit):
+            keys = list(by_email)
+            for i in range(0, len(keys), UPSERT_LOOKUP_CHUNK):
+                chunk = keys[i:i+UPSERT_LOOKUP_CHUNK]
+                existing = db.execute(
+                    select(models.Player.player_id, models.Player.email_key, *[getattr(models.Player, c) for c in fields])
+                    .where(models.Player.email_key.in_(chunk))
+                ).mappings().all()
+                changes = []
+                for current in existing:
+                    row = by_email.pop(current['email_key'], None)
+                    if row is None:
+                        continue
+                    if update_existing and any(row[c] != current[c] for c in fields):
+                        values = {c: row[c] for c in fields}
+                        changes.append({'player_id': current['player_id'], **values, **models.search_keys(values)})
+                    else:
+                        stats['unchanged'] += 1
+                if changes:
+                    db.execute(update(models.Player), changes)
+                    stats['updated'] += len(changes)
+            new_rows = list(by_email.values()) + without_email
+            if new_rows:
+                insert_rows = self._core_insert if self.use_core else self._orm_insert
+                stats['created'] = insert_rows(db, new_rows, commit_batches=False)
+            if commit:
+                db.commit()
+        return stats
+
+    def orm_insert_players(self, records: List[Dict[str, Any]]):
+        with self._session() as (db, commit):
+            created = self._orm_insert(db, records, commit_batches=commit and not self.commit_per_file)
+            if commit and self.commit_per_file:
+                db.commit()
+        return created
+
+    def _orm_insert(self, db: Session, records: List[Dict[str, Any]], commit_batches: bool) -> int:
+        created = 0
+        for i in range(0, len(records), BATCH):
+            chunk = records[i:i+BATCH]
+            objs = []
+            for r in chunk:
+                obj = models.Player(
+                    first_name=r.get('first_name'),
+                    last_name=r.get('last_name'),
+                    email=r.get('email'),
+                    rating=r.get('rating') if r.get('rating') is not None else None
+                )
+                objs.append(obj)
+            db.add_all(objs)
+            if commit_batches:
+                db.commit()
+            else:
+                db.flush()
+            created += len(objs)
+        return created
+
+    def save_errors(self, invalid_df, source_name: str, append: bool=False):
+        """Write invalid rows to errors_<source>.csv/.json.
+
+        With ``append=True`` the rows are added to the files written by a
+        previous call (used when a file is processed in chunks)."""
         if invalid_df is None or invalid_df.empty:
             return None
         csv_path = self.errors_dir / f"errors_{source_name}.csv"
         json_path = self.errors_dir / f"errors_{source_name}.json"
-        invalid_df.to_csv(csv_path, index=False)
-        invalid_df.to_json(json_path, orient='records', force_ascii=False)
+        if append and csv_path.exists() and json_path.exists():
+            invalid_df.to_csv(csv_path, index=False, mode='a', header=False)
+            chunk_json = invalid_df.to_json(orient='records', force_ascii=False)
+            with open(json_path, 'r+b') as fh:
+                # drop the closing bracket and continue the same JSON array
+                fh.seek(-1, 2)
+                fh.truncate()
+                fh.write((',' + chunk_json[1:]).encode('utf-8'))
+        else:
+            invalid_df.to_csv(csv_path, index=False)
+            invalid_df.to_json(json_path, orient='records', force_ascii=False)
         return csv_path, json_path
+
+
+def _adapt_batch(batch: int, elapsed: float) -> int:
+    if elapsed < BATCH_TARGET_SECONDS / 2:
+        return min(batch * 2, MAX_BATCH)
+    if elapsed > BATCH_TARGET_SECONDS * 2:
+        return max(batch // 2, MIN_BATCH)
+    return batch
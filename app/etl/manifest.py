@@ -0,0 +1,144 @@
+import hashlib
+import sqlite3
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, Tuple
+import numpy as np
+import pandas as pd
+
+READ_BLOCK = 1 << 20
+LOOKUP_CHUNK = 900  # stay under SQLite's bound-parameter limit
+
+class IngestManifest:
+    """SQLite record of what the players ETL has already loaded.
+
+    Files are keyed by a SHA-256 of their content, so a re-dropped export is
+    recognised with a single primary-key lookup. Optionally every ingested
+    row is recorded by a 64-bit hash of its values, which lets overlapping
+    exports (and reruns after a crash mid-file) load only the rows not seen
+    before.
+
+    The connection opens on first use; close() releases it and the next use
+    opens it again.
+    """
+    def __init__(self, path, row_hashes: bool=True):
+        self.path = Path(path)
+        self.row_hashes = row_hashes
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute('CREATE TABLE IF NOT EXISTS files (hash TEXT PRIMARY KEY, name TEXT, rows INTEGER, ingested_at TEXT DEFAULT CURRENT_TIMESTAMP)')
+            conn.execute('CREATE TABLE IF NOT EXISTS rows (hash INTEGER PRIMARY KEY) WITHOUT ROWID')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def file_hash(file_path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as fh:
+            for block in iter(lambda: fh.read(READ_BLOCK), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def has_file(self, digest: str) -> bool:
+        with self._lock:
+            return self.conn.execute('SELECT 1 FROM files WHERE hash = ?', (digest,)).fetchone() is not None
+
+    def add_file(self, digest: str, name: str, rows: int):
+        with self._lock:
+            self.conn.execute('INSERT OR REPLACE INTO files (hash, name, rows) VALUES (?, ?, ?)', (digest, name, rows))
+            self.conn.commit()
+
+    @staticmethod
+    def hash_rows(df: pd.DataFrame) -> pd.Series:
+        """64-bit hash of each row's values.
+
+        Values are hashed as normalised text, so the same row hashes
+        identically whichever dtype pandas inferred for the chunk it arrived
+        in: integral floats render as integers (1500.0 and 1500), missing
+        values (NaN, None, NaT) as '', dates and midnight datetimes as
+        YYYY-MM-DD."""
+        text = pd.DataFrame({c: _hash_text(df[c]) for c in df.columns}, index=df.index)
+        hashed = pd.util.hash_pandas_object(text, index=False)
+        return pd.Series(hashed.to_numpy().view('int64'), index=df.index)
+
+    def known_rows(self, hashes: list) -> set:
+        """The subset of ``hashes`` already recorded."""
+        seen = set()
+        if not self.row_hashes:
+            return seen
+        with self._lock:
+            for i in range(0, len(hashes), LOOKUP_CHUNK):
+                chunk = hashes[i:i+LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                seen.update(h for (h,) in self.conn.execute(f'SELECT hash FROM rows WHERE hash IN ({placeholders})', chunk))
+        return seen
+
+    def filter_new_rows(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, list]:
+        """Drop rows already recorded; return the remaining rows and their hashes."""
+        if not self.row_hashes or df.empty:
+            return df, []
+        hashes = self.hash_rows(df)
+        values = hashes.tolist()
+        seen = self.known_rows(values)
+        if not seen:
+            return df, values
+        keep = ~hashes.isin(seen)
+        return df.loc[keep], hashes[keep].tolist()
+
+    def add_rows(self, hashes: Iterable[int]):
+        if not self.row_hashes:
+            return
+        with self._lock:
+            self.conn.executemany('INSERT OR IGNORE INTO rows (hash) VALUES (?)', ((h,) for h in hashes))
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# integers above this are not exact as float64, so they keep their float text
+_EXACT_FLOAT_INT = 2 ** 53
+
+
+def _hash_text(s: pd.Series) -> pd.Series:
+    """Column ``s`` as the normalised text hash_rows hashes."""
+    if pd.api.types.is_bool_dtype(s) or pd.api.types.is_integer_dtype(s):
+        return s.astype(object).where(s.notna(), '').astype(str)
+    if pd.api.types.is_float_dtype(s):
+        values = s.to_numpy(dtype='float64', na_value=np.nan)
+        integral = np.isfinite(values) & (values == np.trunc(values)) & (np.abs(values) < _EXACT_FLOAT_INT)
+        rest = ~integral & ~np.isnan(values)
+        text = np.full(len(values), '', dtype=object)
+        text[integral] = values[integral].astype('int64').astype(str)
+        text[rest] = values[rest].astype(str)
+        return pd.Series(text, index=s.index)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s.map(_cell_text, na_action='ignore').fillna('').astype(str)
+    if pd.api.types.is_string_dtype(s) and s.dtype != object:
+        return s.fillna('')
+    # object columns can mix strings, numbers and dates: normalise cell by cell
+    return s.map(_cell_text).astype(str)
+
+
+def _cell_text(value) -> str:
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return ''
+    if isinstance(value, datetime):
+        if (value.hour, value.minute, value.second, value.microsecond) == (0, 0, 0, 0):
+            return value.date().isoformat()
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (float, np.floating)) and value.is_integer() and abs(value) < _EXACT_FLOAT_INT:
+        return str(int(value))
+    return str(value)
@@ -1,41 +1,228 @@
 import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
+import pandas as pd
 from .extractors import DataExtractor
 from .transformers import DataTransformer
 from .loaders import DataLoader
+from .manifest import IngestManifest
+from app.query_stats import query_source
+
+MANIFEST_NAME = 'manifest.sqlite'
+# manifest hash of each input row, carried through transform so a row is recorded only once loaded
+ROW_HASH = '__row_hash'
 
 logger = logging.getLogger('etl')
 
 class ETLOrchestrator:
-    def __init__(self, input_dir='data/input', output_dir='data/output', processed_dir='data/processed', errors_dir='data/errors', db_session=None):
+    def __init__(self, input_dir='data/input', output_dir='data/output', processed_dir='data/processed', errors_dir='data/errors', db_session=None, chunk_size=None, workers=1, db_writers=2, use_core=True, commit_per_file=False, upsert=False, manifest=True, row_hashes=True, skip_existing=False):
         self.extractor = DataExtractor(input_dir)
         self.transformer = DataTransformer()
-        self.loader = DataLoader(db_session=db_session, output_dir=output_dir, errors_dir=errors_dir)
+        # skip_existing: rows whose email is already loaded are skipped instead of
+        # failing the load, so a rerun after a crash between the load commit and
+        # the manifest write does not insert them twice
+        self.loader = DataLoader(db_session=db_session, output_dir=output_dir, errors_dir=errors_dir, use_core=use_core, commit_per_file=commit_per_file, upsert=upsert, skip_existing=skip_existing)
         self.processed_dir = Path(processed_dir)
         self.processed_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.workers = workers
+        # a caller-supplied session is not thread-safe, so it gets a single writer
+        self.db_writers = 1 if db_session is not None else max(1, db_writers)
+        self.manifest = IngestManifest(self.processed_dir / MANIFEST_NAME, row_hashes=row_hashes) if manifest else None
+        # row hashes being loaded by a writer right now: overlapping files in a
+        # parallel run must not both pass the manifest check before either records
+        self._claimed = set()
+        self._claim_lock = threading.Lock()
 
     def run_players(self):
         files = self.extractor.list_files()
         if not files:
             logger.info('No input files found')
             return {'processed':0,'created':0,'errors':0}
+        try:
+            if self.workers > 1 and len(files) > 1:
+                return self.run_players_parallel(files)
+            return self.run_players_sequential(files)
+        finally:
+            if self.manifest:
+                self.manifest.close()
+
+    def run_players_sequential(self, files):
         total_created = 0
         total_errors = 0
         for f in files:
+            digest = self._file_digest(f)
+            if digest is False:
+                continue
             logger.info(f'Processing {f}')
-            df, meta = self.extractor.extract(f)
-            valid_df, invalid_df = self.transformer.transform_players(df)
-            created = 0
-            if not valid_df.empty:
-                records = valid_df.to_dict(orient='records')
-                created = self.loader.bulk_insert_players(records)
+            created, errors = self.process_file(f, digest)
+            total_created += created
+            total_errors += errors
+        return {'processed': len(files), 'created': total_created, 'errors': total_errors}
+
+    def run_players_parallel(self, files):
+        """Extract+transform each file in a worker process and load the results
+        through at most ``db_writers`` concurrent DB sessions. Workers spool
+        every transformed chunk to disk and writers load them back one chunk at
+        a time, so memory stays bounded by the chunk size on both sides. A file
+        is moved to ``processed_dir`` only once all of its chunks have committed."""
+        total_created = 0
+        total_errors = 0
+        manifest_path = self.manifest.path if self.manifest and self.manifest.row_hashes else None
+        with tempfile.TemporaryDirectory(prefix='etl-spool-') as spool, \
+                ProcessPoolExecutor(max_workers=self.workers) as pool, ThreadPoolExecutor(max_workers=self.db_writers) as writers:
+            pending = {}
+            for f in files:
+                digest = self._file_digest(f)
+                if digest is not False:
+                    pending[pool.submit(extract_transform_file, f, self.chunk_size, manifest_path, self.transformer, spool)] = (f, digest)
+            loads = {}
+            for fut in as_completed(pending):
+                f, digest = pending[fut]
+                try:
+                    chunk_paths = fut.result()
+                except Exception:
+                    logger.exception(f'Failed to extract/transform {f}')
+                    continue
+                logger.info(f'Transformed {f}: {len(chunk_paths)} chunk(s)')
+                loads[writers.submit(self._load_chunks, f, _read_spooled(chunk_paths), digest)] = f
+            for fut in as_completed(loads):
+                try:
+                    created, errors = fut.result()
+                except Exception:
+                    logger.exception(f'Failed to load {loads[fut]}')
+                    continue
                 total_created += created
-            if not invalid_df.empty:
-                self.loader.save_errors(invalid_df, f.stem)
-                total_errors += len(invalid_df)
-            try:
-                dest = self.processed_dir / f.name
-                f.rename(dest)
-            except Exception:
-                logger.exception('Failed to move processed file')
+                total_errors += errors
         return {'processed': len(files), 'created': total_created, 'errors': total_errors}
+
+    def process_file(self, f: Path, digest=None):
+        return self._load_chunks(f, transform_chunks(self._frames(f), self.transformer, self.manifest), digest)
+
+    def _load_chunks(self, f: Path, chunks, digest=None):
+        """Load the transformed (valid_df, invalid_df) chunks of ``f``, write its
+        error files, record it in the manifest and move it to ``processed_dir``.
+        Row hashes are recorded once the rows are committed: per chunk, or at
+        the end of the file with ``commit_per_file``."""
+        created = 0
+        errors = 0
+        rows = 0
+        held = []  # claimed row hashes not recorded yet
+        try:
+            with self.loader.file_transaction():
+                for valid_df, invalid_df in chunks:
+                    valid_df, invalid_df, row_hashes = self._claim(valid_df, invalid_df)
+                    held.extend(row_hashes)
+                    if not valid_df.empty:
+                        records = valid_df.to_dict(orient='records')
+                        with query_source('etl:load'):
+                            created += self.loader.bulk_insert_players(records)
+                    if not invalid_df.empty:
+                        self.loader.save_errors(invalid_df, f.stem, append=errors > 0)
+                        errors += len(invalid_df)
+                    rows += len(valid_df) + len(invalid_df)
+                    if not self.loader.commit_per_file:
+                        self._record_rows(held)
+                        held = []
+            self._record_rows(held)
+        finally:
+            self._release(held)
+        if self.manifest and digest:
+            self.manifest.add_file(digest, f.name, rows)
+        self._move_processed(f)
+        return created, errors
+
+    def _claim(self, valid_df, invalid_df):
+        """Drop valid rows the manifest recorded or another writer claimed since
+        the chunk was read, and claim the rest. Only valid rows are claimed and
+        later recorded: invalid rows were not ingested, so a rerun reports them
+        again. Returns the chunk without the ``ROW_HASH`` column, plus the
+        claimed hashes."""
+        invalid_df = invalid_df.drop(columns=ROW_HASH, errors='ignore')
+        if ROW_HASH not in valid_df:
+            return valid_df, invalid_df, []
+        with self._claim_lock:
+            hashes = valid_df[ROW_HASH]
+            known = self.manifest.known_rows(hashes.tolist()) | self._claimed.intersection(hashes)
+            if known:
+                valid_df = valid_df.loc[~hashes.isin(known)]
+            claimed = valid_df[ROW_HASH].tolist()
+            self._claimed.update(claimed)
+        return valid_df.drop(columns=ROW_HASH), invalid_df, claimed
+
+    def _record_rows(self, row_hashes):
+        if self.manifest and row_hashes:
+            self.manifest.add_rows(row_hashes)
+        self._release(row_hashes)
+
+    def _release(self, row_hashes):
+        if row_hashes:
+            with self._claim_lock:
+                self._claimed.difference_update(row_hashes)
+
+    def _file_digest(self, f: Path):
+        """Content hash of ``f`` (None without a manifest); False if it was already ingested."""
+        if not self.manifest:
+            return None
+        digest = self.manifest.file_hash(f)
+        if self.manifest.has_file(digest):
+            logger.info(f'Skipping {f}: already ingested')
+            return False
+        return digest
+
+    def _move_processed(self, f: Path):
+        try:
+            dest = self.processed_dir / f.name
+            f.rename(dest)
+        except Exception:
+            logger.exception('Failed to move processed file')
+
+    def _frames(self, f: Path):
+        if self.chunk_size:
+            yield from self.extractor.iter_extract(f, self.chunk_size)
+        else:
+            yield self.extractor.extract(f)
+
+
+def transform_chunks(frames, transformer: DataTransformer, manifest: IngestManifest=None):
+    """Transform extracted ``(df, meta)`` frames into ``(valid_df, invalid_df)``
+    chunks. With row hashes enabled, rows the manifest already holds are
+    skipped before transforming and the rest carry their hash in ``ROW_HASH``."""
+    for df, meta in frames:
+        if manifest and manifest.row_hashes:
+            df, hashes = manifest.filter_new_rows(df)
+            if df.empty:
+                continue
+            df = df.assign(**{ROW_HASH: hashes})
+        yield transformer.transform_players(df)
+
+
+def extract_transform_file(f: Path, chunk_size=None, manifest_path=None, transformer: DataTransformer=None, spool_dir=None):
+    """Worker entry point for run_players_parallel (must stay module-level to be picklable).
+
+    Each transformed chunk is pickled to its own file in ``spool_dir`` as soon
+    as it is ready; the paths are returned in order and read back by the writer."""
+    extractor = DataExtractor(f.parent)
+    frames = extractor.iter_extract(f, chunk_size) if chunk_size else [extractor.extract(f)]
+    manifest = IngestManifest(manifest_path) if manifest_path else None
+    paths = []
+    try:
+        for chunk in transform_chunks(frames, transformer or DataTransformer(), manifest):
+            fd, path = tempfile.mkstemp(prefix=f'{f.stem}-', suffix='.pkl', dir=spool_dir)
+            os.close(fd)
+            pd.to_pickle(chunk, path)
+            paths.append(path)
+    finally:
+        if manifest:
+            manifest.close()
+    return paths
+
+
+def _read_spooled(paths):
+    for path in paths:
+        chunk = pd.read_pickle(path)
+        os.remove(path)
+        yield chunk
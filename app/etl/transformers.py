@@ -1,10 +1,22 @@
+from datetime import date
 from typing import Tuple
+import numpy as np
 import pandas as pd
-from .validators import DataValidator
+from .validators import DataValidator, strip_strings
+
+REQUIRED_PLAYER_FIELDS = ['first_name','last_name','email']
+INT64 = np.iinfo(np.int64)
+# ASCII digit strings this short parse exactly through float64
+FAST_RATING_DIGITS = r'[+-]?[0-9]{1,15}'
+# magnitudes below which a float64 cell truncates to int64 exactly; Python ints
+# in object columns only below 2**53, past which float64 rounds them
+FLOAT_RATING_BOUND = 2.0 ** 63
+OBJECT_RATING_BOUND = 2.0 ** 53
 
 class DataTransformer:
-    def __init__(self):
+    def __init__(self, vectorized: bool=True):
         self.validator = DataValidator()
+        self.vectorized = vectorized
 
     def normalize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         mapping = {
@@ -23,8 +35,14 @@ class DataTransformer:
         return df
 
     def transform_players(self, df) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        if self.vectorized:
+            return self.transform_players_vectorized(df)
+        return self.transform_players_rows(df)
+
+    def transform_players_rows(self, df) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Reference row-by-row implementation, kept for parity checks."""
         df = self.normalize_columns(df)
-        required = ['first_name','last_name','email']
+        required = REQUIRED_PLAYER_FIELDS
         valid_rows = []
         invalid_rows = []
         for _, row in df.iterrows():
@@ -35,19 +53,26 @@ class DataTransformer:
             if 'last_name' in r and isinstance(r['last_name'], str):
                 r['last_name'] = r['last_name'].strip()
             for col in required:
-                if not r.get(col):
+                if _blank(r.get(col)):
                     errors.append(f'{col} is required')
             if 'email' in r and not self.validator.validate_email(r.get('email')):
                 errors.append('invalid email')
-            if 'phone_number' in r and r.get('phone_number') and not self.validator.validate_phone(r.get('phone_number')):
+            if 'phone_number' in r and not _blank(r.get('phone_number')) and not self.validator.validate_phone(r.get('phone_number')):
                 errors.append('invalid phone')
-            if 'date_of_birth' in r and r.get('date_of_birth') and not self.validator.validate_date(str(r.get('date_of_birth'))):
+            dob = r.get('date_of_birth')
+            if 'date_of_birth' in r and not _blank(dob) and not isinstance(dob, date) and not self.validator.validate_date(str(dob)):
                 errors.append('invalid date_of_birth')
+            if 'rating' in r and _missing(r['rating']):
+                r['rating'] = None
             if 'rating' in r and r.get('rating') is not None:
                 try:
-                    r['rating'] = int(r['rating'])
-                    if r['rating'] < 0:
-                        errors.append('rating must be non-negative')
+                    rating = int(r['rating'])
+                    if not INT64.min <= rating <= INT64.max:
+                        errors.append('rating is out of range')
+                    else:
+                        r['rating'] = rating
+                        if rating < 0:
+                            errors.append('rating must be non-negative')
                 except Exception:
                     errors.append('rating must be integer')
             if errors:
@@ -58,3 +83,103 @@ class DataTransformer:
         valid_df = pd.DataFrame(valid_rows)
         invalid_df = pd.DataFrame(invalid_rows)
         return valid_df, invalid_df
+
+    def transform_players_vectorized(self, df) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Columnar version of transform_players_rows: same rules, same error
+        messages in the same order, same (valid_df, invalid_df) split."""
+        df = self.normalize_columns(df)
+        out = df.copy()
+        checks = []
+        for col in ('first_name','last_name'):
+            if col in out:
+                stripped = strip_strings(out[col])
+                out[col] = out[col].mask(stripped.notna(), stripped)
+        for col in REQUIRED_PLAYER_FIELDS:
+            if col in out:
+                checks.append((_falsy(out[col]), f'{col} is required'))
+            else:
+                checks.append((pd.Series(True, index=out.index), f'{col} is required'))
+        if 'email' in out:
+            checks.append((~self.validator.email_mask(out['email']), 'invalid email'))
+        if 'phone_number' in out:
+            phone = out['phone_number']
+            checks.append((~_falsy(phone) & ~self.validator.phone_mask(phone), 'invalid phone'))
+        if 'date_of_birth' in out:
+            dob = out['date_of_birth']
+            checks.append((~_falsy(dob) & ~self.validator.date_mask(dob), 'invalid date_of_birth'))
+        if 'rating' in out:
+            missing = out['rating'].isna()
+            rating, ok, wide = _coerce_rating(out['rating'])
+            checks.append((~ok & ~missing, 'rating must be integer'))
+            checks.append((wide, 'rating is out of range'))
+            checks.append((ok & ~wide & (rating < 0), 'rating must be non-negative'))
+            out['rating'] = out['rating'].astype(object).mask(ok & ~wide, rating.astype(object)).mask(missing, None)
+
+        errors = pd.Series('', index=out.index, dtype=object)
+        for mask, message in checks:
+            errors = errors.mask(mask, errors + message + '; ')
+        has_errors = errors.ne('')
+        out['_errors'] = errors.str[:-2]
+
+        valid_df = out.loc[~has_errors].drop(columns='_errors').reset_index(drop=True)
+        invalid_df = out.loc[has_errors].reset_index(drop=True)
+        if 'rating' in valid_df and valid_df['rating'].notna().all():
+            valid_df['rating'] = valid_df['rating'].astype('int64')
+        return valid_df, invalid_df
+
+
+def _missing(value) -> bool:
+    return value is None or (pd.api.types.is_scalar(value) and pd.isna(value))
+
+
+def _blank(value) -> bool:
+    """Empty cell: missing (None, NaN, NaT) or any other falsy value."""
+    return _missing(value) or not value
+
+
+def _falsy(s: pd.Series) -> pd.Series:
+    # column-wise _blank for the cells pandas produces
+    return s.isna() | s.isin(['', 0])
+
+
+def _coerce_rating(s: pd.Series) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """Vectorised ``int(value)``: returns the int64 ratings (0 where the
+    conversion fails or leaves int64), the mask of cells that converted and
+    the mask of those outside int64.
+
+    Integer columns, float cells and short ASCII digit strings are converted
+    column-wise; every other cell ('1_000', non-ASCII digits, huge values,
+    other objects) goes through ``int()`` itself, so the results match the
+    row path. The bounds are checked before any int64 cast.
+    """
+    if pd.api.types.is_integer_dtype(s.dtype):
+        return s.fillna(0).astype('int64'), s.notna(), pd.Series(False, index=s.index)
+    text = strip_strings(s)
+    is_str = text.notna()
+    numeric = pd.to_numeric(s.where(~is_str), errors='coerce').astype('float64')
+    bound = FLOAT_RATING_BOUND if s.dtype == 'float64' else OBJECT_RATING_BOUND
+    fast = ~is_str & (numeric.abs() < bound)
+    if is_str.any():
+        digits = text.str.fullmatch(FAST_RATING_DIGITS).eq(True)
+        parsed = pd.to_numeric(text.where(digits), errors='coerce').astype('float64')
+        numeric = numeric.where(~digits, parsed)
+        fast |= digits
+    ratings = pd.Series(np.trunc(numeric.where(fast, 0).to_numpy()).astype('int64'), index=s.index)
+    ok = fast.copy()
+    wide = pd.Series(False, index=s.index)
+    slow = ~fast & s.notna()
+    if slow.any():
+        converted = pd.Series([_int_or_none(v) for v in s[slow]], index=s.index[slow], dtype=object)
+        ok[slow] = converted.notna()
+        converted = converted.dropna()
+        fits = converted.map(lambda v: INT64.min <= v <= INT64.max).astype(bool)
+        wide.loc[fits.index[~fits]] = True
+        ratings.loc[fits.index[fits]] = converted[fits].astype('int64')
+    return ratings, ok, wide
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except Exception:
+        return None
@@ -1,9 +1,11 @@
 import re
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
+import pandas as pd
 
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 PHONE_RE = re.compile(r"^\+?\d[\d\-\s()]{4,}\d$")
+DATE_FORMATS = ('%Y-%m-%d','%d.%m.%Y','%Y/%m/%d','%d/%m/%Y')
 
 class DataValidator:
     def validate_email(self, email: Optional[str]) -> bool:
@@ -19,7 +21,7 @@ class DataValidator:
     def validate_date(self, v: Optional[str]) -> bool:
         if not v or not isinstance(v, str):
             return False
-        for fmt in ('%Y-%m-%d','%d.%m.%Y','%Y/%m/%d','%d/%m/%Y'):
+        for fmt in DATE_FORMATS:
             try:
                 datetime.strptime(v.strip(), fmt)
                 return True
@@ -30,9 +32,53 @@ class DataValidator:
     def parse_date(self, v: Optional[str]):
         if not v or not isinstance(v, str):
             return None
-        for fmt in ('%Y-%m-%d','%d.%m.%Y','%Y/%m/%d','%d/%m/%Y'):
+        for fmt in DATE_FORMATS:
             try:
                 return datetime.strptime(v.strip(), fmt).date()
             except Exception:
                 continue
         return None
+
+    # Column-wise counterparts of the checks above. Each takes a Series of raw
+    # cell values and returns a boolean mask; non-string cells never match.
+
+    def email_mask(self, s: pd.Series) -> pd.Series:
+        return _match_mask(s, EMAIL_RE)
+
+    def phone_mask(self, s: pd.Series) -> pd.Series:
+        return _match_mask(s, PHONE_RE)
+
+    def date_mask(self, s: pd.Series) -> pd.Series:
+        # cells that already are dates (Excel date columns) are valid as they are;
+        # anything else has to be text in one of DATE_FORMATS
+        if pd.api.types.is_datetime64_any_dtype(s):
+            return s.notna()
+        if s.dtype == object:
+            valid = s.map(lambda v: isinstance(v, date), na_action='ignore').eq(True)
+        else:
+            valid = pd.Series(False, index=s.index)
+        values = s.astype(str).str.strip()
+        for fmt in DATE_FORMATS:
+            pending = ~valid
+            if not pending.any():
+                break
+            parsed = pd.to_datetime(values[pending], format=fmt, errors='coerce')
+            valid[pending] = parsed.notna()
+        return valid
+
+
+def strip_strings(s: pd.Series) -> pd.Series:
+    """Stripped copy of the string cells of ``s``; NaN wherever the cell is not a string."""
+    try:
+        return s.str.strip()
+    except AttributeError:
+        # numeric / datetime columns (or object columns without any strings)
+        return pd.Series(float('nan'), index=s.index, dtype=object)
+
+
+def _match_mask(s: pd.Series, pattern) -> pd.Series:
+    stripped = strip_strings(s)
+    is_str = stripped.notna()
+    if not is_str.any():
+        return is_str
+    return stripped.str.match(pattern.pattern).eq(True)
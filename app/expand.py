@@ -0,0 +1,82 @@
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from app import schemas
+from app.serialization import rows_response
+
+MAX_INCLUDE_DEPTH = 4
+
+def parse_include(model, include: str) -> dict:
+    """Turn ``"arenas.rooms.stations,tournaments"`` into a nested dict of
+    relationship names, checking each name against the mapped relationships."""
+    tree = {}
+    for path in filter(None, (p.strip() for p in (include or '').split(','))):
+        names = path.split('.')
+        if len(names) > MAX_INCLUDE_DEPTH:
+            raise HTTPException(400, f'include path too deep: {path}')
+        node, current = tree, model
+        for name in names:
+            rel = current.__mapper__.relationships.get(name)
+            if rel is None:
+                raise HTTPException(400, f'Unknown relationship for {current.__name__}: {name}')
+            node = node.setdefault(name, {})
+            current = rel.mapper.class_
+    return tree
+
+
+def load_options(model, tree: dict):
+    """selectinload chains for ``tree``: one extra query per relationship level,
+    however many parent rows there are."""
+    options = []
+    for name, children in tree.items():
+        rel = model.__mapper__.relationships[name]
+        option = selectinload(getattr(model, name))
+        child_options = load_options(rel.mapper.class_, children)
+        if child_options:
+            option = option.options(*child_options)
+        options.append(option)
+    return options
+
+
+def dump(obj, tree: dict) -> dict:
+    data = read_schema(type(obj)).model_validate(obj).model_dump(mode='json')
+    for name, children in tree.items():
+        value = getattr(obj, name)
+        if value is None:
+            data[name] = None
+        elif isinstance(value, (list, tuple, set)):
+            data[name] = [dump(v, children) for v in value]
+        else:
+            data[name] = dump(value, children)
+    return data
+
+
+def read_schema(model):
+    return getattr(schemas, f'{model.__name__}Read')
+
+
+def get_loaded(db: Session, model, item_id: int, tree: dict):
+    pk = model.__mapper__.primary_key[0]
+    obj = db.scalars(select(model).where(pk == item_id).options(*load_options(model, tree))).first()
+    if obj is None:
+        raise HTTPException(404, f'{model.__name__} not found')
+    return obj
+
+
+def expanded_item(db: Session, model, item_id: int, include: str):
+    """``GET /<resource>/{id}?include=a.b,c`` as one JSON tree, fetched with a
+    constant number of queries (one per relationship level)."""
+    tree = parse_include(model, include)
+    return ORJSONResponse(dump(get_loaded(db, model, item_id, tree), tree))
+
+
+def related_items(db: Session, model, item_id: int, relationship: str, include: str=None):
+    """Children of one parent row for the ``/<resource>/{id}/<relationship>``
+    endpoints, eager-loaded (plus any ``include`` levels below them)."""
+    paths = [f'{relationship}.{p.strip()}' for p in include.split(',') if p.strip()] if include else []
+    tree = parse_include(model, ','.join(paths) or relationship)
+    children = getattr(get_loaded(db, model, item_id, tree), relationship)
+    if not include:
+        return rows_response(read_schema(model.__mapper__.relationships[relationship].mapper.class_), children)
+    return ORJSONResponse([dump(child, tree[relationship]) for child in children])
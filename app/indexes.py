@@ -0,0 +1,24 @@
+from app import models
+
+# models whose __table_args__ declare secondary indexes for the hot query paths
+INDEXED_MODELS = ('Booking', 'Player')
+
+
+def index_definitions():
+    """Secondary indexes declared on the models in INDEXED_MODELS.
+
+    create_all only builds them together with a new table; ensure_indexes
+    also adds them to tables that existed before the index was declared.
+    A model that is not mapped in app.models is skipped.
+    """
+    indexes = []
+    for name in INDEXED_MODELS:
+        model = getattr(models, name, None)
+        if model is not None:
+            indexes.extend(sorted(model.__table__.indexes, key=lambda index: index.name))
+    return tuple(indexes)
+
+
+def ensure_indexes(bind):
+    for index in index_definitions():
+        index.create(bind=bind, checkfirst=True)
@@ -0,0 +1,72 @@
+import os
+import random
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.exc import DBAPIError
+from app import models
+from app.async_db import pause
+from app.change_tracking import TRACK_CHANGES_OPTION
+
+LOCK_RETRIES = int(os.getenv('ROOM_LOCK_RETRIES', '6'))
+LOCK_BACKOFF_SECONDS = float(os.getenv('ROOM_LOCK_BACKOFF_SECONDS', '0.02'))
+
+# SQLSTATEs of deadlock victims and lock timeouts (PostgreSQL, ODBC/MSSQL)
+LOCK_SQLSTATES = {'40001', '40P01', '55P03', 'HYT00'}
+# MSSQL native codes: 1205 deadlock victim, 1222 lock request timeout
+LOCK_NATIVE_CODES = ('(1205)', '(1222)')
+SQLITE_LOCK_MESSAGES = ('database is locked', 'database table is locked')
+
+
+def is_lock_error(exc: DBAPIError) -> bool:
+    """True if ``exc`` is a lock timeout or a deadlock, i.e. worth retrying;
+    constraint violations and other errors are not."""
+    orig = exc.orig
+    sqlstate = getattr(orig, 'pgcode', None) or getattr(orig, 'sqlstate', None)
+    if sqlstate is None and getattr(orig, 'args', None) and isinstance(orig.args[0], str):
+        sqlstate = orig.args[0]
+    if sqlstate in LOCK_SQLSTATES:
+        return True
+    message = str(orig)
+    return any(code in message for code in LOCK_NATIVE_CODES) or any(m in message for m in SQLITE_LOCK_MESSAGES)
+
+
+def lock_room_row(db, room_id: int) -> bool:
+    """Write-lock the Room row until the current transaction ends.
+
+    A no-op UPDATE takes an exclusive row lock on MSSQL/PostgreSQL and the
+    database write lock on SQLite, so every transaction that books the same
+    room is serialized across processes. Returns False if the room does not exist.
+    """
+    stmt = update(models.Room).where(models.Room.room_id == room_id).values(name=models.Room.name)
+    result = db.execute(stmt.execution_options(synchronize_session=False, **{TRACK_CHANGES_OPTION: False}))
+    return result.rowcount > 0
+
+
+def with_room_lock(db, room_id: int, work):
+    """Run ``work()`` (which must commit) while holding the room's row lock.
+
+    Waiting happens on the database lock only, so a worker thread is never
+    parked on an in-process mutex while another request waits for the
+    database. Lock timeouts and deadlock victims are rolled back and retried
+    with jittered backoff, then reported as 409; any other database error
+    propagates.
+    """
+    if not (db.new or db.dirty or db.deleted):
+        # start from a fresh transaction: upgrading a read transaction to a
+        # write lock is what SQLite refuses outright under contention
+        db.rollback()
+    for attempt in range(LOCK_RETRIES):
+        try:
+            if not lock_room_row(db, room_id):
+                raise HTTPException(400, 'Room not found')
+            return work()
+        except HTTPException:
+            db.rollback()
+            raise
+        except DBAPIError as e:
+            db.rollback()
+            if not is_lock_error(e):
+                raise
+            if attempt == LOCK_RETRIES - 1:
+                raise HTTPException(409, 'Room is busy, please retry')
+            pause(db, LOCK_BACKOFF_SECONDS * (2 ** attempt) * (0.5 + random.random()))
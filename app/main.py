@@ -1,17 +1,34 @@
 import logging, time
 from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base, get_db
-from app import models
-from app.routers import (clubs, arenas, rooms, pcspecs, stations, players, memberships,
-    sessions, tournaments, matches, staff, bookings, configkv, pricekv)
-from sqlalchemy.orm import Session
+from app.database import engine
+from app.request_log import request_log_writer
+from app.player_search import TRIGRAM_INDEX, trigram_index
+from app.async_db import ASYNC_DB, use_async_sessions
+from app.metrics import metrics, metrics_middleware
+from app.query_stats import configure_slow_query_log, query_count_middleware
+from app import change_tracking  # registers the session events that bump ChangeVersion
+from app.conditional import conditional_headers_middleware
+from app.analytics import compactor
+from app.startup import FAST_START, ensure_schema, include_routers, profile_startup, startup_timer
+from app.routers import metrics as metrics_router
+
+# prefix -> module in app.routers; with FAST_START each is imported on the first request under its prefix
+ROUTERS = {
+    '/clubs': 'clubs', '/arenas': 'arenas', '/rooms': 'rooms', '/pcspecs': 'pcspecs',
+    '/stations': 'stations', '/players': 'players', '/memberships': 'memberships',
+    '/sessions': 'sessions', '/tournaments': 'tournaments', '/matches': 'matches',
+    '/staff': 'staff', '/bookings': 'bookings', '/configkv': 'configkv', '/pricekv': 'pricekv',
+    '/internal': 'internal', '/analytics': 'analytics',
+}
 
 # Logging config
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s', handlers=[logging.FileHandler('api.log'), logging.StreamHandler()])
 logger = logging.getLogger('colizeum')
+configure_slow_query_log()
 
-app = FastAPI(title='Colizeum API', version='1.0')
+app = FastAPI(title='Colizeum API', version='1.0', default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,10 +38,26 @@ app.add_middleware(
     allow_headers=['*'],
 )
 
+app.middleware('http')(conditional_headers_middleware)
+
 @app.on_event('startup')
 def on_startup():
-    Base.metadata.create_all(bind=engine)
-    logger.info('Database tables ensured')
+    if ensure_schema(engine) == 'verified':
+        logger.info('Database schema verified')
+    else:
+        logger.info('Database tables ensured')
+    with startup_timer.step('background workers'):
+        request_log_writer.start()
+        metrics.start()
+        compactor.start()
+        if TRIGRAM_INDEX:
+            trigram_index.rebuild_in_background()
+
+@app.on_event('shutdown')
+def on_shutdown():
+    request_log_writer.stop()
+    metrics.stop()
+    compactor.stop()
 
 @app.middleware('http')
 async def log_requests(request: Request, call_next):
@@ -37,31 +70,26 @@ async def log_requests(request: Request, call_next):
         duration_ms = int((time.time() - start) * 1000)
         status_code = getattr(response, 'status_code', 500)
         logger.info(f"{request.method} {request.url.path} {status_code} {duration_ms}ms")
-        # persist to DB (best-effort, non-blocking)
-        try:
-            db = next(get_db())
-            log = models.RequestLog(method=request.method, path=request.url.path, status_code=status_code, duration_ms=duration_ms, client_host=request.client.host if request.client else None)
-            db.add(log)
-            db.commit()
-        except Exception as e:
-            logger.exception('Failed to write RequestLog')
+        # persist to DB (best-effort, written in batches by a background thread)
+        request_log_writer.record(method=request.method, path=request.url.path, status_code=status_code, duration_ms=duration_ms, client_host=request.client.host if request.client else None)
+
+app.middleware('http')(query_count_middleware)
+# outermost, so latency covers the other middlewares too
+app.middleware('http')(metrics_middleware)
 
 # include routers
-app.include_router(clubs.router)
-app.include_router(arenas.router)
-app.include_router(rooms.router)
-app.include_router(pcspecs.router)
-app.include_router(stations.router)
-app.include_router(players.router)
-app.include_router(memberships.router)
-app.include_router(sessions.router)
-app.include_router(tournaments.router)
-app.include_router(matches.router)
-app.include_router(staff.router)
-app.include_router(bookings.router)
-app.include_router(configkv.router)
-app.include_router(pricekv.router)
+app.include_router(metrics_router.router)
+include_routers(app, ROUTERS, lazy=FAST_START)
+
+if ASYNC_DB:
+    # same handlers, but sessions come from the AsyncEngine (DB_ASYNC=1)
+    use_async_sessions(app)
 
 if __name__ == '__main__':
-    import uvicorn
-    uvicorn.run('app.main:app', host='0.0.0.0', port=8000, reload=True)
+    import sys
+    if '--profile-startup' in sys.argv[1:]:
+        # python -m app.main --profile-startup: import and startup time breakdown, then exit
+        profile_startup(app)
+    else:
+        import uvicorn
+        uvicorn.run('app.main:app', host='0.0.0.0', port=8000, reload=True)
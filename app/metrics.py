@@ -0,0 +1,220 @@
+import bisect
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from starlette.routing import Match
+
+logger = logging.getLogger('colizeum')
+
+# directory shared by all worker processes (one snapshot file per pid); unset = single process
+METRICS_DIR = os.getenv('METRICS_DIR')
+FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '1.0'))
+METRICS_PATH = '/metrics'
+UNMATCHED_ROUTE = '<unmatched>'
+ROUTE_CACHE_SIZE = 4096
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests by method, route template and status.', None),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by method and route template.', HTTP_BUCKETS),
+    'http_requests_in_progress': ('gauge', 'HTTP requests being served, by method and route template.', None),
+    'db_query_duration_seconds': ('histogram', 'SQL statement execution time by route and statement kind.', DB_BUCKETS),
+}
+
+# what issued the current SQL: the route template of the request being served,
+# or an ETL stage (see app.query_stats.query_source)
+current_source = contextvars.ContextVar('current_source', default=None)
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms keyed by (name, labels).
+
+    With METRICS_DIR set every process also writes its values to
+    ``<dir>/<pid>.json`` every FLUSH_SECONDS, and ``render`` sums the files of
+    all processes, so whichever worker serves ``/metrics`` reports totals for
+    the whole deployment. Wipe the directory when the deployment restarts.
+    """
+    def __init__(self, directory: str=METRICS_DIR, flush_seconds: float=FLUSH_SECONDS):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+        self._histograms = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def inc(self, name: str, labels: dict, amount: float=1.0):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._values[key] += amount
+
+    def observe(self, name: str, labels: dict, value: float):
+        buckets = METRICS[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            hist[bisect.bisect_left(buckets, value)] += 1
+            hist[-1] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'values': [[name, list(labels), value] for (name, labels), value in self._values.items()],
+                'histograms': [[name, list(labels), list(hist)] for (name, labels), hist in self._histograms.items()],
+            }
+
+    def render(self) -> str:
+        """Prometheus text exposition (format 0.0.4) of all processes' metrics."""
+        snapshots = [self.snapshot()]
+        if self.directory:
+            self.flush()
+            snapshots = _read_snapshots(self.directory)
+        values, histograms = _merge(snapshots)
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'histogram':
+                for labels, hist in sorted(histograms.get(name, {}).items()):
+                    cumulative = 0
+                    for bound, n in zip(buckets + ('+Inf',), hist[:-1]):
+                        cumulative += n
+                        lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {hist[-1]}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+            else:
+                for labels, value in sorted(values.get(name, {}).items()):
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def start(self):
+        if self.directory and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='metrics-flusher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.flush_seconds + 5)
+            self._thread = None
+        with self._lock:
+            # this process serves nothing any more; keep its counters and histograms
+            for key in [k for k in self._values if METRICS[k[0]][0] == 'gauge']:
+                del self._values[key]
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except OSError:
+                logger.exception('Failed to write metrics snapshot')
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+def _read_snapshots(directory):
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        try:
+            with open(path, encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            logger.warning(f'Skipping unreadable metrics snapshot {path}')
+    return snapshots
+
+
+def _merge(snapshots):
+    values, histograms = defaultdict(lambda: defaultdict(float)), defaultdict(dict)
+    for snap in snapshots:
+        for name, labels, value in snap['values']:
+            if name in METRICS:
+                values[name][tuple(map(tuple, labels))] += value
+        for name, labels, hist in snap['histograms']:
+            if name not in METRICS or len(hist) != len(METRICS[name][2]) + 2:
+                continue
+            labels = tuple(map(tuple, labels))
+            total = histograms[name].get(labels)
+            histograms[name][labels] = hist if total is None else [a + b for a, b in zip(total, hist)]
+    return values, histograms
+
+
+def _match_route(router, method: str, path: str) -> str:
+    scope = {'type': 'http', 'method': method, 'path': path, 'root_path': ''}
+    partial = None
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or UNMATCHED_ROUTE
+
+
+def route_template(request) -> str:
+    """Path template (``/rooms/{item_id}``) of the route serving ``request``,
+    so label cardinality stays bounded by the number of routes."""
+    router = request.app.router
+    cache = router.__dict__.setdefault('_route_templates', {})
+    key = (request.method, request.url.path)
+    template = cache.get(key)
+    if template is None:
+        if len(cache) >= ROUTE_CACHE_SIZE:
+            cache.clear()
+        template = cache[key] = _match_route(router, *key)
+    return template
+
+
+def forget_route_templates(router):
+    """Drop the cached templates after routes are added to ``router``."""
+    router.__dict__.pop('_route_templates', None)
+
+
+async def metrics_middleware(request, call_next):
+    route = route_template(request)
+    labels = {'method': request.method, 'route': route}
+    token = current_source.set(route)
+    metrics.inc('http_requests_in_progress', labels)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        metrics.observe('http_request_duration_seconds', labels, time.perf_counter() - start)
+        metrics.inc('http_requests_total', {**labels, 'status': str(status_code)})
+        metrics.inc('http_requests_in_progress', labels, -1)
+        current_source.reset(token)
+
+
+metrics = MetricsRegistry()
@@ -1,8 +1,81 @@
-from typing import Optional
-from sqlalchemy import Integer, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from typing import List, Optional
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, Integer, String, event, select
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 from app.database import Base
 
+class Club(Base):
+    __tablename__ = 'Club'
+    club_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(200))
+    address: Mapped[Optional[str]] = mapped_column(String(300))
+    city: Mapped[Optional[str]] = mapped_column(String(100))
+    contact_phone: Mapped[Optional[str]] = mapped_column(String(30))
+    arenas: Mapped[List['Arena']] = relationship(back_populates='club')
+    memberships: Mapped[List['Membership']] = relationship(back_populates='club')
+    tournaments: Mapped[List['Tournament']] = relationship(back_populates='club')
+
+class Arena(Base):
+    __tablename__ = 'Arena'
+    arena_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    club_id: Mapped[int] = mapped_column(ForeignKey('Club.club_id'))
+    name: Mapped[str] = mapped_column(String(200))
+    capacity: Mapped[Optional[int]] = mapped_column(Integer)
+    address: Mapped[Optional[str]] = mapped_column(String(300))
+    club: Mapped['Club'] = relationship(back_populates='arenas')
+    rooms: Mapped[List['Room']] = relationship(back_populates='arena')
+
+class Room(Base):
+    __tablename__ = 'Room'
+    room_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    arena_id: Mapped[int] = mapped_column(ForeignKey('Arena.arena_id'))
+    name: Mapped[str] = mapped_column(String(100))
+    room_type: Mapped[Optional[str]] = mapped_column(String(50))
+    max_players: Mapped[Optional[int]] = mapped_column(Integer, default=10)
+    arena: Mapped['Arena'] = relationship(back_populates='rooms')
+    stations: Mapped[List['Station']] = relationship(back_populates='room')
+    bookings: Mapped[List['Booking']] = relationship(back_populates='room')
+    game_sessions: Mapped[List['GameSession']] = relationship(back_populates='room')
+
+class PCSpec(Base):
+    __tablename__ = 'PCSpec'
+    pc_spec_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cpu: Mapped[Optional[str]] = mapped_column(String(100))
+    gpu: Mapped[Optional[str]] = mapped_column(String(100))
+    ram_gb: Mapped[Optional[int]] = mapped_column(Integer)
+    storage_gb: Mapped[Optional[int]] = mapped_column(Integer)
+
+class Station(Base):
+    __tablename__ = 'Station'
+    station_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    room_id: Mapped[int] = mapped_column(ForeignKey('Room.room_id'))
+    label: Mapped[str] = mapped_column(String(50))
+    pc_spec_id: Mapped[Optional[int]] = mapped_column(ForeignKey('PCSpec.pc_spec_id'))
+    status: Mapped[Optional[str]] = mapped_column(String(20), default='available')
+    room: Mapped['Room'] = relationship(back_populates='stations')
+    pc_spec: Mapped[Optional['PCSpec']] = relationship()
+
+def search_key(text) -> Optional[str]:
+    """Case- and ё-insensitive form of a name or email, as stored in the
+    Player *_key columns that /players/search scans."""
+    return text.casefold().replace('ё', 'е') if text is not None else None
+
+
+# Player column -> normalized search key column
+PLAYER_SEARCH_KEYS = {'first_name': 'first_name_key', 'last_name': 'last_name_key', 'email': 'email_key'}
+
+def search_keys(values: dict) -> dict:
+    """Search key values for the Player columns present in ``values``, for
+    bulk UPDATE parameter rows (INSERTs get them from the column defaults)."""
+    return {key: search_key(values[column]) for column, key in PLAYER_SEARCH_KEYS.items() if column in values}
+
+
+def _search_key_default(column):
+    def default(context):
+        return search_key(context.get_current_parameters().get(column))
+    return default
+
+
 class Player(Base):
     __tablename__ = 'Player'
     player_id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -10,3 +83,173 @@ class Player(Base):
     last_name: Mapped[Optional[str]] = mapped_column(String(100))
     email: Mapped[Optional[str]] = mapped_column(String(200), unique=True)
     rating: Mapped[Optional[int]] = mapped_column(Integer, default=1000)
+    first_name_key: Mapped[Optional[str]] = mapped_column(String(100), default=_search_key_default('first_name'))
+    last_name_key: Mapped[Optional[str]] = mapped_column(String(100), default=_search_key_default('last_name'))
+    email_key: Mapped[Optional[str]] = mapped_column(String(200), default=_search_key_default('email'))
+    memberships: Mapped[List['Membership']] = relationship(back_populates='player')
+    hosted_sessions: Mapped[List['GameSession']] = relationship(back_populates='host')
+    bookings: Mapped[List['Booking']] = relationship(back_populates='player')
+    matches_won: Mapped[List['Match']] = relationship(back_populates='winner')
+
+    __table_args__ = (
+        # /players/search: prefix ranges on the normalized keys, read in rank order;
+        # the trailing keys let the other query tokens be checked off the index
+        Index('ix_Player_last_name_key', 'last_name_key', 'first_name_key', 'email_key'),
+        Index('ix_Player_first_name_key', 'first_name_key', 'last_name_key', 'email_key'),
+        Index('ix_Player_email_key', 'email_key'),
+    )
+
+
+@event.listens_for(Player, 'before_insert')
+@event.listens_for(Player, 'before_update')
+def _set_search_keys(mapper, connection, target):
+    for column, key in PLAYER_SEARCH_KEYS.items():
+        setattr(target, key, search_key(getattr(target, column)))
+
+class Membership(Base):
+    __tablename__ = 'Membership'
+    membership_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    player_id: Mapped[int] = mapped_column(ForeignKey('Player.player_id'))
+    club_id: Mapped[int] = mapped_column(ForeignKey('Club.club_id'))
+    start_date: Mapped[date] = mapped_column(Date)
+    end_date: Mapped[Optional[date]] = mapped_column(Date)
+    membership_type: Mapped[Optional[str]] = mapped_column(String(50))
+    player: Mapped['Player'] = relationship(back_populates='memberships')
+    club: Mapped['Club'] = relationship(back_populates='memberships')
+
+class GameSession(Base):
+    __tablename__ = 'GameSession'
+    session_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    room_id: Mapped[int] = mapped_column(ForeignKey('Room.room_id'))
+    started_at: Mapped[datetime] = mapped_column(DateTime)
+    ended_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    game_title: Mapped[Optional[str]] = mapped_column(String(100))
+    host_player_id: Mapped[Optional[int]] = mapped_column(ForeignKey('Player.player_id'))
+    # room price per hour when the session was recorded (app.pricing)
+    hourly_rate: Mapped[Optional[float]] = mapped_column(Float)
+    room: Mapped['Room'] = relationship(back_populates='game_sessions')
+    host: Mapped[Optional['Player']] = relationship(back_populates='hosted_sessions')
+    matches: Mapped[List['Match']] = relationship(back_populates='session')
+
+class Tournament(Base):
+    __tablename__ = 'Tournament'
+    tournament_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    club_id: Mapped[int] = mapped_column(ForeignKey('Club.club_id'))
+    name: Mapped[str] = mapped_column(String(200))
+    start_date: Mapped[Optional[date]] = mapped_column(Date)
+    end_date: Mapped[Optional[date]] = mapped_column(Date)
+    prize_pool: Mapped[Optional[float]] = mapped_column(Float)
+    club: Mapped['Club'] = relationship(back_populates='tournaments')
+    matches: Mapped[List['Match']] = relationship(back_populates='tournament')
+
+class Match(Base):
+    __tablename__ = 'Match'
+    match_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tournament_id: Mapped[Optional[int]] = mapped_column(ForeignKey('Tournament.tournament_id'))
+    session_id: Mapped[Optional[int]] = mapped_column(ForeignKey('GameSession.session_id'))
+    round: Mapped[Optional[str]] = mapped_column(String(50))
+    winner_player_id: Mapped[Optional[int]] = mapped_column(ForeignKey('Player.player_id'))
+    tournament: Mapped[Optional['Tournament']] = relationship(back_populates='matches')
+    session: Mapped[Optional['GameSession']] = relationship(back_populates='matches')
+    winner: Mapped[Optional['Player']] = relationship(back_populates='matches_won')
+
+class Staff(Base):
+    __tablename__ = 'Staff'
+    staff_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    club_id: Mapped[int] = mapped_column(ForeignKey('Club.club_id'))
+    first_name: Mapped[Optional[str]] = mapped_column(String(100))
+    last_name: Mapped[Optional[str]] = mapped_column(String(100))
+    role: Mapped[Optional[str]] = mapped_column(String(50))
+    hire_date: Mapped[Optional[date]] = mapped_column(Date)
+
+class Booking(Base):
+    __tablename__ = 'Booking'
+    booking_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    player_id: Mapped[int] = mapped_column(ForeignKey('Player.player_id'))
+    room_id: Mapped[int] = mapped_column(ForeignKey('Room.room_id'))
+    start_time: Mapped[datetime] = mapped_column(DateTime)
+    end_time: Mapped[datetime] = mapped_column(DateTime)
+    status: Mapped[Optional[str]] = mapped_column(String(20), default='pending')
+    # room price per hour when the booking was made (app.pricing)
+    hourly_rate: Mapped[Optional[float]] = mapped_column(Float)
+    player: Mapped['Player'] = relationship(back_populates='bookings')
+    room: Mapped['Room'] = relationship(back_populates='bookings')
+
+    __table_args__ = (
+        # booking conflict checks and the availability sweep:
+        # room_id = ? AND start_time < :to AND end_time > :from
+        Index('ix_Booking_room_time', 'room_id', 'start_time', 'end_time'),
+    )
+
+class ConfigKV(Base):
+    __tablename__ = 'ConfigKV'
+    config_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    config_key: Mapped[str] = mapped_column(String(100))
+    config_value: Mapped[str] = mapped_column(String(500))
+    club_id: Mapped[Optional[int]] = mapped_column(ForeignKey('Club.club_id'))
+
+class PriceKV(Base):
+    __tablename__ = 'PriceKV'
+    price_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    price_key: Mapped[str] = mapped_column(String(100))
+    price_value: Mapped[float] = mapped_column(Float)
+    currency: Mapped[Optional[str]] = mapped_column(String(10), default='RUB')
+    club_id: Mapped[Optional[int]] = mapped_column(ForeignKey('Club.club_id'))
+
+class RequestLog(Base):
+    __tablename__ = 'RequestLog'
+    log_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    method: Mapped[str] = mapped_column(String(10))
+    path: Mapped[str] = mapped_column(String(500))
+    status_code: Mapped[int] = mapped_column(Integer)
+    duration_ms: Mapped[int] = mapped_column(Integer)
+    client_host: Mapped[Optional[str]] = mapped_column(String(100))
+
+class ChangeVersion(Base):
+    """Monotonic change counter per logical table, shared by all workers."""
+    __tablename__ = 'ChangeVersion'
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+class SchemaVersion(Base):
+    """Fingerprint of the table and index definitions last created in this database."""
+    __tablename__ = 'SchemaVersion'
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64))
+    applied_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+class MatchResult(Base):
+    """Rated outcome of a Match: the loser and both ratings before the match."""
+    __tablename__ = 'MatchResult'
+    match_id: Mapped[int] = mapped_column(ForeignKey('Match.match_id', ondelete='CASCADE'), primary_key=True)
+    loser_player_id: Mapped[int] = mapped_column(ForeignKey('Player.player_id'))
+    winner_rating: Mapped[Optional[int]] = mapped_column(Integer)
+    loser_rating: Mapped[Optional[int]] = mapped_column(Integer)
+    delta: Mapped[Optional[int]] = mapped_column(Integer)
+
+# read-only: the loser of a rated match is written through its MatchResult
+Match.loser_player_id = column_property(
+    select(MatchResult.loser_player_id).where(MatchResult.match_id == Match.match_id).correlate_except(MatchResult).scalar_subquery())
+
+class LeaderboardEntry(Base):
+    """Precomputed wins/losses of a player within a tournament or a club."""
+    __tablename__ = 'LeaderboardEntry'
+    scope: Mapped[str] = mapped_column(String(20), primary_key=True)
+    scope_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    player_id: Mapped[int] = mapped_column(ForeignKey('Player.player_id'), primary_key=True)
+    wins: Mapped[int] = mapped_column(Integer, default=0)
+    losses: Mapped[int] = mapped_column(Integer, default=0)
+
+class UsageRollup(Base):
+    """Bookings, play time and revenue per room or club and hour or day."""
+    __tablename__ = 'UsageRollup'
+    grain: Mapped[str] = mapped_column(String(10), primary_key=True)
+    scope: Mapped[str] = mapped_column(String(10), primary_key=True)
+    scope_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    bookings: Mapped[int] = mapped_column(Integer, default=0)
+    booked_seconds: Mapped[float] = mapped_column(Float, default=0)
+    sessions: Mapped[int] = mapped_column(Integer, default=0)
+    session_seconds: Mapped[float] = mapped_column(Float, default=0)
+    revenue: Mapped[float] = mapped_column(Float, default=0)
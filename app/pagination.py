@@ -0,0 +1,108 @@
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+from fastapi import HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+NEXT_CURSOR_HEADER = 'X-Next-After'
+TRUE_VALUES = {'true', '1', 'yes', 'on'}
+FALSE_VALUES = {'false', '0', 'no', 'off'}
+
+class FilterParams:
+    """Column filters shared by list and export endpoints.
+
+    Every query parameter not claimed by the endpoint itself is an equality
+    filter on a foreign-key/indexed column of the model, e.g. ``?room_id=3``;
+    ``from``/``to`` bound the model's time column.
+    """
+    reserved = {'from', 'to', 'format', 'gzip'}
+
+    def __init__(self, request: Request,
+                 since: Optional[datetime] = Query(None, alias='from'),
+                 until: Optional[datetime] = Query(None, alias='to')):
+        self.since = since
+        self.until = until
+        self.filters = {k: v for k, v in request.query_params.items() if k not in self.reserved}
+
+
+class PageParams(FilterParams):
+    """Shared list-endpoint dependency: keyset pagination plus column filters.
+
+    ``?limit=&after=`` pages on the primary key (``after`` is the last id of
+    the previous page, also returned in the X-Next-After header).
+    """
+    reserved = FilterParams.reserved | {'limit', 'after'}
+
+    def __init__(self, request: Request, response: Response,
+                 limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+                 after: Optional[int] = Query(None, description='Primary key of the last item of the previous page'),
+                 since: Optional[datetime] = Query(None, alias='from'),
+                 until: Optional[datetime] = Query(None, alias='to')):
+        super().__init__(request, since, until)
+        self.response = response
+        self.limit = limit
+        self.after = after
+
+
+def filterable_columns(model, extra=()):
+    table = model.__table__
+    return {c.name: c for c in table.columns if c.foreign_keys or c.index or c.unique or c.primary_key or c.name in extra}
+
+
+def parse_filter_value(column, raw: str):
+    """Query-string value of a filter on ``column`` as the column's Python type;
+    raises ValueError if it does not parse. Booleans take true/false/1/0/yes/no,
+    dates and datetimes ISO 8601."""
+    python_type = column.type.python_type
+    if python_type is bool:
+        value = raw.strip().lower()
+        if value in TRUE_VALUES:
+            return True
+        if value in FALSE_VALUES:
+            return False
+        raise ValueError(raw)
+    if python_type is datetime:
+        return datetime.fromisoformat(raw)
+    if python_type is date:
+        return date.fromisoformat(raw)
+    if python_type is Decimal:
+        try:
+            return Decimal(raw)
+        except InvalidOperation:
+            raise ValueError(raw)
+    return python_type(raw)
+
+
+def apply_filters(stmt, model, page: FilterParams, time_column=None, extra_filters=()):
+    columns = filterable_columns(model, extra_filters)
+    for name, raw in page.filters.items():
+        column = columns.get(name)
+        if column is None:
+            raise HTTPException(400, f'Unsupported filter: {name}')
+        try:
+            value = parse_filter_value(column, raw)
+        except (TypeError, ValueError, NotImplementedError):
+            raise HTTPException(400, f'Invalid value for {name}')
+        stmt = stmt.where(column == value)
+    if page.since is not None or page.until is not None:
+        if time_column is None:
+            raise HTTPException(400, 'This resource has no time range filter')
+        if page.since is not None:
+            stmt = stmt.where(time_column >= page.since)
+        if page.until is not None:
+            stmt = stmt.where(time_column < page.until)
+    return stmt
+
+
+def paginate(db: Session, model, page: PageParams, time_column=None, extra_filters=()):
+    pk = model.__mapper__.primary_key[0]
+    stmt = apply_filters(select(model), model, page, time_column, extra_filters)
+    if page.after is not None:
+        stmt = stmt.where(pk > page.after)
+    items = db.scalars(stmt.order_by(pk).limit(page.limit)).all()
+    if len(items) == page.limit:
+        page.response.headers[NEXT_CURSOR_HEADER] = str(getattr(items[-1], pk.key))
+    return items
@@ -0,0 +1,296 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from array import array
+from sqlalchemy import and_, bindparam, event, or_, select, update
+from sqlalchemy.orm import Session
+from app import models
+from app.database import SessionLocal
+from app.versions import get_version
+
+logger = logging.getLogger('colizeum')
+
+# keep an in-process trigram index for typo-tolerant search (built in the background at startup)
+TRIGRAM_INDEX = os.getenv('PLAYER_SEARCH_TRIGRAMS', '').strip().lower() in ('1', 'true', 'yes', 'on')
+VERSION_CHECK_SECONDS = float(os.getenv('PLAYER_SEARCH_VERSION_CHECK_SECONDS', '1'))
+MIN_SIMILARITY = float(os.getenv('PLAYER_SEARCH_MIN_SIMILARITY', '0.3'))
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# fuzzy candidates re-scored exactly per requested result
+RESCORE_FACTOR = 5
+# trigrams shared by more than this share of players are skipped when rarer ones exist
+STOP_FRACTION = 0.05
+BUILD_BATCH = 10000
+# upper bound for a prefix range on a string column (sorts after every BMP character)
+PREFIX_END = '\uffff'
+BACKFILL_BATCH = 10000
+_KEY = 'player_search_changes'
+_BULK_KEY = 'player_search_bulk'
+
+def normalize(text) -> str:
+    """Case- and ё-insensitive form used for matching and ranking."""
+    return models.search_key(text or '')
+
+
+def _trigrams(text: str):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _field_grams(fields) -> set:
+    return set().union(*(_trigrams(f) for f in fields if f))
+
+
+def _fields(first_name, last_name, email):
+    return (normalize(first_name), normalize(last_name), normalize(email).split('@', 1)[0])
+
+
+def _similarity(query_grams, fields) -> float:
+    best = 0.0
+    for field in fields:
+        if not field:
+            continue
+        grams = _trigrams(field)
+        shared = len(query_grams & grams)
+        best = max(best, shared / (len(query_grams) + len(grams) - shared))
+    whole = ' '.join(f for f in fields[:2] if f)
+    if whole:
+        grams = _trigrams(whole)
+        shared = len(query_grams & grams)
+        best = max(best, shared / (len(query_grams) + len(grams) - shared))
+    return best
+
+
+def prefix_search(db: Session, q: str, limit: int):
+    """Players whose first name, last name or email start with every token of
+    ``q`` (in any field order), best ranked first.
+
+    The longest (most selective) token drives one range scan per normalized
+    key column, read in that column's rank order (ORDER BY the key, LIMIT
+    ``limit``) off its index; the other tokens filter the scanned rows. Each
+    query so returns the best ``limit`` hits of its rank tier for that
+    token, and merging them gives the top ``limit`` overall.
+    """
+    needles = sorted((normalize(t) for t in q.split()), key=len, reverse=True)
+    player = models.Player
+    keys = (player.last_name_key, player.first_name_key, player.email_key)
+    others = [or_(*(_prefix(key, needle) for key in keys)) for needle in needles[1:]]
+    orders = ((player.last_name_key, player.first_name_key), (player.first_name_key, player.last_name_key), (player.email_key,))
+    found = {}
+    for key, order in zip(keys, orders):
+        stmt = select(player).where(_prefix(key, needles[0]), *others).order_by(*order, player.player_id).limit(limit)
+        for p in db.scalars(stmt):
+            found[p.player_id] = p
+    hits = sorted(found.values(), key=lambda p: _prefix_rank(p, needles))
+    return hits[:limit]
+
+
+def _prefix(key, needle):
+    return and_(key >= needle, key < needle + PREFIX_END)
+
+
+def _prefix_rank(player, needles):
+    """Sort key for the driving token ``needles[0]``: exact name, then last
+    name, first name and email prefix matches, each in the order of its key
+    column's index."""
+    first, last, email = player.first_name_key or '', player.last_name_key or '', player.email_key or ''
+    needle = needles[0]
+    if needle in (first, last) or ' '.join(needles) in (f'{first} {last}', f'{last} {first}'):
+        return (0, last, first, player.player_id)
+    if last.startswith(needle):
+        return (1, last, first, player.player_id)
+    if first.startswith(needle):
+        return (2, first, last, player.player_id)
+    return (3, email, '', player.player_id)
+
+
+def backfill_search_keys(bind) -> int:
+    """Fill the Player *_key columns of rows written before they existed (or
+    by tools that bypass the model); returns the number of rows updated."""
+    player = models.Player.__table__
+    missing = or_(*(and_(player.c[key].is_(None), player.c[column].is_not(None))
+                    for column, key in models.PLAYER_SEARCH_KEYS.items()))
+    columns = list(models.PLAYER_SEARCH_KEYS)
+    stmt = (update(player).where(player.c.player_id == bindparam('pid'))
+            .values({key: bindparam(key) for key in models.PLAYER_SEARCH_KEYS.values()}))
+    total = 0
+    while True:
+        with bind.begin() as conn:
+            rows = conn.execute(select(player.c.player_id, *(player.c[c] for c in columns)).where(missing).limit(BACKFILL_BATCH)).all()
+            if not rows:
+                return total
+            conn.execute(stmt, [{'pid': row[0], **models.search_keys(dict(zip(columns, row[1:])))} for row in rows])
+        total += len(rows)
+
+
+class TrigramIndex:
+    """In-process trigram index over player names and email local parts.
+
+    Postings are compact int arrays. An updated player is appended only to
+    the postings of trigrams it was not posted under yet; postings it no
+    longer matches are filtered out when candidates are re-scored against
+    the current text. Writes committed through SessionLocal in this process
+    are applied on commit; when the Player ChangeVersion moves further than
+    those commits explain (another worker, the ETL, bulk statements) the
+    index is rebuilt in the background while the old one keeps serving.
+    """
+    def __init__(self, version_check: float=VERSION_CHECK_SECONDS):
+        self.version_check = version_check
+        self.ready = False
+        self._postings = {}
+        self._fields = {}
+        # trigrams posted for players changed since the build (the others are
+        # posted exactly under the trigrams of their fields)
+        self._posted = {}
+        self._version = None
+        self._local_commits = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._building = None
+
+    def search(self, db: Session, q: str, limit: int):
+        """Up to ``limit`` (player_id, similarity) pairs, best first."""
+        import numpy as np
+        self._sync_version(db)
+        query = ' '.join(normalize(q).split())
+        grams = _trigrams(query)
+        with self._lock:
+            lists = sorted((self._postings[g] for g in grams if g in self._postings), key=len)
+            common = max(1, int(len(self._fields) * STOP_FRACTION))
+            used = []
+            for i, ids in enumerate(lists):
+                if i >= 2 and len(ids) > common:
+                    break
+                used.append(ids)
+            if not used:
+                return []
+            # count matching trigrams per player in numpy; the buffer views must
+            # be gone before the lock is released, an exported array cannot grow
+            pids, counts = np.unique(np.concatenate([np.frombuffer(ids, dtype=np.intc) for ids in used]), return_counts=True)
+            top = min(len(pids), limit * RESCORE_FACTOR)
+            best = pids[np.argpartition(-counts, top - 1)[:top]] if top < len(pids) else pids
+            candidates = [(pid, self._fields.get(pid)) for pid in best.tolist()]
+        scored = ((_similarity(grams, fields), pid) for pid, fields in candidates if fields is not None)
+        return [(pid, score) for score, pid in heapq.nlargest(limit, scored) if score >= MIN_SIMILARITY]
+
+    def apply(self, upserts: dict, deletes: set):
+        with self._lock:
+            for pid in deletes:
+                # its postings stay until the next build; remember them
+                self._posted.setdefault(pid, _field_grams(self._fields.pop(pid, ())))
+            for pid, fields in upserts.items():
+                self._add(pid, fields)
+            self._local_commits += 1
+
+    def build(self):
+        """Load every player into a fresh index and swap it in."""
+        postings, all_fields = {}, {}
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            version = get_version(db, models.Player.__tablename__)
+            stmt = select(models.Player.player_id, models.Player.first_name, models.Player.last_name, models.Player.email)
+            for rows in db.execute(stmt.execution_options(yield_per=BUILD_BATCH)).partitions():
+                for pid, first_name, last_name, email in rows:
+                    fields = _fields(first_name, last_name, email)
+                    all_fields[pid] = fields
+                    for gram in _field_grams(fields):
+                        postings.setdefault(gram, array('i')).append(pid)
+        with self._lock:
+            self._postings, self._fields, self._posted = postings, all_fields, {}
+            self._version, self._local_commits = version, 0
+            self._checked_at = time.monotonic()
+            self.ready = True
+        logger.info(f'Player trigram index built: {len(all_fields)} players in {time.perf_counter() - started:.1f}s')
+
+    def rebuild_in_background(self):
+        with self._lock:
+            if self._building is not None and self._building.is_alive():
+                return
+            self._building = threading.Thread(target=self._build_safely, name='player-trigram-index', daemon=True)
+            self._building.start()
+
+    def _build_safely(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception('Failed to build the player trigram index')
+
+    def _add(self, pid, fields):
+        posted = self._posted.get(pid)
+        if posted is None:
+            posted = _field_grams(self._fields.get(pid, ()))
+        grams = _field_grams(fields)
+        for gram in grams - posted:
+            self._postings.setdefault(gram, array('i')).append(pid)
+        self._posted[pid] = posted | grams
+        self._fields[pid] = fields
+
+    def _sync_version(self, db: Session):
+        now = time.monotonic()
+        if now - self._checked_at < self.version_check:
+            return
+        version = get_version(db, models.Player.__tablename__)
+        with self._lock:
+            self._checked_at = now
+            expected = None if self._version is None else self._version + self._local_commits
+            if version == expected:
+                self._version, self._local_commits = version, 0
+                return
+        self.rebuild_in_background()
+
+
+trigram_index = TrigramIndex()
+
+
+def search_players(db: Session, q: str, limit: int=DEFAULT_LIMIT, fuzzy: bool=False):
+    """Ranked players matching ``q``: prefix matches first, then (with
+    ``fuzzy`` and a ready trigram index) typo-tolerant matches by similarity."""
+    players = prefix_search(db, q, limit)
+    if not fuzzy or len(players) >= limit or not trigram_index.ready:
+        return players
+    seen = {p.player_id for p in players}
+    extra = [pid for pid, _ in trigram_index.search(db, q, limit) if pid not in seen][:limit - len(players)]
+    if extra:
+        found = {p.player_id: p for p in db.scalars(select(models.Player).where(models.Player.player_id.in_(extra)))}
+        players += [found[pid] for pid in extra if pid in found]
+    return players
+
+
+@event.listens_for(SessionLocal, 'after_flush')
+def _collect_players(session, flush_context):
+    if not trigram_index.ready:
+        return
+    changes = session.info.setdefault(_KEY, ({}, set()))
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, models.Player):
+            changes[0][obj.player_id] = _fields(obj.first_name, obj.last_name, obj.email)
+            changes[1].discard(obj.player_id)
+    for obj in session.deleted:
+        if isinstance(obj, models.Player):
+            changes[0].pop(obj.player_id, None)
+            changes[1].add(obj.player_id)
+
+
+@event.listens_for(SessionLocal, 'do_orm_execute')
+def _note_bulk_players(state):
+    # bulk statements carry no objects; the version check rebuilds the index after them
+    if trigram_index.ready and (state.is_insert or state.is_update or state.is_delete):
+        if getattr(getattr(state.statement, 'table', None), 'name', None) == models.Player.__tablename__:
+            state.session.info[_BULK_KEY] = True
+
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _apply_players(session):
+    changes = session.info.pop(_KEY, None)
+    if session.info.pop(_BULK_KEY, False):
+        return
+    if changes and (changes[0] or changes[1]):
+        trigram_index.apply(changes[0], changes[1])
+
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _forget_players(session):
+    session.info.pop(_KEY, None)
+    session.info.pop(_BULK_KEY, None)
@@ -0,0 +1,105 @@
+import bisect
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# upper bounds (seconds) of the checkout wait histogram buckets; the last one is +Inf
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class PoolMetrics:
+    """Counters and a checkout-wait histogram for one connection pool.
+
+    Fed by ``TimedQueuePool`` (wait times, timeouts) and by pool events
+    (connects, checkouts, checkins, invalidations); ``snapshot`` combines
+    them with the pool's own live numbers for the internal stats endpoint.
+    """
+    def __init__(self, buckets=WAIT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.wait_counts = [0] * (len(self.buckets) + 1)
+            self.wait_sum = 0.0
+            self.wait_max = 0.0
+            self.timeouts = 0
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+
+    def observe_wait(self, seconds: float):
+        with self._lock:
+            self.wait_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def listen(self, pool):
+        event.listen(pool, 'connect', lambda *a: self.count('connects'))
+        event.listen(pool, 'checkout', lambda *a: self.count('checkouts'))
+        event.listen(pool, 'checkin', lambda *a: self.count('checkins'))
+        event.listen(pool, 'invalidate', lambda *a: self.count('invalidations'))
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            cumulative, histogram = 0, []
+            for bound, n in zip(self.buckets + (float('inf'),), self.wait_counts):
+                cumulative += n
+                histogram.append({'le': 'inf' if bound == float('inf') else bound, 'count': cumulative})
+            stats = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'wait_seconds': {
+                    'count': cumulative,
+                    'sum': round(self.wait_sum, 6),
+                    'max': round(self.wait_max, 6),
+                    'histogram': histogram,
+                },
+            }
+        stats['pool'] = pool_status(pool)
+        return stats
+
+
+def pool_status(pool) -> dict:
+    status = {'class': type(pool).__name__, 'status': pool.status()}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_in=pool.checkedin(), checked_out=pool.checkedout(),
+                      overflow=pool.overflow(), max_overflow=pool._max_overflow, timeout=pool.timeout())
+    return status
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection
+    (including opening a new one) and how many checkouts timed out."""
+    metrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.count('timeouts')
+            raise
+        if self.metrics is not None:
+            self.metrics.observe_wait(time.perf_counter() - started)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() builds a fresh pool through recreate(); keep feeding the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+pool_metrics = PoolMetrics()
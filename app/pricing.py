@@ -0,0 +1,38 @@
+import os
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app import models
+from app.cache import get_price
+
+# hourly room price: PriceKV '<PRICE_KEY>:<room_type>', else '<PRICE_KEY>' (club entry, else global)
+PRICE_KEY = os.getenv('ANALYTICS_PRICE_KEY', 'room_hour')
+
+
+def hourly_rate(db: Session, club_id, room_type) -> float:
+    entry = get_price(db, f'{PRICE_KEY}:{room_type}', club_id) if room_type else None
+    if entry is None:
+        entry = get_price(db, PRICE_KEY, club_id)
+    return entry.price_value if entry is not None else 0.0
+
+
+def room_rates(db: Session, room_ids) -> dict:
+    """{room_id: hourly rate} for the existing rooms among ``room_ids``; the
+    prices come from the PriceKV cache, so only the rooms are queried."""
+    stmt = (select(models.Room.room_id, models.Room.room_type, models.Arena.club_id)
+            .join(models.Arena, models.Arena.arena_id == models.Room.arena_id)
+            .where(models.Room.room_id.in_(list(room_ids))))
+    return {room_id: hourly_rate(db, club_id, room_type) for room_id, room_type, club_id in db.execute(stmt).all()}
+
+
+def room_rate(db: Session, room_id: int) -> Optional[float]:
+    return room_rates(db, [room_id]).get(room_id)
+
+
+def price_items(db: Session, items):
+    """Bulk hook: stamp each validated (index, data) item with its room's
+    current hourly rate. Rejects nothing; unknown rooms get no rate."""
+    rates = room_rates(db, {data['room_id'] for _, data in items})
+    for _, data in items:
+        data['hourly_rate'] = rates.get(data['room_id'])
+    return []
@@ -0,0 +1,159 @@
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from sqlalchemy import event
+from app.metrics import current_source, metrics
+
+slow_query_logger = logging.getLogger('colizeum.slow_sql')
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '500'))
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', 'slow_queries.log')
+# add X-Query-Count / X-Query-Time-Ms to every response (for CI and local debugging)
+QUERY_COUNT_HEADER = os.getenv('QUERY_COUNT_HEADER', '').strip().lower() in ('1', 'true', 'yes', 'on')
+# distinct (source, statement) groups kept; the rest are folded into OTHER_STATEMENT
+MAX_STATEMENTS = int(os.getenv('QUERY_STATS_MAX_STATEMENTS', '1000'))
+OTHER_STATEMENT = '<other statements>'
+STATEMENT_KINDS = {'SELECT', 'INSERT', 'UPDATE', 'DELETE'}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:\?|:\w+|%\(\w+\)s)(?:, (?:\?|:\w+|%\(\w+\)s))*\)', re.IGNORECASE)
+_VALUES_ROWS = re.compile(r'(\((?:\?, )*\?\))(?:, \((?:\?, )*\?\))+')
+_SPACE = re.compile(r'\s+')
+
+# per-request [statements, seconds]; None outside a request
+_request_totals = contextvars.ContextVar('request_query_totals', default=None)
+
+@lru_cache(maxsize=4096)
+def normalize_sql(statement: str) -> str:
+    """Group key for ``statement``: literals become ``?``, IN lists and
+    multi-row VALUES collapse to one element, whitespace is squeezed."""
+    sql = _SPACE.sub(' ', statement).strip()
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _VALUES_ROWS.sub(r'\1, ...', sql)
+
+
+class QueryStats:
+    """Count, time and affected rows per (source, normalized statement).
+
+    ``source`` is the route template of the request that issued the
+    statement or the ETL stage it ran in. Row counts come from the DBAPI
+    cursor, so they cover INSERT/UPDATE/DELETE; most drivers report -1 for SELECT.
+    """
+    def __init__(self, max_statements: int=MAX_STATEMENTS):
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def record(self, source: str, sql: str, seconds: float, rows: int):
+        with self._lock:
+            key = (source, sql)
+            entry = self._stats.get(key)
+            if entry is None:
+                if len(self._stats) >= self.max_statements:
+                    key = (source, OTHER_STATEMENT)
+                    entry = self._stats.get(key)
+                if entry is None:
+                    entry = self._stats[key] = [0, 0.0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            if rows > 0:
+                entry[3] += rows
+
+    def top(self, limit: int=50, sort: str='total') -> list:
+        with self._lock:
+            items = [(source, sql, *entry) for (source, sql), entry in self._stats.items()]
+        order = {'total': lambda i: i[3], 'count': lambda i: i[2], 'max': lambda i: i[4], 'avg': lambda i: i[3] / i[2]}[sort]
+        items.sort(key=order, reverse=True)
+        return [{
+            'source': source,
+            'statement': sql,
+            'count': count,
+            'total_ms': round(total * 1000, 3),
+            'avg_ms': round(total * 1000 / count, 3),
+            'max_ms': round(longest * 1000, 3),
+            'rows': rows,
+        } for source, sql, count, total, longest, rows in items[:limit]]
+
+
+query_stats = QueryStats()
+
+
+@contextmanager
+def query_source(name: str):
+    """Attribute the SQL issued inside the block to ``name`` (e.g. ``etl:load``)."""
+    token = current_source.set(name)
+    try:
+        yield
+    finally:
+        current_source.reset(token)
+
+
+def instrument_engine(engine):
+    """Time every statement on ``engine``: per-statement stats, the
+    db_query_duration_seconds histogram, the per-request totals and the slow-query log."""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('query_start')
+        if not starts:
+            return
+        seconds = time.perf_counter() - starts.pop()
+        source = current_source.get() or 'none'
+        sql = normalize_sql(statement)
+        rows = getattr(cursor, 'rowcount', -1)
+        query_stats.record(source, sql, seconds, rows)
+        kind = sql[:6].upper()
+        metrics.observe('db_query_duration_seconds', {'route': source, 'statement': kind if kind in STATEMENT_KINDS else 'OTHER'}, seconds)
+        totals = _request_totals.get()
+        if totals is not None:
+            totals[0] += 1
+            totals[1] += seconds
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            slow_query_logger.warning(f'{seconds * 1000:.1f}ms source={source} rows={rows} executemany={executemany} {sql}')
+
+    @event.listens_for(engine, 'handle_error')
+    def _failed(context):
+        # failed statements never reach after_cursor_execute
+        starts = context.connection.info.get('query_start') if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+def configure_slow_query_log(path: str=SLOW_QUERY_LOG):
+    if path and not slow_query_logger.handlers:
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.propagate = False
+
+
+async def query_count_middleware(request, call_next):
+    """Count the statements each request issues; with QUERY_COUNT_HEADER the
+    totals are returned as X-Query-Count / X-Query-Time-Ms, so a test can
+    assert on them and catch N+1 regressions."""
+    totals = [0, 0.0]
+    token = _request_totals.set(totals)
+    try:
+        response = await call_next(request)
+    finally:
+        _request_totals.reset(token)
+    if QUERY_COUNT_HEADER:
+        response.headers['X-Query-Count'] = str(totals[0])
+        response.headers['X-Query-Time-Ms'] = f'{totals[1] * 1000:.1f}'
+    return response
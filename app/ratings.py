@@ -0,0 +1,334 @@
+import logging
+import os
+import threading
+import time
+from fastapi import HTTPException
+from sqlalchemy import delete, exists, insert, select, update
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.cache import VersionedCache
+from app.crud import IN_CHUNK
+from app.database import SessionLocal
+from app.versions import bump_versions, get_version
+
+logger = logging.getLogger('colizeum')
+
+# Player.rating default, also the starting point of players first rated without a snapshot
+DEFAULT_RATING = 1000
+K_FACTOR = float(os.getenv('RATING_K_FACTOR', '32'))
+LEADERBOARD_LIMIT = 50
+MAX_LEADERBOARD_LIMIT = 500
+# ChangeVersion row locked by every transaction that writes ratings or leaderboards
+RATINGS_LOCK = 'ratings'
+WRITE_BATCH = 5000
+HISTORY_COLUMNS = ['match_id', 'tournament_id', 'club_id', 'winner_player_id', 'loser_player_id', 'winner_rating', 'loser_rating', 'delta']
+
+# entries are dropped whenever a commit touches LeaderboardEntry (see app.change_tracking)
+leaderboard_cache = VersionedCache(models.LeaderboardEntry.__tablename__)
+
+def expected_score(rating, opponent) -> float:
+    return 1.0 / (1.0 + 10.0 ** ((opponent - rating) / 400.0))
+
+
+def rating_delta(winner_rating: int, loser_rating: int, k: float=K_FACTOR) -> int:
+    """Whole points the winner takes from the loser (Elo)."""
+    return int(round(k * (1.0 - expected_score(winner_rating, loser_rating))))
+
+
+def lock_ratings(db: Session):
+    """Serialize rating and leaderboard writers across processes until the
+    transaction ends: a no-op UPDATE on a ChangeVersion row, as in app.locks."""
+    table = models.ChangeVersion.__table__
+    stmt = update(table).where(table.c.name == RATINGS_LOCK).values(version=table.c.version)
+    if not db.execute(stmt).rowcount:
+        bump_versions(db.connection(), [RATINGS_LOCK])
+
+
+def record_match(db: Session, match, loser_player_id=None):
+    """Apply a newly flushed ``match`` to both players' ratings and to its
+    tournament and club leaderboards; the caller commits."""
+    if match.winner_player_id is None:
+        return
+    lock_ratings(db)
+    if loser_player_id is not None:
+        winner = db.get(models.Player, match.winner_player_id, populate_existing=True)
+        loser = db.get(models.Player, loser_player_id, populate_existing=True)
+        if winner is None or loser is None:
+            raise HTTPException(400, 'Player not found')
+        w, l = _rating(winner), _rating(loser)
+        delta = rating_delta(w, l)
+        db.add(models.MatchResult(match_id=match.match_id, loser_player_id=loser_player_id, winner_rating=w, loser_rating=l, delta=delta))
+        winner.rating, loser.rating = w + delta, l - delta
+    _tally(db, match.tournament_id, match.winner_player_id, loser_player_id)
+
+
+def update_result(db: Session, match, winner_player_id, loser_player_id=None):
+    """Keep the outcome of an edited ``match`` (before its new values are set)
+    in step with it; the next recompute replays it in order. A player's
+    pre-match rating is kept while they stay in the match."""
+    snapshot = db.get(models.MatchResult, match.match_id)
+    if winner_player_id is None or loser_player_id is None:
+        if snapshot is not None:
+            forget_match(db, match)
+        return
+    if snapshot is None:
+        db.add(models.MatchResult(match_id=match.match_id, loser_player_id=loser_player_id))
+        return
+    if winner_player_id != match.winner_player_id:
+        snapshot.winner_rating = None
+    if loser_player_id != snapshot.loser_player_id:
+        snapshot.loser_player_id, snapshot.loser_rating = loser_player_id, None
+    snapshot.delta = None
+
+
+def forget_match(db: Session, match):
+    """Drop the outcome of a match that is deleted or no longer rated.
+
+    Each player's pre-match rating moves to their next rated match, so a
+    recompute still starts them from it when this was their first.
+    """
+    snapshot = db.get(models.MatchResult, match.match_id)
+    if snapshot is None:
+        return
+    result = models.MatchResult
+    for player_id, before in ((match.winner_player_id, snapshot.winner_rating), (snapshot.loser_player_id, snapshot.loser_rating)):
+        if player_id is None or before is None:
+            continue
+        stmt = (select(result, models.Match.winner_player_id)
+                .join(models.Match, models.Match.match_id == result.match_id)
+                .where(result.match_id > match.match_id,
+                       (models.Match.winner_player_id == player_id) | (result.loser_player_id == player_id))
+                .order_by(result.match_id)
+                .limit(1))
+        following = db.execute(stmt).first()
+        if following is not None:
+            later, winner_id = following
+            if winner_id == player_id:
+                later.winner_rating = before
+            else:
+                later.loser_rating = before
+    db.delete(snapshot)
+
+
+def forget_matches(db: Session, ids: list):
+    # in match order, so pre-match ratings move past every deleted match
+    ids = sorted(set(ids))
+    for i in range(0, len(ids), IN_CHUNK):
+        stmt = select(models.Match).where(models.Match.match_id.in_(ids[i:i + IN_CHUNK])).order_by(models.Match.match_id)
+        for match in db.scalars(stmt).all():
+            forget_match(db, match)
+
+
+def _rating(player) -> int:
+    return DEFAULT_RATING if player.rating is None else player.rating
+
+
+def _tally(db: Session, tournament_id, winner_id, loser_id):
+    # only tournament matches are attributed to a club
+    if tournament_id is None:
+        return
+    club_id = db.scalar(select(models.Tournament.club_id).where(models.Tournament.tournament_id == tournament_id))
+    entry = models.LeaderboardEntry
+    for scope, scope_id in (('tournament', tournament_id), ('club', club_id)):
+        if scope_id is None:
+            continue
+        for player_id, column in ((winner_id, 'wins'), (loser_id, 'losses')):
+            if player_id is None:
+                continue
+            stmt = (update(entry)
+                    .where(entry.scope == scope, entry.scope_id == scope_id, entry.player_id == player_id)
+                    .values({column: getattr(entry, column) + 1}))
+            if not db.execute(stmt.execution_options(synchronize_session=False)).rowcount:
+                counts = {'wins': 0, 'losses': 0, column: 1}
+                db.execute(insert(entry).values(scope=scope, scope_id=scope_id, player_id=player_id, **counts))
+
+
+# numpy and pandas are imported where they are used, to keep them out of app startup
+
+def replay(winners, losers, ratings, k: float=K_FACTOR):
+    """Elo over matches in order, vectorized across independent matches.
+
+    ``winners`` and ``losers`` index into ``ratings``, which is updated in
+    place. Each match goes into the wave after the last wave of either of its
+    players, so no wave holds a player twice and every player still meets
+    their matches in order: one numpy pass per wave gives exactly the
+    sequential result. Returns the winner's and loser's rating before each
+    match and the points that changed hands.
+    """
+    import numpy as np
+    last = [-1] * len(ratings)
+    waves = []
+    for w, l in zip(winners.tolist(), losers.tolist()):
+        wave = max(last[w], last[l]) + 1
+        last[w] = last[l] = wave
+        waves.append(wave)
+    waves = np.asarray(waves, dtype=np.int64)
+    order = np.argsort(waves, kind='stable')
+    bounds = np.flatnonzero(np.diff(waves[order])) + 1
+    before_w = np.empty(len(waves), dtype=np.int64)
+    before_l = np.empty(len(waves), dtype=np.int64)
+    deltas = np.empty(len(waves), dtype=np.int64)
+    for idx in np.split(order, bounds):
+        w, l = winners[idx], losers[idx]
+        rw, rl = ratings[w], ratings[l]
+        # same expression as rating_delta; np.rint rounds half to even like round()
+        d = np.rint(k * (1.0 - 1.0 / (1.0 + np.power(10.0, (rl - rw) / 400.0)))).astype(np.int64)
+        ratings[w] = rw + d
+        ratings[l] = rl - d
+        before_w[idx], before_l[idx], deltas[idx] = rw, rl, d
+    return before_w, before_l, deltas
+
+
+def recompute(db: Session) -> dict:
+    """Rebuild every rating snapshot, the ratings of all rated players and
+    all leaderboards from the match history, in one transaction.
+
+    Each player starts from the rating recorded before their first rated
+    match; players left without rated matches keep their current rating.
+    """
+    import numpy as np
+    import pandas as pd
+    started = time.perf_counter()
+    lock_ratings(db)
+    result = models.MatchResult
+    db.execute(delete(result).where(~exists().where(models.Match.match_id == result.match_id)).execution_options(synchronize_session=False))
+    stmt = (select(models.Match.match_id, models.Match.tournament_id, models.Tournament.club_id, models.Match.winner_player_id,
+                   result.loser_player_id, result.winner_rating, result.loser_rating, result.delta)
+            .outerjoin(models.Tournament, models.Tournament.tournament_id == models.Match.tournament_id)
+            .outerjoin(result, result.match_id == models.Match.match_id)
+            .order_by(models.Match.match_id))
+    history = pd.DataFrame.from_records(db.execute(stmt).all(), columns=HISTORY_COLUMNS)
+    for column in HISTORY_COLUMNS:
+        history[column] = pd.to_numeric(history[column])
+    has_loser = history.loser_player_id.notna()
+    rated_mask = history.winner_player_id.notna() & has_loser & (history.winner_player_id != history.loser_player_id)
+    rated = history[rated_mask]
+
+    winners = rated.winner_player_id.to_numpy(np.int64)
+    losers = rated.loser_player_id.to_numpy(np.int64)
+    players, codes = np.unique(np.concatenate([winners, losers]), return_inverse=True)
+    ratings = _seed_ratings(rated, players)
+    before_w, before_l, deltas = replay(codes[:len(rated)], codes[len(rated):], ratings)
+
+    changed = ((rated.winner_rating.to_numpy() != before_w) | (rated.loser_rating.to_numpy() != before_l)
+               | (rated.delta.to_numpy() != deltas))
+    snapshots = [{'match_id': m, 'winner_rating': w, 'loser_rating': l, 'delta': d}
+                 for m, w, l, d in zip(rated.match_id[changed].astype('int64').tolist(), before_w[changed].tolist(),
+                                       before_l[changed].tolist(), deltas[changed].tolist())]
+    stale = history[has_loser & ~rated_mask & history.delta.notna()]
+    snapshots += [{'match_id': m, 'winner_rating': None, 'loser_rating': None, 'delta': None}
+                  for m in stale.match_id.astype('int64').tolist()]
+    _execute_batches(db, update(result), snapshots)
+
+    current = {}
+    ids = players.tolist()
+    for i in range(0, len(ids), IN_CHUNK):
+        chunk = ids[i:i + IN_CHUNK]
+        current.update(db.execute(select(models.Player.player_id, models.Player.rating).where(models.Player.player_id.in_(chunk))).all())
+    moved = [{'player_id': p, 'rating': r} for p, r in zip(ids, ratings.tolist()) if p in current and current[p] != r]
+    _execute_batches(db, update(models.Player), moved)
+
+    entries = _leaderboard_entries(history)
+    db.execute(delete(models.LeaderboardEntry))
+    _execute_batches(db, insert(models.LeaderboardEntry), entries)
+    db.commit()
+    return {
+        'matches': len(history),
+        'rated_matches': len(rated),
+        'rated_players': len(ids),
+        'snapshots_updated': len(snapshots),
+        'ratings_updated': len(moved),
+        'leaderboard_entries': len(entries),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def _seed_ratings(rated, players):
+    import numpy as np
+    import pandas as pd
+    # the rating each player had when they first entered the history
+    n = len(rated)
+    appearances = pd.DataFrame({
+        'player_id': np.concatenate([rated.winner_player_id.to_numpy(np.int64), rated.loser_player_id.to_numpy(np.int64)]),
+        'order': np.tile(np.arange(n), 2),
+        'rating': np.concatenate([rated.winner_rating.to_numpy(), rated.loser_rating.to_numpy()]),
+    })
+    first = appearances.sort_values('order', kind='stable').drop_duplicates('player_id')
+    seeds = pd.Series(first.rating.to_numpy(), index=first.player_id.to_numpy()).reindex(players)
+    return seeds.fillna(DEFAULT_RATING).to_numpy(np.int64, copy=True)
+
+
+def _leaderboard_entries(history) -> list:
+    import pandas as pd
+    decided = history[history.winner_player_id.notna()]
+    lost = decided[decided.loser_player_id.notna() & (decided.loser_player_id != decided.winner_player_id)]
+    entries = []
+    for scope, column in (('tournament', 'tournament_id'), ('club', 'club_id')):
+        wins = decided[decided[column].notna()].groupby([column, 'winner_player_id']).size()
+        losses = lost[lost[column].notna()].groupby([column, 'loser_player_id']).size()
+        wins.index.names = losses.index.names = ['scope_id', 'player_id']
+        table = pd.concat({'wins': wins, 'losses': losses}, axis=1).fillna(0).astype('int64').reset_index()
+        table = table.astype({'scope_id': 'int64', 'player_id': 'int64'})
+        table.insert(0, 'scope', scope)
+        entries += table.to_dict('records')
+    return entries
+
+
+def _execute_batches(db: Session, stmt, rows: list):
+    for i in range(0, len(rows), WRITE_BATCH):
+        db.execute(stmt, rows[i:i + WRITE_BATCH])
+
+
+_recompute_lock = threading.Lock()
+_recompute_thread = None
+_recompute_again = False
+
+def recompute_in_background():
+    """Schedule ``recompute`` for edits the incremental path cannot apply
+    (updated, deleted or bulk-written matches). Calls made while a run is in
+    progress fold into one follow-up run."""
+    global _recompute_thread, _recompute_again
+    with _recompute_lock:
+        if _recompute_thread is not None:
+            _recompute_again = True
+            return
+        _recompute_thread = threading.Thread(target=_run_recompute, name='rating-recompute', daemon=True)
+        _recompute_thread.start()
+
+
+def _run_recompute():
+    global _recompute_thread, _recompute_again
+    while True:
+        try:
+            with SessionLocal() as db:
+                stats = recompute(db)
+            logger.info(f"Ratings recomputed: {stats['rated_matches']} rated matches, {stats['ratings_updated']} ratings changed in {stats['seconds']}s")
+        except Exception:
+            logger.exception('Failed to recompute ratings')
+        with _recompute_lock:
+            if not _recompute_again:
+                _recompute_thread = None
+                return
+            _recompute_again = False
+
+
+def leaderboard(db: Session, scope: str, scope_id: int, limit: int=LEADERBOARD_LIMIT):
+    """Top ``limit`` players of a tournament or club leaderboard (most wins,
+    then fewest losses, then rating), or None if the tournament or club does not exist."""
+    # rows carry player names and ratings: a Player write starts a new key
+    key = (scope, scope_id, limit, get_version(db, models.Player.__tablename__))
+    return leaderboard_cache.get_or_load(db, key, lambda: _load_leaderboard(db, scope, scope_id, limit))
+
+
+def _load_leaderboard(db: Session, scope: str, scope_id: int, limit: int):
+    owner = models.Tournament if scope == 'tournament' else models.Club
+    if db.get(owner, scope_id) is None:
+        return None
+    entry, player = models.LeaderboardEntry, models.Player
+    stmt = (select(entry.player_id, player.first_name, player.last_name, player.rating, entry.wins, entry.losses)
+            .join(player, player.player_id == entry.player_id)
+            .where(entry.scope == scope, entry.scope_id == scope_id)
+            .order_by(entry.wins.desc(), entry.losses, player.rating.desc(), entry.player_id)
+            .limit(limit))
+    # cached values are detached pydantic models, never session-bound ORM rows
+    return [schemas.LeaderboardRow(rank=rank, **row._mapping) for rank, row in enumerate(db.execute(stmt), 1)]
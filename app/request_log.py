@@ -0,0 +1,96 @@
+import logging
+import os
+import queue
+import threading
+import time
+from sqlalchemy import insert
+from app.database import engine
+from app import models
+
+logger = logging.getLogger('colizeum')
+
+QUEUE_SIZE = int(os.getenv('REQUEST_LOG_QUEUE_SIZE', '10000'))
+BATCH_SIZE = int(os.getenv('REQUEST_LOG_BATCH_SIZE', '500'))
+FLUSH_SECONDS = float(os.getenv('REQUEST_LOG_FLUSH_SECONDS', '1.0'))
+
+class RequestLogWriter:
+    """Background writer for RequestLog rows.
+
+    ``record`` only appends to a bounded in-memory queue, so the request path
+    never waits for the database. A daemon thread drains the queue and writes
+    it with one executemany INSERT per batch, flushing when BATCH_SIZE entries
+    are waiting or FLUSH_SECONDS have passed. When the queue is full new
+    entries are dropped and counted in ``dropped``; ``stop`` flushes what is left.
+    """
+    def __init__(self, queue_size: int=QUEUE_SIZE, batch_size: int=BATCH_SIZE, flush_seconds: float=FLUSH_SECONDS):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self.written = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, **entry):
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='request-log-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float=10.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        if self.dropped:
+            logger.warning(f'RequestLog writer dropped {self.dropped} entries (queue full)')
+
+    def flush(self):
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            deadline = time.monotonic() + self.flush_seconds
+            batch = []
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                batch.extend(self._drain(self.batch_size - len(batch)))
+            if batch:
+                self._write(batch)
+
+    def _drain(self, limit: int):
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _write(self, batch):
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(models.RequestLog), batch)
+            self.written += len(batch)
+        except Exception:
+            logger.exception(f'Failed to write {len(batch)} RequestLog entries')
+
+
+request_log_writer = RequestLogWriter()
@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.admin import require_admin
+from app.database import get_db
+from app.serialization import rows_response
+from app.conditional import etag_for
+from app.analytics import GRAIN_PATTERN, bucket_range, compact, room_totals, usage_series
+from app import models, schemas
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+def _range(grain, since, until):
+    try:
+        return bucket_range(grain, since, until)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+@router.get("/rooms/{room_id}", response_model=list[schemas.UsageBucket], dependencies=[Depends(etag_for('Room', 'UsageRollup'))])
+def room_usage(room_id: int, grain: str = Query('day', pattern=GRAIN_PATTERN), since: Optional[datetime] = Query(None, alias='from'), until: Optional[datetime] = Query(None, alias='to'), db: Session = Depends(get_db)):
+    """Bookings, booked and played hours, revenue and utilization of the room per hour or day."""
+    if db.get(models.Room, room_id) is None:
+        raise HTTPException(404, "Room not found")
+    since, until = _range(grain, since, until)
+    return rows_response(schemas.UsageBucket, usage_series(db, 'room', room_id, grain, since, until))
+
+@router.get("/clubs/{club_id}", response_model=list[schemas.UsageBucket], dependencies=[Depends(etag_for('Club', 'Room', 'UsageRollup'))])
+def club_usage(club_id: int, grain: str = Query('day', pattern=GRAIN_PATTERN), since: Optional[datetime] = Query(None, alias='from'), until: Optional[datetime] = Query(None, alias='to'), db: Session = Depends(get_db)):
+    """Club-wide totals per hour or day; utilization is relative to all of the club's rooms."""
+    if db.get(models.Club, club_id) is None:
+        raise HTTPException(404, "Club not found")
+    since, until = _range(grain, since, until)
+    rooms = db.scalar(select(func.count(models.Room.room_id)).join(models.Arena, models.Arena.arena_id == models.Room.arena_id).where(models.Arena.club_id == club_id))
+    return rows_response(schemas.UsageBucket, usage_series(db, 'club', club_id, grain, since, until, rooms))
+
+@router.get("/clubs/{club_id}/rooms", response_model=list[schemas.RoomUsage], dependencies=[Depends(etag_for('Club', 'Room', 'UsageRollup'))])
+def club_room_usage(club_id: int, since: Optional[datetime] = Query(None, alias='from'), until: Optional[datetime] = Query(None, alias='to'), db: Session = Depends(get_db)):
+    """Totals per room of the club over whole days, busiest first."""
+    if db.get(models.Club, club_id) is None:
+        raise HTTPException(404, "Club not found")
+    since, until = _range('day', since, until)
+    return rows_response(schemas.RoomUsage, room_totals(db, club_id, since, until))
+
+@router.post("/compact", dependencies=[Depends(require_admin)])
+def compact_rollups(since: Optional[datetime] = Query(None, alias='from'), until: Optional[datetime] = Query(None, alias='to'), db: Session = Depends(get_db)):
+    """Rebuild the rollups of whole days in the range (all of them when omitted)
+    from the raw bookings and sessions; use after imports or to backfill."""
+    return compact(db, since, until)
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item, related_items
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/arenas", tags=["Arenas"])
@@ -14,12 +20,30 @@ def create_item(payload: schemas.ArenaCreate, db: Session = Depends(get_db)):
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.ArenaRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.Arena)).all()
+@router.get("/", response_model=list[schemas.ArenaRead], dependencies=[Depends(etag_for('Arena'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.ArenaRead, paginate(db, models.Arena, page), page.response)
 
-@router.get("/{item_id}", response_model=schemas.ArenaRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/export", dependencies=[Depends(etag_for('Arena'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.Arena, schemas.ArenaRead, params, format, gzip)
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_create(db, models.Arena, schemas.ArenaCreate, items, atomic)
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_update(db, models.Arena, schemas.ArenaCreate, items, atomic)
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_delete(db, models.Arena, ids, atomic)
+
+@router.get("/{item_id}", response_model=schemas.ArenaRead, dependencies=[Depends(etag_for('Arena'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.Arena, item_id, include)
     obj = db.get(models.Arena, item_id)
     if not obj:
         raise HTTPException(404, "Arena not found")
@@ -45,9 +69,6 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
     db.commit()
     return {"status": "deleted"}
 
-@router.get("/{arena_id}/rooms", response_model=list[schemas.RoomRead])
-def arena_rooms(arena_id: int, db: Session = Depends(get_db)):
-    arena = db.get(models.Arena, arena_id)
-    if not arena:
-        raise HTTPException(404, "Arena not found")
-    return arena.rooms
+@router.get("/{arena_id}/rooms", response_model=list[schemas.RoomRead], dependencies=[Depends(etag_for('Arena', 'Room'))])
+def arena_rooms(arena_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Arena, arena_id, 'rooms', include)
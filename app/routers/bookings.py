@@ -1,7 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item
+from app.locks import lock_room_row, with_room_lock
+from app.pricing import price_items, room_rate
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
@@ -10,30 +18,43 @@ router = APIRouter(prefix="/bookings", tags=["Bookings"])
 def create_item(payload: schemas.BookingCreate, db: Session = Depends(get_db)):
     if not db.get(models.Player, payload.player_id):
         raise HTTPException(400, 'Player not found')
-    if not db.get(models.Room, payload.room_id):
-        raise HTTPException(400, 'Room not found')
-    overlapping = db.scalars(
-        select(models.Booking).filter(
-            models.Booking.room_id == payload.room_id,
-            models.Booking.end_time > payload.start_time,
-            models.Booking.start_time < payload.end_time,
-            models.Booking.status != 'cancelled'
-        )
-    ).first()
-    if overlapping:
-        raise HTTPException(400, 'Room already booked for this time range')
-    obj = models.Booking(**payload.model_dump())
-    db.add(obj)
-    db.commit()
+
+    def book():
+        if _find_overlap(db, payload.room_id, payload.start_time, payload.end_time):
+            raise HTTPException(400, 'Room already booked for this time range')
+        obj = models.Booking(**payload.model_dump(), hourly_rate=room_rate(db, payload.room_id))
+        db.add(obj)
+        db.commit()
+        return obj
+
+    obj = with_room_lock(db, payload.room_id, book)
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.BookingRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.Booking)).all()
+@router.get("/", response_model=list[schemas.BookingRead], dependencies=[Depends(etag_for('Booking'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.BookingRead, paginate(db, models.Booking, page, time_column=models.Booking.start_time, extra_filters=('status',)), page.response)
+
+@router.get("/export", dependencies=[Depends(etag_for('Booking'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.Booking, schemas.BookingRead, params, format, gzip, time_column=models.Booking.start_time, extra_filters=('status',))
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_create(db, models.Booking, schemas.BookingCreate, items, atomic, check=_check_bulk_bookings)
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_update(db, models.Booking, schemas.BookingCreate, items, atomic, check=_check_bulk_bookings)
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_delete(db, models.Booking, ids, atomic)
 
-@router.get("/{item_id}", response_model=schemas.BookingRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/{item_id}", response_model=schemas.BookingRead, dependencies=[Depends(etag_for('Booking'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.Booking, item_id, include)
     obj = db.get(models.Booking, item_id)
     if not obj:
         raise HTTPException(404, "Booking not found")
@@ -44,20 +65,17 @@ def update_item(item_id: int, payload: schemas.BookingCreate, db: Session = Depe
     obj = db.get(models.Booking, item_id)
     if not obj:
         raise HTTPException(404, "Booking not found")
-    overlapping = db.scalars(
-        select(models.Booking).filter(
-            models.Booking.room_id == payload.room_id,
-            models.Booking.booking_id != item_id,
-            models.Booking.end_time > payload.start_time,
-            models.Booking.start_time < payload.end_time,
-            models.Booking.status != 'cancelled'
-        )
-    ).first()
-    if overlapping:
-        raise HTTPException(400, 'Room already booked for this time range')
-    for k, v in payload.model_dump().items():
-        setattr(obj, k, v)
-    db.commit()
+
+    def rebook():
+        if _find_overlap(db, payload.room_id, payload.start_time, payload.end_time, exclude_id=item_id):
+            raise HTTPException(400, 'Room already booked for this time range')
+        for k, v in payload.model_dump().items():
+            setattr(obj, k, v)
+        obj.hourly_rate = room_rate(db, payload.room_id)
+        db.commit()
+        return obj
+
+    with_room_lock(db, payload.room_id, rebook)
     db.refresh(obj)
     return obj
 
@@ -69,3 +87,39 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
     db.delete(obj)
     db.commit()
     return {"status": "deleted"}
+
+
+def _find_overlap(db: Session, room_id, start_time, end_time, exclude_id=None):
+    stmt = select(models.Booking).filter(
+        models.Booking.room_id == room_id,
+        models.Booking.end_time > start_time,
+        models.Booking.start_time < end_time,
+        models.Booking.status != 'cancelled'
+    )
+    if exclude_id is not None:
+        stmt = stmt.filter(models.Booking.booking_id != exclude_id)
+    return db.scalars(stmt).first()
+
+
+def _check_bulk_bookings(db: Session, items):
+    """Bulk hook: the same player/room/overlap rules and pricing as
+    create_item, applied against the database and against earlier items of
+    the same request."""
+    price_items(db, items)
+    known_players = crud.existing_ids(db, models.Player.player_id, [data['player_id'] for _, data in items])
+    # lock rooms in id order so concurrent bulk requests cannot deadlock
+    rooms = {room_id for room_id in sorted({data['room_id'] for _, data in items}) if lock_room_row(db, room_id)}
+    accepted = {}
+    rejected = []
+    for i, data in items:
+        room_id, start, end = data['room_id'], data['start_time'], data['end_time']
+        if data['player_id'] not in known_players:
+            rejected.append((i, 'Player not found'))
+        elif room_id not in rooms:
+            rejected.append((i, 'Room not found'))
+        elif _find_overlap(db, room_id, start, end, exclude_id=data.get('booking_id')) or any(
+                s < end and start < e for s, e in accepted.get(room_id, [])):
+            rejected.append((i, 'Room already booked for this time range'))
+        elif data.get('status') != 'cancelled':
+            accepted.setdefault(room_id, []).append((start, end))
+    return rejected
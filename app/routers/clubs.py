@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item, related_items
+from app.ratings import LEADERBOARD_LIMIT, MAX_LEADERBOARD_LIMIT, leaderboard
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/clubs", tags=["Clubs"])
@@ -14,12 +21,30 @@ def create_item(payload: schemas.ClubCreate, db: Session = Depends(get_db)):
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.ClubRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.Club)).all()
+@router.get("/", response_model=list[schemas.ClubRead], dependencies=[Depends(etag_for('Club'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.ClubRead, paginate(db, models.Club, page), page.response)
 
-@router.get("/{item_id}", response_model=schemas.ClubRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/export", dependencies=[Depends(etag_for('Club'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.Club, schemas.ClubRead, params, format, gzip)
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_create(db, models.Club, schemas.ClubCreate, items, atomic)
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_update(db, models.Club, schemas.ClubCreate, items, atomic)
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_delete(db, models.Club, ids, atomic)
+
+@router.get("/{item_id}", response_model=schemas.ClubRead, dependencies=[Depends(etag_for('Club'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.Club, item_id, include)
     obj = db.get(models.Club, item_id)
     if not obj:
         raise HTTPException(404, "Club not found")
@@ -45,23 +70,22 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
     db.commit()
     return {"status": "deleted"}
 
-@router.get("/{club_id}/arenas", response_model=list[schemas.ArenaRead])
-def club_arenas(club_id: int, db: Session = Depends(get_db)):
-    club = db.get(models.Club, club_id)
-    if not club:
-        raise HTTPException(404, "Club not found")
-    return club.arenas
+@router.get("/{club_id}/arenas", response_model=list[schemas.ArenaRead], dependencies=[Depends(etag_for('Club', 'Arena'))])
+def club_arenas(club_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Club, club_id, 'arenas', include)
 
-@router.get("/{club_id}/memberships", response_model=list[schemas.MembershipRead])
-def club_memberships(club_id: int, db: Session = Depends(get_db)):
-    club = db.get(models.Club, club_id)
-    if not club:
-        raise HTTPException(404, "Club not found")
-    return club.memberships
+@router.get("/{club_id}/memberships", response_model=list[schemas.MembershipRead], dependencies=[Depends(etag_for('Club', 'Membership'))])
+def club_memberships(club_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Club, club_id, 'memberships', include)
+
+@router.get("/{club_id}/tournaments", response_model=list[schemas.TournamentRead], dependencies=[Depends(etag_for('Club', 'Tournament'))])
+def club_tournaments(club_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Club, club_id, 'tournaments', include)
 
-@router.get("/{club_id}/tournaments", response_model=list[schemas.TournamentRead])
-def club_tournaments(club_id: int, db: Session = Depends(get_db)):
-    club = db.get(models.Club, club_id)
-    if not club:
+@router.get("/{club_id}/leaderboard", response_model=list[schemas.LeaderboardRow], dependencies=[Depends(etag_for('Club', 'LeaderboardEntry', 'Player'))])
+def club_leaderboard(club_id: int, limit: int = Query(LEADERBOARD_LIMIT, ge=1, le=MAX_LEADERBOARD_LIMIT), db: Session = Depends(get_db)):
+    """Players ranked by their results in the club's tournaments."""
+    rows = leaderboard(db, 'club', club_id, limit)
+    if rows is None:
         raise HTTPException(404, "Club not found")
-    return club.tournaments
+    return rows_response(schemas.LeaderboardRow, rows)
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import model_response, rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item
+from app.cache import config_cache, get_config
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/configkv", tags=["Configkv"])
@@ -11,15 +18,48 @@ def create_item(payload: schemas.ConfigKVCreate, db: Session = Depends(get_db)):
     obj = models.ConfigKV(**payload.model_dump())
     db.add(obj)
     db.commit()
+    config_cache.invalidate(db)
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.ConfigKVRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.ConfigKV)).all()
+@router.get("/", response_model=list[schemas.ConfigKVRead], dependencies=[Depends(etag_for('ConfigKV'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.ConfigKVRead, paginate(db, models.ConfigKV, page, extra_filters=('config_key',)), page.response)
 
-@router.get("/{item_id}", response_model=schemas.ConfigKVRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/export", dependencies=[Depends(etag_for('ConfigKV'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.ConfigKV, schemas.ConfigKVRead, params, format, gzip, extra_filters=('config_key',))
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    result = crud.bulk_create(db, models.ConfigKV, schemas.ConfigKVCreate, items, atomic)
+    config_cache.invalidate(db)
+    return result
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    result = crud.bulk_update(db, models.ConfigKV, schemas.ConfigKVCreate, items, atomic)
+    config_cache.invalidate(db)
+    return result
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    result = crud.bulk_delete(db, models.ConfigKV, ids, atomic)
+    config_cache.invalidate(db)
+    return result
+
+@router.get("/lookup", response_model=schemas.ConfigKVRead, dependencies=[Depends(etag_for('ConfigKV'))])
+def lookup_item(key: str, club_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Cached lookup by (club_id, key); falls back to the global entry."""
+    obj = get_config(db, key, club_id)
+    if obj is None:
+        raise HTTPException(404, "ConfigKV not found")
+    return model_response(obj)
+
+@router.get("/{item_id}", response_model=schemas.ConfigKVRead, dependencies=[Depends(etag_for('ConfigKV'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.ConfigKV, item_id, include)
     obj = db.get(models.ConfigKV, item_id)
     if not obj:
         raise HTTPException(404, "ConfigKV not found")
@@ -33,6 +73,7 @@ def update_item(item_id: int, payload: schemas.ConfigKVCreate, db: Session = Dep
     for k, v in payload.model_dump().items():
         setattr(obj, k, v)
     db.commit()
+    config_cache.invalidate(db)
     db.refresh(obj)
     return obj
 
@@ -43,5 +84,6 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
         raise HTTPException(404, "ConfigKV not found")
     db.delete(obj)
     db.commit()
+    config_cache.invalidate(db)
     return {"status": "deleted"}
 
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.admin import require_admin
+from app.database import engine, get_db
+from app.async_db import get_async_engine
+from app.pool_metrics import pool_metrics, pool_status
+from app.query_stats import query_stats
+from app.ratings import recompute
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+@router.get("/pool")
+def pool_stats():
+    """Live connection pool numbers plus checkout counters and wait-time histogram
+    since startup (or since the last POST /internal/pool/reset)."""
+    stats = pool_metrics.snapshot(engine.pool)
+    if get_async_engine.cache_info().currsize:
+        stats['async_pool'] = pool_status(get_async_engine().pool)
+    return stats
+
+@router.post("/pool/reset", dependencies=[Depends(require_admin)])
+def reset_pool_stats():
+    """Zero the checkout counters and the wait-time histogram; returns the
+    numbers as they were just before."""
+    stats = pool_stats()
+    pool_metrics.reset()
+    return stats
+
+@router.get("/queries")
+def query_stats_report(limit: int = Query(50, ge=1, le=1000), sort: str = Query('total', pattern='^(total|count|max|avg)$')):
+    """Statements grouped by normalized SQL and source (route template or ETL
+    stage), heaviest first."""
+    return query_stats.top(limit, sort)
+
+@router.post("/queries/reset", dependencies=[Depends(require_admin)])
+def reset_query_stats():
+    query_stats.reset()
+    return {"status": "reset"}
+
+@router.post("/ratings/recompute", dependencies=[Depends(require_admin)])
+def recompute_ratings(db: Session = Depends(get_db)):
+    """Replay the whole match history into ratings and leaderboards now."""
+    return recompute(db)
@@ -1,39 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item
+from app.ratings import forget_match, forget_matches, record_match, recompute_in_background, update_result
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/matches", tags=["Matches"])
 
 @router.post("/", response_model=schemas.MatchRead, status_code=status.HTTP_201_CREATED)
-def create_item(payload: schemas.MatchCreate, db: Session = Depends(get_db)):
-    obj = models.Match(**payload.model_dump())
+def create_item(payload: schemas.MatchRecord, db: Session = Depends(get_db)):
+    """Record a match; with both ``winner_player_id`` and ``loser_player_id``
+    the players' ratings change, and tournament matches count on the
+    tournament and club leaderboards."""
+    data = payload.model_dump()
+    loser_player_id = data.pop('loser_player_id')
+    obj = models.Match(**data)
     db.add(obj)
+    db.flush()
+    record_match(db, obj, loser_player_id)
     db.commit()
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.MatchRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.Match)).all()
+@router.get("/", response_model=list[schemas.MatchRead], dependencies=[Depends(etag_for('Match', 'MatchResult'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.MatchRead, paginate(db, models.Match, page), page.response)
 
-@router.get("/{item_id}", response_model=schemas.MatchRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/export", dependencies=[Depends(etag_for('Match', 'MatchResult'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.Match, schemas.MatchRead, params, format, gzip)
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    result = crud.bulk_create(db, models.Match, schemas.MatchCreate, items, atomic)
+    if result['succeeded']:
+        recompute_in_background()
+    return result
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    result = crud.bulk_update(db, models.Match, schemas.MatchCreate, items, atomic)
+    if result['succeeded']:
+        recompute_in_background()
+    return result
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    forget_matches(db, ids)
+    result = crud.bulk_delete(db, models.Match, ids, atomic)
+    if result['succeeded']:
+        recompute_in_background()
+    return result
+
+@router.get("/{item_id}", response_model=schemas.MatchRead, dependencies=[Depends(etag_for('Match', 'MatchResult'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.Match, item_id, include)
     obj = db.get(models.Match, item_id)
     if not obj:
         raise HTTPException(404, "Match not found")
     return obj
 
 @router.put("/{item_id}", response_model=schemas.MatchRead)
-def update_item(item_id: int, payload: schemas.MatchCreate, db: Session = Depends(get_db)):
+def update_item(item_id: int, payload: schemas.MatchRecord, db: Session = Depends(get_db)):
     obj = db.get(models.Match, item_id)
     if not obj:
         raise HTTPException(404, "Match not found")
-    for k, v in payload.model_dump().items():
+    data = payload.model_dump()
+    # without loser_player_id in the body the match keeps its recorded loser
+    loser_player_id = data.pop('loser_player_id') if 'loser_player_id' in payload.model_fields_set else obj.loser_player_id
+    if loser_player_id is not None and loser_player_id == data['winner_player_id']:
+        raise HTTPException(400, 'loser_player_id must differ from winner_player_id')
+    rated = (data['winner_player_id'], loser_player_id, data['tournament_id']) != (obj.winner_player_id, obj.loser_player_id, obj.tournament_id)
+    if rated:
+        update_result(db, obj, data['winner_player_id'], loser_player_id)
+    for k, v in data.items():
         setattr(obj, k, v)
     db.commit()
     db.refresh(obj)
+    if rated:
+        recompute_in_background()
     return obj
 
 @router.delete("/{item_id}")
@@ -41,7 +93,9 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
     obj = db.get(models.Match, item_id)
     if not obj:
         raise HTTPException(404, "Match not found")
+    forget_match(db, obj)
     db.delete(obj)
     db.commit()
+    recompute_in_background()
     return {"status": "deleted"}
 
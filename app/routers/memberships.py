@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/memberships", tags=["Memberships"])
@@ -14,12 +20,30 @@ def create_item(payload: schemas.MembershipCreate, db: Session = Depends(get_db)
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.MembershipRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.Membership)).all()
+@router.get("/", response_model=list[schemas.MembershipRead], dependencies=[Depends(etag_for('Membership'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.MembershipRead, paginate(db, models.Membership, page, time_column=models.Membership.start_date), page.response)
 
-@router.get("/{item_id}", response_model=schemas.MembershipRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/export", dependencies=[Depends(etag_for('Membership'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.Membership, schemas.MembershipRead, params, format, gzip, time_column=models.Membership.start_date)
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_create(db, models.Membership, schemas.MembershipCreate, items, atomic)
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_update(db, models.Membership, schemas.MembershipCreate, items, atomic)
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_delete(db, models.Membership, ids, atomic)
+
+@router.get("/{item_id}", response_model=schemas.MembershipRead, dependencies=[Depends(etag_for('Membership'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.Membership, item_id, include)
     obj = db.get(models.Membership, item_id)
     if not obj:
         raise HTTPException(404, "Membership not found")
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.metrics import METRICS_PATH, metrics
+
+router = APIRouter(tags=["Internal"])
+
+@router.get(METRICS_PATH, response_class=PlainTextResponse, include_in_schema=False)
+def metrics_endpoint():
+    """Prometheus scrape target (text exposition format 0.0.4)."""
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
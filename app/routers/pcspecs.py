@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/pcspecs", tags=["Pcspecs"])
@@ -14,12 +20,30 @@ def create_item(payload: schemas.PCSpecCreate, db: Session = Depends(get_db)):
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.PCSpecRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.PCSpec)).all()
+@router.get("/", response_model=list[schemas.PCSpecRead], dependencies=[Depends(etag_for('PCSpec'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.PCSpecRead, paginate(db, models.PCSpec, page), page.response)
 
-@router.get("/{item_id}", response_model=schemas.PCSpecRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/export", dependencies=[Depends(etag_for('PCSpec'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.PCSpec, schemas.PCSpecRead, params, format, gzip)
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_create(db, models.PCSpec, schemas.PCSpecCreate, items, atomic)
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_update(db, models.PCSpec, schemas.PCSpecCreate, items, atomic)
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_delete(db, models.PCSpec, ids, atomic)
+
+@router.get("/{item_id}", response_model=schemas.PCSpecRead, dependencies=[Depends(etag_for('PCSpec'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.PCSpec, item_id, include)
     obj = db.get(models.PCSpec, item_id)
     if not obj:
         raise HTTPException(404, "PCSpec not found")
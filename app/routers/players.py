@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item, related_items
+from app.player_search import DEFAULT_LIMIT, MAX_LIMIT, search_players
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/players", tags=["Players"])
@@ -14,12 +21,39 @@ def create_item(payload: schemas.PlayerCreate, db: Session = Depends(get_db)):
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.PlayerRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.Player)).all()
+@router.get("/", response_model=list[schemas.PlayerRead], dependencies=[Depends(etag_for('Player'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.PlayerRead, paginate(db, models.Player, page), page.response)
 
-@router.get("/{item_id}", response_model=schemas.PlayerRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/export", dependencies=[Depends(etag_for('Player'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.Player, schemas.PlayerRead, params, format, gzip)
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_create(db, models.Player, schemas.PlayerCreate, items, atomic)
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_update(db, models.Player, schemas.PlayerCreate, items, atomic, check=_add_search_keys)
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_delete(db, models.Player, ids, atomic)
+
+@router.get("/search", response_model=list[schemas.PlayerRead], dependencies=[Depends(etag_for('Player'))])
+def search_items(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT), fuzzy: bool = True, db: Session = Depends(get_db)):
+    """Case-insensitive prefix search over first name, last name and email,
+    ranked exact > last name > first name > email; with ``fuzzy`` (and
+    PLAYER_SEARCH_TRIGRAMS enabled) typo-tolerant matches fill the remaining slots."""
+    if not q.strip():
+        raise HTTPException(400, "q must not be blank")
+    return rows_response(schemas.PlayerRead, search_players(db, q, limit, fuzzy))
+
+@router.get("/{item_id}", response_model=schemas.PlayerRead, dependencies=[Depends(etag_for('Player'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.Player, item_id, include)
     obj = db.get(models.Player, item_id)
     if not obj:
         raise HTTPException(404, "Player not found")
@@ -45,30 +79,26 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
     db.commit()
     return {"status": "deleted"}
 
-@router.get("/{player_id}/memberships", response_model=list[schemas.MembershipRead])
-def player_memberships(player_id: int, db: Session = Depends(get_db)):
-    player = db.get(models.Player, player_id)
-    if not player:
-        raise HTTPException(404, "Player not found")
-    return player.memberships
+@router.get("/{player_id}/memberships", response_model=list[schemas.MembershipRead], dependencies=[Depends(etag_for('Player', 'Membership'))])
+def player_memberships(player_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Player, player_id, 'memberships', include)
 
-@router.get("/{player_id}/sessions", response_model=list[schemas.GameSessionRead])
-def player_sessions(player_id: int, db: Session = Depends(get_db)):
-    player = db.get(models.Player, player_id)
-    if not player:
-        raise HTTPException(404, "Player not found")
-    return player.hosted_sessions
+@router.get("/{player_id}/sessions", response_model=list[schemas.GameSessionRead], dependencies=[Depends(etag_for('Player', 'GameSession'))])
+def player_sessions(player_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Player, player_id, 'hosted_sessions', include)
 
-@router.get("/{player_id}/bookings", response_model=list[schemas.BookingRead])
-def player_bookings(player_id: int, db: Session = Depends(get_db)):
-    player = db.get(models.Player, player_id)
-    if not player:
-        raise HTTPException(404, "Player not found")
-    return player.bookings
+@router.get("/{player_id}/bookings", response_model=list[schemas.BookingRead], dependencies=[Depends(etag_for('Player', 'Booking'))])
+def player_bookings(player_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Player, player_id, 'bookings', include)
 
-@router.get("/{player_id}/matches_won", response_model=list[schemas.MatchRead])
-def player_matches(player_id: int, db: Session = Depends(get_db)):
-    player = db.get(models.Player, player_id)
-    if not player:
-        raise HTTPException(404, "Player not found")
-    return player.matches_won
+@router.get("/{player_id}/matches_won", response_model=list[schemas.MatchRead], dependencies=[Depends(etag_for('Player', 'Match', 'MatchResult'))])
+def player_matches(player_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Player, player_id, 'matches_won', include)
+
+
+def _add_search_keys(db: Session, items):
+    """Bulk update hook: bulk UPDATEs bypass the ORM events, so the rows
+    carry their normalized search keys themselves. Rejects nothing."""
+    for _, data in items:
+        data.update(models.search_keys(data))
+    return []
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import model_response, rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item
+from app.cache import price_cache, get_price
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/pricekv", tags=["Pricekv"])
@@ -11,15 +18,48 @@ def create_item(payload: schemas.PriceKVCreate, db: Session = Depends(get_db)):
     obj = models.PriceKV(**payload.model_dump())
     db.add(obj)
     db.commit()
+    price_cache.invalidate(db)
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.PriceKVRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.PriceKV)).all()
+@router.get("/", response_model=list[schemas.PriceKVRead], dependencies=[Depends(etag_for('PriceKV'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.PriceKVRead, paginate(db, models.PriceKV, page, extra_filters=('price_key',)), page.response)
 
-@router.get("/{item_id}", response_model=schemas.PriceKVRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/export", dependencies=[Depends(etag_for('PriceKV'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.PriceKV, schemas.PriceKVRead, params, format, gzip, extra_filters=('price_key',))
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    result = crud.bulk_create(db, models.PriceKV, schemas.PriceKVCreate, items, atomic)
+    price_cache.invalidate(db)
+    return result
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    result = crud.bulk_update(db, models.PriceKV, schemas.PriceKVCreate, items, atomic)
+    price_cache.invalidate(db)
+    return result
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    result = crud.bulk_delete(db, models.PriceKV, ids, atomic)
+    price_cache.invalidate(db)
+    return result
+
+@router.get("/lookup", response_model=schemas.PriceKVRead, dependencies=[Depends(etag_for('PriceKV'))])
+def lookup_item(key: str, club_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Cached lookup by (club_id, key); falls back to the global entry."""
+    obj = get_price(db, key, club_id)
+    if obj is None:
+        raise HTTPException(404, "PriceKV not found")
+    return model_response(obj)
+
+@router.get("/{item_id}", response_model=schemas.PriceKVRead, dependencies=[Depends(etag_for('PriceKV'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.PriceKV, item_id, include)
     obj = db.get(models.PriceKV, item_id)
     if not obj:
         raise HTTPException(404, "PriceKV not found")
@@ -33,6 +73,7 @@ def update_item(item_id: int, payload: schemas.PriceKVCreate, db: Session = Depe
     for k, v in payload.model_dump().items():
         setattr(obj, k, v)
     db.commit()
+    price_cache.invalidate(db)
     db.refresh(obj)
     return obj
 
@@ -43,5 +84,6 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
         raise HTTPException(404, "PriceKV not found")
     db.delete(obj)
     db.commit()
+    price_cache.invalidate(db)
     return {"status": "deleted"}
 
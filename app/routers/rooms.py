@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item, related_items
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/rooms", tags=["Rooms"])
@@ -14,12 +21,65 @@ def create_item(payload: schemas.RoomCreate, db: Session = Depends(get_db)):
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.RoomRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.Room)).all()
+@router.get("/", response_model=list[schemas.RoomRead], dependencies=[Depends(etag_for('Room'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.RoomRead, paginate(db, models.Room, page), page.response)
 
-@router.get("/{item_id}", response_model=schemas.RoomRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/export", dependencies=[Depends(etag_for('Room'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.Room, schemas.RoomRead, params, format, gzip)
+
+@router.get("/availability", response_model=list[schemas.RoomAvailability], dependencies=[Depends(etag_for('Room', 'Arena', 'Booking'))])
+def availability(start: datetime = Query(..., alias='from'), end: datetime = Query(..., alias='to'),
+                 club_id: Optional[int] = None, arena_id: Optional[int] = None, min_minutes: int = Query(0, ge=0),
+                 db: Session = Depends(get_db)):
+    """Free slots of every matching room in [from, to).
+
+    All overlapping bookings are fetched in one query ordered by (room_id,
+    start_time) and swept once, instead of one overlap query per room."""
+    if end <= start:
+        raise HTTPException(400, 'to must be after from')
+    rooms_stmt = select(models.Room)
+    if club_id is not None:
+        rooms_stmt = rooms_stmt.join(models.Arena, models.Room.arena_id == models.Arena.arena_id).where(models.Arena.club_id == club_id)
+    if arena_id is not None:
+        rooms_stmt = rooms_stmt.where(models.Room.arena_id == arena_id)
+    rooms = db.scalars(rooms_stmt.order_by(models.Room.room_id)).all()
+    busy = db.execute(
+        select(models.Booking.room_id, models.Booking.start_time, models.Booking.end_time).filter(
+            models.Booking.room_id.in_(rooms_stmt.with_only_columns(models.Room.room_id)),
+            models.Booking.end_time > start,
+            models.Booking.start_time < end,
+            models.Booking.status != 'cancelled'
+        ).order_by(models.Booking.room_id, models.Booking.start_time)
+    ).all()
+    by_room = {}
+    for room_id, busy_start, busy_end in busy:
+        by_room.setdefault(room_id, []).append((busy_start, busy_end))
+    min_length = timedelta(minutes=min_minutes)
+    result = []
+    for room in rooms:
+        slots = [s for s in _free_slots(start, end, by_room.get(room.room_id, [])) if s[1] - s[0] >= min_length]
+        if slots:
+            result.append({'room_id': room.room_id, 'name': room.name, 'free': [{'start': a, 'end': b} for a, b in slots]})
+    return result
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_create(db, models.Room, schemas.RoomCreate, items, atomic)
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_update(db, models.Room, schemas.RoomCreate, items, atomic)
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_delete(db, models.Room, ids, atomic)
+
+@router.get("/{item_id}", response_model=schemas.RoomRead, dependencies=[Depends(etag_for('Room'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.Room, item_id, include)
     obj = db.get(models.Room, item_id)
     if not obj:
         raise HTTPException(404, "Room not found")
@@ -45,23 +105,27 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
     db.commit()
     return {"status": "deleted"}
 
-@router.get("/{room_id}/stations", response_model=list[schemas.StationRead])
-def room_stations(room_id: int, db: Session = Depends(get_db)):
-    room = db.get(models.Room, room_id)
-    if not room:
-        raise HTTPException(404, "Room not found")
-    return room.stations
+@router.get("/{room_id}/stations", response_model=list[schemas.StationRead], dependencies=[Depends(etag_for('Room', 'Station'))])
+def room_stations(room_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Room, room_id, 'stations', include)
 
-@router.get("/{room_id}/bookings", response_model=list[schemas.BookingRead])
-def room_bookings(room_id: int, db: Session = Depends(get_db)):
-    room = db.get(models.Room, room_id)
-    if not room:
-        raise HTTPException(404, "Room not found")
-    return room.bookings
+@router.get("/{room_id}/bookings", response_model=list[schemas.BookingRead], dependencies=[Depends(etag_for('Room', 'Booking'))])
+def room_bookings(room_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Room, room_id, 'bookings', include)
 
-@router.get("/{room_id}/sessions", response_model=list[schemas.GameSessionRead])
-def room_sessions(room_id: int, db: Session = Depends(get_db)):
-    room = db.get(models.Room, room_id)
-    if not room:
-        raise HTTPException(404, "Room not found")
-    return room.game_sessions
+@router.get("/{room_id}/sessions", response_model=list[schemas.GameSessionRead], dependencies=[Depends(etag_for('Room', 'GameSession'))])
+def room_sessions(room_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Room, room_id, 'game_sessions', include)
+
+
+def _free_slots(start, end, busy):
+    """Gaps in [start, end) not covered by ``busy`` intervals sorted by start."""
+    cursor = start
+    for busy_start, busy_end in busy:
+        if busy_start > cursor:
+            yield cursor, busy_start
+        cursor = max(cursor, busy_end)
+        if cursor >= end:
+            return
+    if cursor < end:
+        yield cursor, end
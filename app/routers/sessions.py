@@ -1,25 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item
+from app.pricing import price_items, room_rate
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/sessions", tags=["Sessions"])
 
 @router.post("/", response_model=schemas.GameSessionRead, status_code=status.HTTP_201_CREATED)
 def create_item(payload: schemas.GameSessionCreate, db: Session = Depends(get_db)):
-    obj = models.GameSession(**payload.model_dump())
+    obj = models.GameSession(**payload.model_dump(), hourly_rate=room_rate(db, payload.room_id))
     db.add(obj)
     db.commit()
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.GameSessionRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.GameSession)).all()
+@router.get("/", response_model=list[schemas.GameSessionRead], dependencies=[Depends(etag_for('GameSession'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.GameSessionRead, paginate(db, models.GameSession, page, time_column=models.GameSession.started_at), page.response)
 
-@router.get("/{item_id}", response_model=schemas.GameSessionRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/export", dependencies=[Depends(etag_for('GameSession'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.GameSession, schemas.GameSessionRead, params, format, gzip, time_column=models.GameSession.started_at)
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_create(db, models.GameSession, schemas.GameSessionCreate, items, atomic, check=price_items)
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_update(db, models.GameSession, schemas.GameSessionCreate, items, atomic, check=price_items)
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_delete(db, models.GameSession, ids, atomic)
+
+@router.get("/{item_id}", response_model=schemas.GameSessionRead, dependencies=[Depends(etag_for('GameSession'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.GameSession, item_id, include)
     obj = db.get(models.GameSession, item_id)
     if not obj:
         raise HTTPException(404, "GameSession not found")
@@ -32,6 +57,7 @@ def update_item(item_id: int, payload: schemas.GameSessionCreate, db: Session =
         raise HTTPException(404, "GameSession not found")
     for k, v in payload.model_dump().items():
         setattr(obj, k, v)
+    obj.hourly_rate = room_rate(db, payload.room_id)
     db.commit()
     db.refresh(obj)
     return obj
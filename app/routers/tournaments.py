@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app.pagination import FilterParams, PageParams, paginate
+from app.serialization import rows_response
+from app.export import EXPORT_FORMAT_PATTERN, export_response
+from app.conditional import etag_for
+from app.expand import expanded_item, related_items
+from app.ratings import LEADERBOARD_LIMIT, MAX_LEADERBOARD_LIMIT, leaderboard, recompute_in_background
+from app import crud, models, schemas
 from sqlalchemy import select
 
 router = APIRouter(prefix="/tournaments", tags=["Tournaments"])
@@ -14,12 +21,30 @@ def create_item(payload: schemas.TournamentCreate, db: Session = Depends(get_db)
     db.refresh(obj)
     return obj
 
-@router.get("/", response_model=list[schemas.TournamentRead])
-def list_items(db: Session = Depends(get_db)):
-    return db.scalars(select(models.Tournament)).all()
+@router.get("/", response_model=list[schemas.TournamentRead], dependencies=[Depends(etag_for('Tournament'))])
+def list_items(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return rows_response(schemas.TournamentRead, paginate(db, models.Tournament, page, time_column=models.Tournament.start_date), page.response)
 
-@router.get("/{item_id}", response_model=schemas.TournamentRead)
-def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/export", dependencies=[Depends(etag_for('Tournament'))])
+def export_items(format: str = Query('ndjson', pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, params: FilterParams = Depends()):
+    return export_response(models.Tournament, schemas.TournamentRead, params, format, gzip, time_column=models.Tournament.start_date)
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def bulk_create_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_create(db, models.Tournament, schemas.TournamentCreate, items, atomic)
+
+@router.put("/bulk", response_model=schemas.BulkResult)
+def bulk_update_items(items: List[dict] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_update(db, models.Tournament, schemas.TournamentCreate, items, atomic)
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_items(ids: List[int] = Body(...), atomic: bool = False, db: Session = Depends(get_db)):
+    return crud.bulk_delete(db, models.Tournament, ids, atomic)
+
+@router.get("/{item_id}", response_model=schemas.TournamentRead, dependencies=[Depends(etag_for('Tournament'))])
+def get_item(item_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    if include:
+        return expanded_item(db, models.Tournament, item_id, include)
     obj = db.get(models.Tournament, item_id)
     if not obj:
         raise HTTPException(404, "Tournament not found")
@@ -30,10 +55,14 @@ def update_item(item_id: int, payload: schemas.TournamentCreate, db: Session = D
     obj = db.get(models.Tournament, item_id)
     if not obj:
         raise HTTPException(404, "Tournament not found")
+    moved = obj.club_id != payload.club_id
     for k, v in payload.model_dump().items():
         setattr(obj, k, v)
     db.commit()
     db.refresh(obj)
+    if moved:
+        # its matches now count for another club's leaderboard
+        recompute_in_background()
     return obj
 
 @router.delete("/{item_id}")
@@ -45,9 +74,13 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
     db.commit()
     return {"status": "deleted"}
 
-@router.get("/{tournament_id}/matches", response_model=list[schemas.MatchRead])
-def tournament_matches(tournament_id: int, db: Session = Depends(get_db)):
-    t = db.get(models.Tournament, tournament_id)
-    if not t:
+@router.get("/{tournament_id}/matches", response_model=list[schemas.MatchRead], dependencies=[Depends(etag_for('Tournament', 'Match', 'MatchResult'))])
+def tournament_matches(tournament_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    return related_items(db, models.Tournament, tournament_id, 'matches', include)
+
+@router.get("/{tournament_id}/leaderboard", response_model=list[schemas.LeaderboardRow], dependencies=[Depends(etag_for('Tournament', 'LeaderboardEntry', 'Player'))])
+def tournament_leaderboard(tournament_id: int, limit: int = Query(LEADERBOARD_LIMIT, ge=1, le=MAX_LEADERBOARD_LIMIT), db: Session = Depends(get_db)):
+    rows = leaderboard(db, 'tournament', tournament_id, limit)
+    if rows is None:
         raise HTTPException(404, "Tournament not found")
-    return t.matches
+    return rows_response(schemas.LeaderboardRow, rows)
@@ -1,6 +1,6 @@
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import date, datetime
-from pydantic import BaseModel, Field, EmailStr, validator
+from pydantic import BaseModel, ConfigDict, Field, EmailStr, ValidationInfo, field_validator
 
 class ClubBase(BaseModel):
     name: str = Field(..., max_length=200)
@@ -13,8 +13,7 @@ class ClubCreate(ClubBase):
 
 class ClubRead(ClubBase):
     club_id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ArenaCreate(BaseModel):
     club_id: int
@@ -22,7 +21,8 @@ class ArenaCreate(BaseModel):
     capacity: Optional[int]
     address: Optional[str]
 
-    @validator('capacity')
+    @field_validator('capacity')
+    @classmethod
     def capacity_positive(cls, v):
         if v is not None and v < 0:
             raise ValueError('capacity must be non-negative')
@@ -30,8 +30,7 @@ class ArenaCreate(BaseModel):
 
 class ArenaRead(ArenaCreate):
     arena_id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class RoomCreate(BaseModel):
     arena_id: int
@@ -39,7 +38,8 @@ class RoomCreate(BaseModel):
     room_type: Optional[str] = Field(None, max_length=50)
     max_players: Optional[int] = 10
 
-    @validator('max_players')
+    @field_validator('max_players')
+    @classmethod
     def max_players_positive(cls, v):
         if v is not None and v <= 0:
             raise ValueError('max_players must be positive')
@@ -47,8 +47,16 @@ class RoomCreate(BaseModel):
 
 class RoomRead(RoomCreate):
     room_id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class TimeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+class RoomAvailability(BaseModel):
+    room_id: int
+    name: str
+    free: List[TimeSlot]
 
 class PCSpecCreate(BaseModel):
     cpu: Optional[str]
@@ -58,8 +66,7 @@ class PCSpecCreate(BaseModel):
 
 class PCSpecRead(PCSpecCreate):
     pc_spec_id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StationCreate(BaseModel):
     room_id: int
@@ -69,8 +76,7 @@ class StationCreate(BaseModel):
 
 class StationRead(StationCreate):
     station_id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PlayerCreate(BaseModel):
     first_name: Optional[str]
@@ -80,8 +86,7 @@ class PlayerCreate(BaseModel):
 
 class PlayerRead(PlayerCreate):
     player_id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class MembershipCreate(BaseModel):
     player_id: int
@@ -90,16 +95,16 @@ class MembershipCreate(BaseModel):
     end_date: Optional[date]
     membership_type: Optional[str]
 
-    @validator('end_date')
-    def end_must_be_after_start(cls, v, values):
-        if v and 'start_date' in values and v < values['start_date']:
+    @field_validator('end_date')
+    @classmethod
+    def end_must_be_after_start(cls, v, info: ValidationInfo):
+        if v and 'start_date' in info.data and v < info.data['start_date']:
             raise ValueError('end_date must be after start_date')
         return v
 
 class MembershipRead(MembershipCreate):
     membership_id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class GameSessionCreate(BaseModel):
     room_id: int
@@ -108,16 +113,17 @@ class GameSessionCreate(BaseModel):
     game_title: Optional[str]
     host_player_id: Optional[int]
 
-    @validator('ended_at')
-    def ended_after_started(cls, v, values):
-        if v and 'started_at' in values and v < values['started_at']:
+    @field_validator('ended_at')
+    @classmethod
+    def ended_after_started(cls, v, info: ValidationInfo):
+        if v and 'started_at' in info.data and v < info.data['started_at']:
             raise ValueError('ended_at must be after started_at')
         return v
 
 class GameSessionRead(GameSessionCreate):
     session_id: int
-    class Config:
-        orm_mode = True
+    hourly_rate: Optional[float] = None
+    model_config = ConfigDict(from_attributes=True)
 
 class TournamentCreate(BaseModel):
     club_id: int
@@ -126,7 +132,8 @@ class TournamentCreate(BaseModel):
     end_date: Optional[date]
     prize_pool: Optional[float]
 
-    @validator('prize_pool')
+    @field_validator('prize_pool')
+    @classmethod
     def prize_non_negative(cls, v):
         if v is not None and v < 0:
             raise ValueError('prize_pool must be non-negative')
@@ -134,8 +141,7 @@ class TournamentCreate(BaseModel):
 
 class TournamentRead(TournamentCreate):
     tournament_id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class MatchCreate(BaseModel):
     tournament_id: Optional[int]
@@ -145,8 +151,49 @@ class MatchCreate(BaseModel):
 
 class MatchRead(MatchCreate):
     match_id: int
-    class Config:
-        orm_mode = True
+    loser_player_id: Optional[int] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class MatchRecord(MatchCreate):
+    loser_player_id: Optional[int] = None
+
+    @field_validator('loser_player_id')
+    @classmethod
+    def loser_differs_from_winner(cls, v, info: ValidationInfo):
+        if v is not None and info.data.get('winner_player_id') is None:
+            raise ValueError('loser_player_id requires winner_player_id')
+        if v is not None and v == info.data.get('winner_player_id'):
+            raise ValueError('loser_player_id must differ from winner_player_id')
+        return v
+
+class LeaderboardRow(BaseModel):
+    rank: int
+    player_id: int
+    first_name: Optional[str]
+    last_name: Optional[str]
+    rating: Optional[int]
+    wins: int
+    losses: int
+
+class UsageBucket(BaseModel):
+    bucket: datetime
+    bookings: int
+    booked_hours: float
+    sessions: int
+    session_hours: float
+    revenue: float
+    utilization: float
+    session_utilization: float
+
+class RoomUsage(BaseModel):
+    room_id: int
+    name: str
+    bookings: int
+    booked_hours: float
+    sessions: int
+    session_hours: float
+    revenue: float
+    utilization: float
 
 class StaffCreate(BaseModel):
     club_id: int
@@ -157,8 +204,7 @@ class StaffCreate(BaseModel):
 
 class StaffRead(StaffCreate):
     staff_id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class BookingCreate(BaseModel):
     player_id: int
@@ -167,16 +213,17 @@ class BookingCreate(BaseModel):
     end_time: datetime
     status: Optional[str] = 'pending'
 
-    @validator('end_time')
-    def end_after_start(cls, v, values):
-        if v and 'start_time' in values and v <= values['start_time']:
+    @field_validator('end_time')
+    @classmethod
+    def end_after_start(cls, v, info: ValidationInfo):
+        if v and 'start_time' in info.data and v <= info.data['start_time']:
             raise ValueError('end_time must be after start_time')
         return v
 
 class BookingRead(BookingCreate):
     booking_id: int
-    class Config:
-        orm_mode = True
+    hourly_rate: Optional[float] = None
+    model_config = ConfigDict(from_attributes=True)
 
 class ConfigKVCreate(BaseModel):
     config_key: str
@@ -184,8 +231,7 @@ class ConfigKVCreate(BaseModel):
     club_id: Optional[int]
 
 class ConfigKVRead(ConfigKVCreate):
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PriceKVCreate(BaseModel):
     price_key: str
@@ -193,12 +239,21 @@ class PriceKVCreate(BaseModel):
     currency: Optional[str] = 'RUB'
     club_id: Optional[int]
 
-    @validator('price_value')
+    @field_validator('price_value')
+    @classmethod
     def price_positive(cls, v):
         if v < 0:
             raise ValueError('price_value must be non-negative')
         return v
 
 class PriceKVRead(PriceKVCreate):
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class BulkItemError(BaseModel):
+    index: int
+    error: str
+
+class BulkResult(BaseModel):
+    succeeded: int
+    ids: List[Union[int, str]]
+    errors: List[BulkItemError]
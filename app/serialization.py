@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import List
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+JSON_MEDIA_TYPE = 'application/json'
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema):
+    return TypeAdapter(List[schema])
+
+
+def rows_response(schema, rows, response: Response = None, status_code: int = 200) -> Response:
+    """JSON response for ORM rows, byte-for-byte what ``response_model`` gives.
+
+    FastAPI's response_model pass validates the rows against ``schema``,
+    dumps them to Python, runs jsonable_encoder over that and encodes the
+    result. Here the same validation (so the same coercions: Decimal,
+    timezone-aware datetimes, ints in float fields) is followed by a single
+    pydantic-core dump_json, skipping the intermediate Python objects and
+    the jsonable_encoder walk. The route keeps its ``response_model`` for
+    the OpenAPI schema. Headers already set on the injected ``response``
+    (e.g. X-Next-After) are carried over.
+    """
+    adapter = _list_adapter(schema)
+    body = adapter.dump_json(adapter.validate_python(rows, from_attributes=True), by_alias=True)
+    return _response(body, response, status_code)
+
+
+def model_response(obj: BaseModel, response: Response = None, status_code: int = 200) -> Response:
+    """JSON response for an already validated pydantic model (e.g. a cached
+    read model), serialized by its compiled pydantic-core serializer."""
+    return _response(obj.model_dump_json(by_alias=True).encode('utf-8'), response, status_code)
+
+
+def _response(body: bytes, response, status_code):
+    out = Response(body, status_code=status_code, media_type=JSON_MEDIA_TYPE)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name != 'content-length':
+                out.headers.append(name, value)
+    return out
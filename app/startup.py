@@ -0,0 +1,247 @@
+import hashlib
+import importlib
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import inspect, insert, select, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateColumn
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from app import models
+from app.async_db import ASYNC_DB, wrap_routes
+from app.database import Base, _env_bool
+from app.metrics import forget_route_templates
+
+logger = logging.getLogger('colizeum')
+
+# skip create_all when the stored schema fingerprint matches, and import routers on first use
+FAST_START = _env_bool('FAST_START', False)
+SCHEMA_NAME = 'app'
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+class StartupTimer:
+    """Wall time of the named startup steps, for --profile-startup and the log."""
+    def __init__(self):
+        self.steps = []
+
+    @contextmanager
+    def step(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - started))
+
+
+startup_timer = StartupTimer()
+
+
+def schema_fingerprint(metadata) -> str:
+    """Hash of every table, column, foreign key and index ``metadata`` defines."""
+    parts = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        parts.append(f'table {table.name}')
+        for column in table.columns:
+            targets = ','.join(sorted(fk.target_fullname for fk in column.foreign_keys))
+            parts.append(f'  {column.name} {column.type!r} pk={column.primary_key} null={column.nullable} fk={targets}')
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            parts.append(f'  index {index.name} {",".join(c.name for c in index.columns)} unique={index.unique}')
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def ensure_schema(bind, fast: bool=FAST_START) -> str:
+    """Create missing tables, columns and indexes and record the schema fingerprint.
+
+    With ``fast`` the stored fingerprint is compared first (one SELECT) and
+    the reflection round trips of create_all are skipped when it matches.
+    Returns 'verified' or 'created'.
+    """
+    from app.indexes import ensure_indexes
+    from app.player_search import backfill_search_keys
+    fingerprint = schema_fingerprint(Base.metadata)
+    if fast:
+        with startup_timer.step('schema check'):
+            stored = _stored_fingerprint(bind)
+        if stored == fingerprint:
+            return 'verified'
+        logger.warning('Schema fingerprint differs from the database; creating missing tables and indexes')
+    with startup_timer.step('create_all'):
+        Base.metadata.create_all(bind=bind)
+    with startup_timer.step('ensure_columns'):
+        ensure_columns(bind)
+    with startup_timer.step('ensure_indexes'):
+        ensure_indexes(bind)
+    with startup_timer.step('backfill search keys'):
+        backfill_search_keys(bind)
+    _store_fingerprint(bind, fingerprint)
+    return 'created'
+
+
+def ensure_columns(bind) -> list:
+    """Add the nullable columns declared on the models but missing from
+    tables that existed before them (create_all skips existing tables).
+    Returns the added 'table.column' names."""
+    added = []
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        preparer = conn.dialect.identifier_preparer
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present or not column.nullable:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE {preparer.format_table(table)} ADD {ddl}'))
+                added.append(f'{table.name}.{column.name}')
+    if added:
+        logger.info(f"Added columns: {', '.join(added)}")
+    return added
+
+
+def _stored_fingerprint(bind):
+    table = models.SchemaVersion.__table__
+    try:
+        with bind.connect() as conn:
+            return conn.scalar(select(table.c.fingerprint).where(table.c.name == SCHEMA_NAME))
+    except DBAPIError:
+        # no SchemaVersion table yet
+        return None
+
+
+def _store_fingerprint(bind, fingerprint: str):
+    table = models.SchemaVersion.__table__
+    values = {'fingerprint': fingerprint, 'applied_at': datetime.utcnow()}
+    with bind.begin() as conn:
+        if not conn.execute(update(table).where(table.c.name == SCHEMA_NAME).values(**values)).rowcount:
+            conn.execute(insert(table).values(name=SCHEMA_NAME, **values))
+
+
+class LazyRouter(BaseRoute):
+    """Stands in for ``app.routers.<module>`` until the first request under
+    ``prefix``, then imports it and puts its routes in its own place."""
+    def __init__(self, app, prefix: str, module: str):
+        self.app = app
+        self.prefix = prefix
+        self.module = module
+        self.path = prefix
+        self.loaded = False
+
+    def matches(self, scope):
+        path = scope.get('path', '')
+        if scope['type'] in ('http', 'websocket') and (path == self.prefix or path.startswith(self.prefix + '/')):
+            return Match.FULL, {}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, **path_params):
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope, receive, send):
+        self.load()
+        await self.app.router(scope, receive, send)
+
+    def load(self):
+        with _load_lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            router = importlib.import_module(f'app.routers.{self.module}').router
+            routes = self.app.router.routes
+            count = len(routes)
+            self.app.include_router(router)
+            added = routes[count:]
+            del routes[count:]
+            if self in routes:
+                position = routes.index(self)
+                routes[position:position + 1] = added
+            if ASYNC_DB:
+                wrap_routes(added)
+            self.app.openapi_schema = None
+            forget_route_templates(self.app.router)
+            self.loaded = True
+            startup_timer.steps.append((f'router {self.module} (lazy)', time.perf_counter() - started))
+
+
+_load_lock = threading.RLock()
+
+
+def include_routers(app, routers: dict, lazy: bool=FAST_START):
+    """Add ``{prefix: module}`` routers from app.routers to ``app``, as
+    LazyRouter placeholders when ``lazy``; /openapi.json loads all of them."""
+    for prefix, module in routers.items():
+        if lazy:
+            app.router.routes.append(LazyRouter(app, prefix, module))
+        else:
+            with startup_timer.step(f'router {module}'):
+                app.include_router(importlib.import_module(f'app.routers.{module}').router)
+    if lazy:
+        build_openapi = app.openapi
+
+        def openapi():
+            load_all_routers(app)
+            return build_openapi()
+        app.openapi = openapi
+
+
+def load_all_routers(app):
+    for route in list(app.router.routes):
+        if isinstance(route, LazyRouter):
+            route.load()
+
+
+def import_times(target: str='app.main') -> list:
+    """(module, self seconds, cumulative seconds) for every module imported by
+    ``import target`` in a fresh interpreter (python -X importtime)."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+                            capture_output=True, text=True, cwd=root)
+    if result.returncode:
+        raise RuntimeError(f'import {target} failed:\n{result.stderr[-2000:]}')
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            own, cumulative, _, name = match.groups()
+            rows.append((name, int(own) / 1e6, int(cumulative) / 1e6))
+    return rows
+
+
+def profile_startup(app, top: int=15):
+    """Print where starting ``app`` goes: module imports, startup steps and
+    (in fast-start mode) the router imports deferred to first use."""
+    imports = import_times()
+    total = next((cumulative for name, _, cumulative in imports if name == 'app.main'), 0.0)
+    print(f'Startup profile (FAST_START={int(FAST_START)}, DB_ASYNC={int(ASYNC_DB)})')
+    print(f'\nimport app.main: {total * 1000:.0f} ms')
+    print(f'  {"app module":<32} {"self ms":>9} {"total ms":>9}')
+    for name, own, cumulative in sorted((r for r in imports if r[0].startswith('app.')), key=lambda r: -r[2]):
+        print(f'  {name:<32} {own * 1000:9.1f} {cumulative * 1000:9.1f}')
+    packages = sorted((r for r in imports if '.' not in r[0] and r[0] != 'app'), key=lambda r: -r[2])[:top]
+    print(f'  {"package (first import)":<32} {"":>9} {"total ms":>9}')
+    for name, _, cumulative in packages:
+        print(f'  {name:<32} {"":>9} {cumulative * 1000:9.1f}')
+
+    import asyncio
+    done = len(startup_timer.steps)
+    started = time.perf_counter()
+    asyncio.run(app.router.startup())
+    elapsed = time.perf_counter() - started
+    print(f'\nstartup handlers: {elapsed * 1000:.0f} ms')
+    for name, seconds in startup_timer.steps[done:]:
+        print(f'  {name:<32} {seconds * 1000:9.1f}')
+    if FAST_START:
+        done = len(startup_timer.steps)
+        started = time.perf_counter()
+        load_all_routers(app)
+        print(f'\ndeferred to first request: {(time.perf_counter() - started) * 1000:.0f} ms')
+        for name, seconds in sorted(startup_timer.steps[done:], key=lambda s: -s[1]):
+            print(f'  {name:<32} {seconds * 1000:9.1f}')
+    asyncio.run(app.router.shutdown())
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Dict, Iterable
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app import models
+
+def get_version(db: Session, name: str) -> int:
+    return db.scalar(select(models.ChangeVersion.version).where(models.ChangeVersion.name == name)) or 0
+
+
+def get_versions(db: Session, names: Iterable[str]) -> Dict[str, tuple]:
+    """{name: (version, updated_at)} for ``names``; unknown names are (0, None)."""
+    names = sorted(set(names))
+    rows = db.execute(
+        select(models.ChangeVersion.name, models.ChangeVersion.version, models.ChangeVersion.updated_at)
+        .where(models.ChangeVersion.name.in_(names))
+    ).all()
+    found = {name: (version, updated_at) for name, version, updated_at in rows}
+    return {name: found.get(name, (0, None)) for name in names}
+
+
+def bump_version(db: Session, name: str) -> None:
+    """Increment the change counter of ``name`` and commit."""
+    bump_versions(db.connection(), [name])
+    db.commit()
+
+
+def bump_versions(conn, names: Iterable[str]) -> None:
+    """Increment the change counters of ``names`` on ``conn`` (caller commits)."""
+    table = models.ChangeVersion.__table__
+    now = datetime.utcnow()
+    for name in sorted(set(names)):
+        stmt = update(table).where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+        if conn.execute(stmt).rowcount:
+            continue
+        try:
+            conn.execute(insert(table).values(name=name, version=1, updated_at=now))
+        except IntegrityError:
+            # another worker created the row first; increment it instead
+            conn.execute(stmt)
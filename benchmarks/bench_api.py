@@ -0,0 +1,137 @@
+"""Throughput and latency of the main API endpoints on seeded data.
+
+Usage: python -m benchmarks.bench_api [scale] [requests] [concurrency]   (default: small 300 16)
+
+Runs in its own interpreter against a fresh SQLite file seeded by
+benchmarks.seed, driving the app in-process through an ASGI client
+(startup and shutdown handlers included). Each endpoint gets ``requests``
+requests with ``concurrency`` in flight, after a short warm-up; prints
+requests/s and p50/p95/p99 latency per endpoint. DB_ASYNC and FAST_START
+are passed through to the app.
+"""
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from benchmarks.results import summarize
+
+WARMUP = 10
+
+
+def endpoints(counts, window):
+    """(name, method, request builder) per benchmarked endpoint; the builder
+    turns the request number and a seeded Random into (path, params, body)."""
+    first, last = window
+    day = (first + (last - first) / 2).replace(hour=0, minute=0)
+    # bookings created during the run start after every seeded one
+    future = last + timedelta(days=30)
+
+    def player(rng):
+        return rng.randint(1, counts['players'])
+
+    def room(rng):
+        return rng.randint(1, counts['rooms'])
+
+    def club(rng):
+        return rng.randint(1, counts['clubs'])
+
+    return [
+        ('GET /clubs/', 'GET', lambda i, rng: ('/clubs/', None, None)),
+        ('GET /players/', 'GET', lambda i, rng: ('/players/', {'limit': 50, 'after': player(rng)}, None)),
+        ('GET /players/{id}', 'GET', lambda i, rng: (f'/players/{player(rng)}', None, None)),
+        ('GET /players/search', 'GET', lambda i, rng: ('/players/search', {'q': rng.choice(('Iv', 'Pet', 'Smi', 'Vol')), 'limit': 20}, None)),
+        ('GET /players/{id}/bookings', 'GET', lambda i, rng: (f'/players/{player(rng)}/bookings', None, None)),
+        ('GET /rooms/{id}', 'GET', lambda i, rng: (f'/rooms/{room(rng)}', None, None)),
+        ('GET /rooms/availability', 'GET', lambda i, rng: ('/rooms/availability', {'from': day.isoformat(), 'to': (day + timedelta(days=7)).isoformat(), 'club_id': club(rng)}, None)),
+        ('GET /bookings/', 'GET', lambda i, rng: ('/bookings/', {'limit': 100, 'room_id': room(rng)}, None)),
+        ('GET /bookings/{id}', 'GET', lambda i, rng: (f'/bookings/{rng.randint(1, counts["bookings"])}', None, None)),
+        ('GET /analytics/rooms/{id}', 'GET', lambda i, rng: (f'/analytics/rooms/{room(rng)}', {'grain': 'hour', 'from': day.isoformat(), 'to': (day + timedelta(days=2)).isoformat()}, None)),
+        ('GET /analytics/clubs/{id}', 'GET', lambda i, rng: (f'/analytics/clubs/{club(rng)}', {'grain': 'day', 'from': first.isoformat(), 'to': last.isoformat()}, None)),
+        ('POST /players/', 'POST', lambda i, rng: ('/players/', None, {'first_name': 'Bench', 'last_name': f'Player{i}', 'email': f'bench{i}@example.com'})),
+        ('POST /bookings/', 'POST', lambda i, rng: ('/bookings/', None, {
+            'player_id': player(rng), 'room_id': 1 + i % counts['rooms'],
+            'start_time': (future + timedelta(hours=2 * (i // counts['rooms']))).isoformat(),
+            'end_time': (future + timedelta(hours=2 * (i // counts['rooms']) + 1)).isoformat()})),
+    ]
+
+
+async def drive(scale, total, concurrency):
+    import httpx
+    from app.database import engine
+    from app.main import app
+    from benchmarks.seed import booking_window, seed
+
+    await app.router.startup()
+    try:
+        counts = seed(engine, scale)
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            number = 0
+            for name, method, build in endpoints(counts, booking_window(counts)):
+                rng = random.Random(name)
+                latencies, statuses = [], {}
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def one(i, timed=True):
+                    path, params, body = build(i, rng)
+                    async with semaphore:
+                        started = time.perf_counter()
+                        response = await client.request(method, path, params=params, json=body)
+                        if timed:
+                            latencies.append(time.perf_counter() - started)
+                            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+                # request numbers keep growing across endpoints, so created rows never collide
+                await asyncio.gather(*(one(number + i, False) for i in range(WARMUP)))
+                number += WARMUP
+                started = time.perf_counter()
+                await asyncio.gather(*(one(number + i) for i in range(total)))
+                results[name] = summarize(latencies, time.perf_counter() - started, statuses)
+                number += total
+    finally:
+        await app.router.shutdown()
+    return {'seed': counts, 'endpoints': results}
+
+
+def run(scale='small', total=300, concurrency=16):
+    """Run the benchmark in a child interpreter (the database URL is fixed
+    at import time) and return its results."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        # the child runs in the scratch directory so api.log and the slow query log stay out of the tree
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                   PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+        env.pop('ASYNC_DATABASE_URL', None)
+        child = subprocess.run([sys.executable, '-m', 'benchmarks.bench_api', '--child', scale, str(total), str(concurrency)],
+                               env=env, capture_output=True, text=True, cwd=tmp)
+    if child.returncode:
+        raise RuntimeError(f'API benchmark failed:\n{child.stderr[-3000:]}')
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def print_results(results):
+    print(f"{'endpoint':<30} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, r in results.items():
+        print(f"{name:<30} {r['rps']:>8.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>7}")
+
+
+def main(argv):
+    if argv and argv[0] == '--child':
+        scale, total, concurrency = argv[1], int(argv[2]), int(argv[3])
+        print(json.dumps(asyncio.run(drive(scale, total, concurrency))))
+        return
+    scale = argv[0] if argv else 'small'
+    total, concurrency = ([int(a) for a in argv[1:3]] + [300, 16][len(argv[1:3]):])[:2]
+    result = run(scale, total, concurrency)
+    print(f"seed: {result['seed']}")
+    print_results(result['endpoints'])
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
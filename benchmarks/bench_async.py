@@ -0,0 +1,92 @@
+"""Compare the sync (threadpool) and async (DB_ASYNC=1) database stacks.
+
+Usage: python -m benchmarks.bench_async [requests] [concurrency] [players]   (default: 2000 64 1000)
+
+Each mode runs in its own interpreter (the mode is fixed at import time)
+against a fresh SQLite file, driving the app in-process through an ASGI
+client with ``concurrency`` requests in flight: 45% player lists, 45%
+single players, 10% player creates. Prints requests/s and p50/p99 latency.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = [('sync', '0'), ('async', '1')]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def drive(total, concurrency, players):
+    import httpx
+    from app.async_db import dispose_async_engine
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+    from app import models
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.add_all([models.Player(first_name=f'First{i}', last_name=f'Last{i}', email=f'player{i}@example.com') for i in range(players)])
+        db.commit()
+
+    def request(client, i):
+        if i % 10 == 9:
+            return client.post('/players/', json={'first_name': 'New', 'last_name': 'Player', 'email': f'new{i}@example.com'})
+        if i % 2:
+            return client.get(f'/players/{1 + i % players}')
+        return client.get('/players/', params={'limit': 50, 'after': i % players})
+
+    latencies, statuses = [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        async def one(i):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await request(client, i)
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+    await dispose_async_engine()
+    return {
+        'requests': total,
+        'seconds': round(elapsed, 3),
+        'rps': round(total / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'statuses': statuses,
+    }
+
+
+def run_mode(flag, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DB_ASYNC=flag, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        env.pop('ASYNC_DATABASE_URL', None)
+        out = subprocess.run([sys.executable, '-m', 'benchmarks.bench_async', '--child', *args],
+                             env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv):
+    if argv and argv[0] == '--child':
+        total, concurrency, players = (int(a) for a in argv[1:])
+        print(json.dumps(asyncio.run(drive(total, concurrency, players))))
+        return
+    args = [str(a) for a in ([int(a) for a in argv] + [2000, 64, 1000][len(argv):])[:3]]
+    print(f"{'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}  statuses")
+    for name, flag in MODES:
+        r = run_mode(flag, args)
+        print(f"{name:<6} {r['rps']:>8.1f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}  {r['statuses']}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,132 @@
+"""Time the ETL stages (extract, transform, load) on generated player files.
+
+Usage: python -m benchmarks.bench_etl [rows] [formats]   (default: 50000 csv,xlsx)
+
+Writes ``rows`` synthetic players (a few percent invalid) as each format and
+runs them through the pipeline's DataExtractor, DataTransformer and
+DataLoader with the settings of config/etl_config.py, loading into a fresh
+SQLite file per format. The manifest is left out: it only filters rows
+that were already ingested. XLSX needs openpyxl; without it the format is
+reported as skipped.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.etl.extractors import DataExtractor
+from app.etl.loaders import DataLoader
+from app.etl.transformers import DataTransformer
+from config import etl_config
+
+ROWS = 50_000
+FORMATS = ['csv', 'xlsx']
+SEED = 20240101
+INVALID_SHARE = 0.05
+
+
+def make_players(n):
+    """Player rows as they arrive in the input files (spreadsheet-style headers)."""
+    rng = random.Random(SEED)
+    rows = []
+    for i in range(n):
+        row = {'First Name': f'First{i}', 'Last Name': f'Last{i}', 'E-mail': f'player{i}@example.com',
+               'Rating': rng.randint(800, 2400), 'Phone': f'+7 900 {i % 10_000_000:07d}', 'DOB': f'{1980 + i % 25}-{1 + i % 12:02d}-{1 + i % 28:02d}'}
+        if rng.random() < INVALID_SHARE:
+            broken = rng.choice(('E-mail', 'Last Name', 'Rating'))
+            row[broken] = {'E-mail': f'player{i}.example.com', 'Last Name': None, 'Rating': -1}[broken]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def write_input(df, directory: Path, fmt: str) -> Path:
+    path = directory / f'players.{fmt}'
+    if fmt == 'csv':
+        df.to_csv(path, index=False)
+    elif fmt == 'xlsx':
+        df.to_excel(path, index=False)
+    else:
+        raise ValueError(f'unsupported format {fmt!r}')
+    return path
+
+
+def run_stages(path: Path, url: str, work: Path) -> dict:
+    engine = create_engine(url, future=True)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, autoflush=False, future=True)()
+    extractor = DataExtractor(path.parent)
+    transformer = DataTransformer()
+    loader = DataLoader(db_session=db, output_dir=str(work / 'output'), errors_dir=str(work / 'errors'),
+                        use_core=etl_config.USE_CORE_INSERT, commit_per_file=etl_config.COMMIT_PER_FILE, upsert=etl_config.UPSERT)
+    try:
+        started = time.perf_counter()
+        if etl_config.CHUNK_SIZE:
+            frames = [df for df, _ in extractor.iter_extract(path, etl_config.CHUNK_SIZE)]
+        else:
+            frames = [extractor.extract(path)[0]]
+        extracted = time.perf_counter()
+        transformed = [transformer.transform_players(df) for df in frames]
+        transform_done = time.perf_counter()
+        created = invalid = 0
+        for valid_df, invalid_df in transformed:
+            if not valid_df.empty:
+                created += loader.bulk_insert_players(valid_df.to_dict(orient='records'))
+            if not invalid_df.empty:
+                loader.save_errors(invalid_df, path.stem, append=invalid > 0)
+                invalid += len(invalid_df)
+        loaded = time.perf_counter()
+    finally:
+        db.close()
+        engine.dispose()
+    rows = sum(len(df) for df in frames)
+    return {
+        'rows': rows,
+        'created': created,
+        'invalid': invalid,
+        'file_mb': round(path.stat().st_size / 2**20, 2),
+        'extract_s': round(extracted - started, 3),
+        'transform_s': round(transform_done - extracted, 3),
+        'load_s': round(loaded - transform_done, 3),
+        'total_s': round(loaded - started, 3),
+        'rows_per_s': round(rows / (loaded - started), 1),
+    }
+
+
+def run(rows=ROWS, formats=FORMATS) -> dict:
+    df = make_players(rows)
+    results = {}
+    for fmt in formats:
+        with tempfile.TemporaryDirectory() as tmp:
+            work = Path(tmp)
+            (work / 'input').mkdir()
+            try:
+                path = write_input(df, work / 'input', fmt)
+            except ImportError as e:
+                results[fmt] = {'skipped': str(e)}
+                continue
+            results[fmt] = run_stages(path, f"sqlite:///{os.path.join(tmp, 'bench_etl.db')}", work)
+    return results
+
+
+def print_results(results):
+    print(f"{'format':<6} {'rows':>9} {'MB':>7} {'extract s':>10} {'transform s':>12} {'load s':>8} {'rows/s':>10}")
+    for fmt, r in results.items():
+        if 'skipped' in r:
+            print(f"{fmt:<6} skipped: {r['skipped']}")
+            continue
+        print(f"{fmt:<6} {r['rows']:>9} {r['file_mb']:>7.2f} {r['extract_s']:>10.2f} {r['transform_s']:>12.2f} {r['load_s']:>8.2f} {r['rows_per_s']:>10.0f}")
+
+
+def main(argv):
+    rows = int(argv[0]) if argv else ROWS
+    formats = argv[1].split(',') if len(argv) > 1 else FORMATS
+    print_results(run(rows, formats))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,62 @@
+"""Compare DataLoader insert paths: ORM objects vs Core executemany.
+
+Usage: python -m benchmarks.bench_loader [rows ...]   (default: 10000 100000 1000000)
+
+Each run uses a fresh SQLite file so the numbers are comparable; point
+BENCH_DATABASE_URL at another database to benchmark it instead (the Player
+table is dropped and recreated there).
+"""
+import os
+import sys
+import tempfile
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import models
+from app.etl.loaders import DataLoader
+
+SIZES = [10_000, 100_000, 1_000_000]
+MODES = [
+    ('orm', dict(use_core=False)),
+    ('core', dict(use_core=True)),
+    ('core/commit-per-file', dict(use_core=True, commit_per_file=True)),
+]
+
+
+def make_records(n):
+    return [{'first_name': f'First{i}', 'last_name': f'Last{i}', 'email': f'player{i}@example.com', 'rating': 1000 + i % 800} for i in range(n)]
+
+
+def run_once(url, records, options):
+    engine = create_engine(url, future=True)
+    models.Player.__table__.drop(engine, checkfirst=True)
+    models.Player.__table__.create(engine)
+    db = sessionmaker(bind=engine, autoflush=False, future=True)()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            loader = DataLoader(db_session=db, output_dir=tmp, errors_dir=tmp, **options)
+            started = time.perf_counter()
+            with loader.file_transaction():
+                created = loader.bulk_insert_players(records)
+            elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+        engine.dispose()
+    assert created == len(records)
+    return elapsed
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or SIZES
+    with tempfile.TemporaryDirectory() as tmp:
+        url = os.getenv('BENCH_DATABASE_URL') or f'sqlite:///{tmp}/bench_loader.db'
+        print(f'{"rows":>10} {"mode":<22} {"seconds":>9} {"rows/s":>12}')
+        for n in sizes:
+            records = make_records(n)
+            for name, options in MODES:
+                elapsed = run_once(url, records, options)
+                print(f'{n:>10} {name:<22} {elapsed:>9.2f} {n / elapsed:>12.0f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,158 @@
+"""Latency of GET /players/search on a large player table.
+
+Usage: python -m benchmarks.bench_search [players] [requests]   (default: 1000000 300)
+
+Runs in its own interpreter against a fresh SQLite file: inserts
+``players`` synthetic players (Latin and Cyrillic names, a fixed random
+seed), creates the schema and its indexes, builds the trigram index and
+times ``requests`` sequential requests per query kind through the app
+(in-process ASGI client, so routing, the ETag dependency and
+serialization count).
+Prints p50/p95/p99 per kind, for search_players() itself and for the
+whole request (with GET /clubs/ as the floor every request pays);
+``fuzzy`` queries have typos and fall back to the trigram index.
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.results import summarize
+
+PLAYERS = 1_000_000
+REQUESTS = 300
+SEED = 20240101
+BATCH = 20_000
+FIRST_NAMES = ['Ivan', 'Anna', 'Oleg', 'Maria', 'Pavel', 'Elena', 'Dmitry', 'Olga', 'Sergey', 'Irina', 'Alexey', 'Natalia',
+               'Иван', 'Анна', 'Олег', 'Мария', 'Павел', 'Елена', 'Дмитрий', 'Ольга', 'Сергей', 'Ирина', 'Алексей', 'Пётр']
+LAST_NAMES = ['Ivanov', 'Petrova', 'Sidorov', 'Smirnova', 'Kuznetsov', 'Popova', 'Volkov', 'Sokolova', 'Morozov', 'Lebedeva',
+              'Иванов', 'Петрова', 'Сидоров', 'Смирнова', 'Кузнецов', 'Попова', 'Волков', 'Соколова', 'Морозов', 'Ёлкина']
+QUERIES = {
+    'short prefix': ['Iv', 'Пе', 'sm', 'ol', 'Вол', 'ма'],
+    'long prefix': ['Kuznetsov12', 'Соколова45', 'Lebedeva7', 'Морозов33'],
+    'two tokens': ['ivan petrova1', 'Анна Сок', 'olga vol', 'Пётр Ёлк'],
+    'email': ['player12345', 'player9', 'player77777@ex'],
+    'fuzzy': ['Kuzentsov123', 'Smirnvoa456', 'Сокалова789', 'Lebdeva321'],
+}
+
+
+def seed_players(n):
+    from sqlalchemy import insert
+    from app import models
+    from app.database import engine
+    rng = random.Random(SEED)
+    with engine.begin() as conn:
+        for start in range(1, n + 1, BATCH):
+            rows = []
+            for p in range(start, min(start + BATCH, n + 1)):
+                row = {'player_id': p, 'first_name': rng.choice(FIRST_NAMES), 'last_name': f'{rng.choice(LAST_NAMES)}{rng.randint(1, 99999)}',
+                       'email': f'player{p}@example.com', 'rating': 1000}
+                rows.append({**row, **models.search_keys(row)})
+            conn.execute(insert(models.Player), rows)
+
+
+async def drive(total):
+    import httpx
+    from app.main import app
+    results = {}
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            # the same stack on a trivial endpoint: what every request costs regardless of the search
+            for _ in range(10):
+                await client.get('/clubs/')
+            latencies = []
+            begun = time.perf_counter()
+            for _ in range(total):
+                sent = time.perf_counter()
+                await client.get('/clubs/')
+                latencies.append(time.perf_counter() - sent)
+            results['GET /clubs/ (floor)'] = summarize(latencies, time.perf_counter() - begun, {})
+            for kind, queries in QUERIES.items():
+                rng = random.Random(kind)
+                for q in queries:
+                    await client.get('/players/search', params={'q': q})
+                latencies, statuses = [], {}
+                begun = time.perf_counter()
+                for _ in range(total):
+                    sent = time.perf_counter()
+                    response = await client.get('/players/search', params={'q': rng.choice(queries), 'limit': 20})
+                    latencies.append(time.perf_counter() - sent)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                results[kind] = summarize(latencies, time.perf_counter() - begun, statuses)
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def direct(total):
+    """search_players itself, without the HTTP stack."""
+    from app.database import SessionLocal
+    from app.player_search import search_players
+    results = {}
+    with SessionLocal() as db:
+        for kind, queries in QUERIES.items():
+            rng = random.Random(kind)
+            for q in queries:
+                search_players(db, q, 20, True)
+            latencies = []
+            begun = time.perf_counter()
+            for _ in range(total):
+                q = rng.choice(queries)
+                sent = time.perf_counter()
+                search_players(db, q, 20, True)
+                latencies.append(time.perf_counter() - sent)
+            results[kind] = summarize(latencies, time.perf_counter() - begun, {})
+    return results
+
+
+def child(players, total):
+    import asyncio
+    from app.database import engine
+    from app.player_search import trigram_index
+    from app.startup import ensure_schema
+    started = time.perf_counter()
+    ensure_schema(engine, fast=False)
+    seed_players(players)
+    seeded = time.perf_counter()
+    trigram_index.build()
+    built = time.perf_counter()
+    return {'players': players, 'seed_s': round(seeded - started, 1), 'trigram_build_s': round(built - seeded, 1),
+            'search': direct(total), 'http': asyncio.run(drive(total))}
+
+
+def run(players=PLAYERS, total=REQUESTS):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'search.db')}", PLAYER_SEARCH_TRIGRAMS='0',
+                   PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+        env.pop('ASYNC_DATABASE_URL', None)
+        proc = subprocess.run([sys.executable, '-m', 'benchmarks.bench_search', '--child', str(players), str(total)],
+                              env=env, capture_output=True, text=True, cwd=tmp)
+    if proc.returncode:
+        raise RuntimeError(f'search benchmark failed:\n{proc.stderr[-3000:]}')
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_results(result):
+    print(f"{result['players']} players (seeded in {result['seed_s']}s, trigram index built in {result['trigram_build_s']}s)")
+    for title, section in (('search_players()', 'search'), ('GET /players/search', 'http')):
+        print(f"\n{title:<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for kind, r in result[section].items():
+            print(f"{kind:<22} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>7}")
+
+
+def main(argv):
+    if argv and argv[0] == '--child':
+        print(json.dumps(child(int(argv[1]), int(argv[2]))))
+        return
+    players = int(argv[0]) if argv else PLAYERS
+    total = int(argv[1]) if len(argv) > 1 else REQUESTS
+    print_results(run(players, total))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+"""Serialization cost of a page of bookings: response_model vs rows_response.
+
+Usage: python -m benchmarks.bench_serialization [rows] [repeats]   (default: 1000 200)
+
+Builds ``rows`` Booking ORM instances in memory (no database) and times,
+per page, FastAPI's response_model pass (validate, dump, jsonable_encoder,
+ORJSONResponse) against app.serialization.rows_response. Both bodies are
+checked to be identical first. Prints the median milliseconds per page.
+"""
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app import models, schemas
+from app.serialization import rows_response
+
+ROWS = 1000
+REPEATS = 200
+START = datetime(2024, 1, 1, 10, 0)
+
+
+def make_bookings(n):
+    return [models.Booking(booking_id=i, player_id=1 + i % 500, room_id=1 + i % 40, start_time=START + timedelta(hours=i),
+                           end_time=START + timedelta(hours=i + 2), status='confirmed', hourly_rate=500.0)
+            for i in range(1, n + 1)]
+
+
+def response_model_body(loop, field, rows) -> bytes:
+    content = loop.run_until_complete(serialize_response(field=field, response_content=rows, is_coroutine=False))
+    return ORJSONResponse(jsonable_encoder(content)).body
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def run(rows=ROWS, repeats=REPEATS) -> dict:
+    bookings = make_bookings(rows)
+    field = create_response_field(name='bench', type_=list[schemas.BookingRead])
+    loop = asyncio.new_event_loop()
+    try:
+        if response_model_body(loop, field, bookings) != rows_response(schemas.BookingRead, bookings).body:
+            raise AssertionError('rows_response and response_model bodies differ')
+        return {
+            'rows': rows,
+            'response_model_ms': round(timed(lambda: response_model_body(loop, field, bookings), repeats), 3),
+            'rows_response_ms': round(timed(lambda: rows_response(schemas.BookingRead, bookings), repeats), 3),
+        }
+    finally:
+        loop.close()
+
+
+def main(argv):
+    rows = int(argv[0]) if argv else ROWS
+    repeats = int(argv[1]) if len(argv) > 1 else REPEATS
+    result = run(rows, repeats)
+    print(f"{result['rows']} bookings: response_model {result['response_model_ms']:.2f} ms, "
+          f"rows_response {result['rows_response_ms']:.2f} ms per page")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,69 @@
+"""Concurrent booking load test: fire many overlapping POST /bookings/ at once
+and check that no two active bookings of a room overlap afterwards.
+
+Usage: python -m benchmarks.load_bookings [requests] [threads] [rooms]   (default: 400 64 4)
+
+Runs the app in-process against DATABASE_URL (use a scratch SQLite file);
+exits non-zero if any double booking slipped through.
+"""
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import aliased
+from app.database import SessionLocal
+from app.main import app
+from app import models
+
+DAY = datetime(2030, 1, 1, 10, 0)
+
+
+def seed(client, rooms):
+    club = client.post('/clubs/', json={'name': 'Load test club'}).json()
+    arena = client.post('/arenas/', json={'club_id': club['club_id'], 'name': 'Arena', 'capacity': 100, 'address': None}).json()
+    room_ids = [client.post('/rooms/', json={'arena_id': arena['arena_id'], 'name': f'Room {i}'}).json()['room_id'] for i in range(rooms)]
+    player = client.post('/players/', json={'first_name': 'Load', 'last_name': 'Test', 'email': f'load{time.time_ns()}@example.com'}).json()
+    return room_ids, player['player_id']
+
+
+def count_overlaps(room_ids):
+    a, b = aliased(models.Booking), aliased(models.Booking)
+    stmt = select(func.count()).select_from(a).join(b, and_(
+        a.room_id == b.room_id,
+        a.booking_id < b.booking_id,
+        a.start_time < b.end_time,
+        b.start_time < a.end_time,
+        a.status != 'cancelled',
+        b.status != 'cancelled',
+    )).where(a.room_id.in_(room_ids))
+    with SessionLocal() as db:
+        return db.scalar(stmt)
+
+
+def main(argv):
+    total, threads, rooms = ([int(a) for a in argv] + [400, 64, 4][len(argv):])[:3]
+    with TestClient(app) as client:
+        room_ids, player_id = seed(client, rooms)
+
+        def book(i):
+            # every request overlaps several others in the same room
+            start = DAY + timedelta(minutes=15 * (i % 8))
+            payload = {'player_id': player_id, 'room_id': room_ids[i % rooms],
+                       'start_time': start.isoformat(), 'end_time': (start + timedelta(hours=1)).isoformat()}
+            return client.post('/bookings/', json=payload).status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = Counter(pool.map(book, range(total)))
+        elapsed = time.perf_counter() - started
+    overlaps = count_overlaps(room_ids)
+    print(f'{total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s), statuses: {dict(statuses)}, overlaps: {overlaps}')
+    if overlaps:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
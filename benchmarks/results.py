@@ -0,0 +1,85 @@
+"""Result files of the benchmark suite and their comparison against a baseline.
+
+A result file is JSON: ``{"meta": {...}, "api": {endpoint: metrics},
+"etl": {format: metrics}}``. Metrics ending in ``_ms`` or ``_s`` are
+durations (lower is better); ``rps`` and ``rows_per_s`` are throughput
+(higher is better); everything else is informational.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+THROUGHPUT = ('rps', 'rows_per_s')
+# relative slowdown reported as a regression
+DEFAULT_THRESHOLD = 0.15
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def summarize(latencies, elapsed, statuses) -> dict:
+    """Throughput and latency percentiles of one endpoint run."""
+    return {
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'errors': sum(n for status, n in statuses.items() if int(status) >= 400),
+        'statuses': statuses,
+    }
+
+
+def meta(**params) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'created': datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+            'python': sys.version.split()[0], 'platform': platform.platform(), 'params': params}
+
+
+def save(path, results: dict):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load(path) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(current: dict, baseline: dict, threshold: float=DEFAULT_THRESHOLD) -> list:
+    """(section, name, metric, baseline, current, change, regressed) for every
+    duration and throughput metric present in both runs. ``change`` is the
+    relative slowdown: positive is worse whichever way the metric points."""
+    rows = []
+    for section in ('api', 'etl'):
+        for name, metrics in current.get(section, {}).items():
+            old = baseline.get(section, {}).get(name, {})
+            for metric, value in metrics.items():
+                before = old.get(metric)
+                if not isinstance(value, (int, float)) or not isinstance(before, (int, float)) or not before or not value:
+                    continue
+                if metric in THROUGHPUT:
+                    change = before / value - 1
+                elif metric.endswith(('_ms', '_s')):
+                    change = value / before - 1
+                else:
+                    continue
+                rows.append((section, name, metric, before, value, change, change > threshold))
+    return rows
+
+
+def print_comparison(rows):
+    print(f"{'section':<5} {'name':<34} {'metric':<12} {'baseline':>10} {'current':>10} {'slower':>8}")
+    for section, name, metric, before, value, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{section:<5} {name:<34} {metric:<12} {before:>10.2f} {value:>10.2f} {change:>+8.1%}{flag}')
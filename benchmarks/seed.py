@@ -0,0 +1,102 @@
+"""Synthetic data for the benchmarks: clubs, arenas, rooms, players and bookings.
+
+Usage: python -m benchmarks.seed [scale]   (default: small; scales: small, medium, large)
+
+Seeds DATABASE_URL (use a scratch SQLite file). Rows get consecutive ids
+starting at 1 and come from a fixed random seed, so every run of a scale
+produces the same data. Bookings of a room never overlap; about one in ten
+is cancelled. The analytics rollups are compacted afterwards.
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app import models
+
+SCALES = {
+    # clubs, arenas per club, rooms per arena, players, bookings
+    'small': dict(clubs=2, arenas=2, rooms=4, players=2_000, bookings=10_000),
+    'medium': dict(clubs=5, arenas=3, rooms=6, players=20_000, bookings=100_000),
+    'large': dict(clubs=20, arenas=4, rooms=8, players=200_000, bookings=1_000_000),
+}
+SEED = 20240101
+FIRST_DAY = datetime(2024, 1, 1, 10, 0)
+ROOM_TYPES = ['standard', 'vip', 'bootcamp']
+HOURLY_PRICE = 300.0
+BATCH = 10_000
+FIRST_NAMES = ['Ivan', 'Anna', 'Oleg', 'Maria', 'Pavel', 'Elena', 'Dmitry', 'Olga', 'Sergey', 'Irina', 'Alexey', 'Natalia']
+LAST_NAMES = ['Ivanov', 'Petrova', 'Sidorov', 'Smirnova', 'Kuznetsov', 'Popova', 'Volkov', 'Sokolova', 'Morozov', 'Lebedeva']
+
+
+def sizes(scale: str) -> dict:
+    try:
+        params = SCALES[scale]
+    except KeyError:
+        raise ValueError(f"unknown scale {scale!r}, expected one of {', '.join(SCALES)}")
+    arenas = params['clubs'] * params['arenas']
+    return {'clubs': params['clubs'], 'arenas': arenas, 'rooms': arenas * params['rooms'],
+            'players': params['players'], 'bookings': params['bookings']}
+
+
+def booking_window(counts: dict):
+    """[first, last) start times the seeded bookings span."""
+    per_room = -(-counts['bookings'] // counts['rooms'])
+    return FIRST_DAY, FIRST_DAY + timedelta(hours=3 * per_room)
+
+
+def seed(engine, scale: str='small') -> dict:
+    """Insert a ``scale`` data set into the (empty) tables behind ``engine``
+    and compact the analytics rollups. Returns the row counts."""
+    from app.analytics import compact
+    from app.database import SessionLocal
+    from app.pricing import PRICE_KEY
+    counts = sizes(scale)
+    per_club = counts['arenas'] // counts['clubs']
+    per_arena = counts['rooms'] // counts['arenas']
+    rng = random.Random(SEED)
+    started = time.perf_counter()
+    # plain connection: no session events, so seeding does not trigger the background compaction
+    with engine.begin() as conn:
+        conn.execute(insert(models.Club), [
+            {'club_id': c, 'name': f'Club {c}', 'city': f'City {c % 7}', 'address': f'{c} Main street'}
+            for c in range(1, counts['clubs'] + 1)])
+        conn.execute(insert(models.Arena), [
+            {'arena_id': a, 'club_id': 1 + (a - 1) // per_club, 'name': f'Arena {a}', 'capacity': 50, 'address': None}
+            for a in range(1, counts['arenas'] + 1)])
+        conn.execute(insert(models.Room), [
+            {'room_id': r, 'arena_id': 1 + (r - 1) // per_arena, 'name': f'Room {r}',
+             'room_type': ROOM_TYPES[r % len(ROOM_TYPES)], 'max_players': 10}
+            for r in range(1, counts['rooms'] + 1)])
+        conn.execute(insert(models.PriceKV), [{'price_key': PRICE_KEY, 'price_value': HOURLY_PRICE, 'currency': 'RUB', 'club_id': None}])
+        for start in range(1, counts['players'] + 1, BATCH):
+            conn.execute(insert(models.Player), [
+                {'player_id': p, 'first_name': rng.choice(FIRST_NAMES), 'last_name': f'{rng.choice(LAST_NAMES)}{p}',
+                 'email': f'player{p}@example.com', 'rating': 1000}
+                for p in range(start, min(start + BATCH, counts['players'] + 1))])
+        # room r gets every rooms-th booking: a 1-3 hour slot every 3 hours from FIRST_DAY
+        for start in range(1, counts['bookings'] + 1, BATCH):
+            rows = []
+            for b in range(start, min(start + BATCH, counts['bookings'] + 1)):
+                slot, room = divmod(b - 1, counts['rooms'])
+                begins = FIRST_DAY + timedelta(hours=3 * slot)
+                rows.append({'booking_id': b, 'player_id': rng.randint(1, counts['players']), 'room_id': room + 1,
+                             'start_time': begins, 'end_time': begins + timedelta(minutes=rng.choice((60, 90, 120, 180))),
+                             'status': 'cancelled' if rng.random() < 0.1 else 'confirmed', 'hourly_rate': HOURLY_PRICE})
+            conn.execute(insert(models.Booking), rows)
+    with SessionLocal() as db:
+        compact(db)
+    return {**counts, 'seconds': round(time.perf_counter() - started, 2)}
+
+
+def main(argv):
+    from app.database import Base, engine
+    from app.indexes import ensure_indexes
+    scale = argv[0] if argv else 'small'
+    Base.metadata.create_all(engine)
+    ensure_indexes(engine)
+    print(seed(engine, scale))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
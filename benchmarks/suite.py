@@ -0,0 +1,82 @@
+"""Run the API and ETL benchmarks, save the results and compare them with a baseline.
+
+Usage: python -m benchmarks.suite [--scale small|medium|large] [--requests N] [--concurrency N]
+                                  [--etl-rows N] [--formats csv,xlsx] [--skip-api] [--skip-etl]
+                                  [--out FILE] [--baseline FILE] [--threshold 0.15]
+
+Results go to ``--out`` (default: benchmarks/results/<timestamp>.json).
+With ``--baseline`` every duration and throughput metric is compared with
+the baseline run and the command exits with status 1 when any of them got
+more than ``--threshold`` (relative) worse, so a saved run on the main
+branch can gate a change. Compare runs made on the same machine and scale.
+
+Every benchmark runs on scratch SQLite files of its own. ``app`` still
+builds its engine at import, so without the ODBC driver installed set
+DATABASE_URL to any SQLite URL (e.g. sqlite:///import.db) to run the suite.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+from benchmarks import bench_api, bench_etl
+from benchmarks.results import DEFAULT_THRESHOLD, compare, load, meta, print_comparison, save
+from benchmarks.seed import SCALES
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite', description='API and ETL benchmarks')
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--requests', type=int, default=300, help='timed requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--etl-rows', type=int, default=bench_etl.ROWS)
+    parser.add_argument('--formats', default=','.join(bench_etl.FORMATS))
+    parser.add_argument('--skip-api', action='store_true')
+    parser.add_argument('--skip-etl', action='store_true')
+    parser.add_argument('--out')
+    parser.add_argument('--baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    formats = args.formats.split(',')
+    results = {'meta': meta(scale=args.scale, requests=args.requests, concurrency=args.concurrency,
+                            etl_rows=args.etl_rows, formats=formats,
+                            db_async=os.getenv('DB_ASYNC', ''), fast_start=os.getenv('FAST_START', ''))}
+    if not args.skip_api:
+        api = bench_api.run(args.scale, args.requests, args.concurrency)
+        results['meta']['seed'] = api['seed']
+        results['api'] = api['endpoints']
+        bench_api.print_results(results['api'])
+    if not args.skip_etl:
+        results['etl'] = bench_etl.run(args.etl_rows, formats)
+        print()
+        bench_etl.print_results(results['etl'])
+
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    save(out, results)
+    print(f'\nresults saved to {out}')
+
+    if args.baseline:
+        baseline = load(args.baseline)
+        base_meta = baseline.get('meta', {})
+        base_scale = base_meta.get('params', {}).get('scale')
+        if base_scale != args.scale:
+            print(f'warning: the baseline was run at scale {base_scale!r}')
+        rows = compare(results, baseline, args.threshold)
+        print(f"\ncompared with {args.baseline} (commit {base_meta.get('commit')}):")
+        print_comparison(rows)
+        regressions = [r for r in rows if r[-1]]
+        if regressions:
+            print(f'{len(regressions)} metric(s) more than {args.threshold:.0%} worse than the baseline')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
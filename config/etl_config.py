@@ -3,3 +3,21 @@ INPUT_DIR = 'data/input'
 OUTPUT_DIR = 'data/output'
 PROCESSED_DIR = 'data/processed'
 ERRORS_DIR = 'data/errors'
+# Rows per chunk when streaming input files (None loads each file whole)
+CHUNK_SIZE = 50000
+# Worker processes for extract+transform (1 = sequential) and concurrent DB writers
+WORKERS = 1
+DB_WRITERS = 2
+# Loader: Core executemany instead of ORM objects; one commit per file instead of per batch
+USE_CORE_INSERT = True
+COMMIT_PER_FILE = False
+# Upsert players by email (insert new, update changed name/rating) instead of plain inserts
+UPSERT = False
+# Skip files (by content hash) and, with MANIFEST_ROW_HASHES, rows already ingested;
+# the manifest lives in PROCESSED_DIR
+MANIFEST = True
+MANIFEST_ROW_HASHES = True
+# Skip rows whose email is already in the table (or repeated in the file) instead of
+# failing the load on them; makes a rerun after a crash between the load commit and
+# the manifest write safe
+SKIP_EXISTING = False
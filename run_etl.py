@@ -6,7 +6,7 @@ logging.basicConfig(level=logging.INFO, filename='logs/etl.log', format='%(ascti
 logger = logging.getLogger('etl-run')
 
 def main():
-    orchestrator = ETLOrchestrator(input_dir=etl_config.INPUT_DIR, output_dir=etl_config.OUTPUT_DIR, processed_dir=etl_config.PROCESSED_DIR, errors_dir=etl_config.ERRORS_DIR)
+    orchestrator = ETLOrchestrator(input_dir=etl_config.INPUT_DIR, output_dir=etl_config.OUTPUT_DIR, processed_dir=etl_config.PROCESSED_DIR, errors_dir=etl_config.ERRORS_DIR, chunk_size=etl_config.CHUNK_SIZE, workers=etl_config.WORKERS, db_writers=etl_config.DB_WRITERS, use_core=etl_config.USE_CORE_INSERT, commit_per_file=etl_config.COMMIT_PER_FILE, upsert=etl_config.UPSERT, manifest=etl_config.MANIFEST, row_hashes=etl_config.MANIFEST_ROW_HASHES, skip_existing=etl_config.SKIP_EXISTING)
     result = orchestrator.run_players()
     logger.info(f'Result: {result}')
     print('ETL finished:', result)
@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# the app binds its engine at import time: point it at a scratch SQLite file
+# before any test module imports app, and keep api.log and the slow query
+# log out of the tree
+_scratch = tempfile.mkdtemp(prefix='colizeum-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_scratch, 'test.db')}"
+os.environ.pop('ASYNC_DATABASE_URL', None)
+os.environ['SLOW_QUERY_LOG'] = os.path.join(_scratch, 'slow_queries.log')
+os.chdir(_scratch)
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def schema():
+    """Every table and index of the app in the scratch database."""
+    from app.database import engine
+    from app.startup import ensure_schema
+    ensure_schema(engine, fast=False)
+
+
+@pytest.fixture
+def players_table(schema):
+    """An empty Player table in the scratch database."""
+    from sqlalchemy import delete
+    from app import models
+    from app.database import engine
+    yield models.Player.__table__
+    with engine.begin() as conn:
+        conn.execute(delete(models.Player.__table__))
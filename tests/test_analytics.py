@@ -0,0 +1,97 @@
+"""Usage rollups: revenue at each booking's own rate, windowed compaction after bulk writes."""
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+from app import admin, analytics, models
+from app.database import SessionLocal, engine
+from app.pricing import PRICE_KEY
+
+DAY = datetime(2032, 3, 1, 10, 0)
+
+
+@pytest.fixture
+def client(schema):
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def room(client):
+    club = client.post('/clubs/', json={'name': 'Analytics club'}).json()
+    arena = client.post('/arenas/', json={'club_id': club['club_id'], 'name': 'Arena', 'capacity': 10, 'address': None}).json()
+    room = client.post('/rooms/', json={'arena_id': arena['arena_id'], 'name': 'Room', 'room_type': 'bootcamp'}).json()
+    player = client.post('/players/', json={'first_name': 'Usage', 'last_name': 'Check', 'email': f'{uuid.uuid4().hex}@example.com'}).json()
+    price = client.post('/pricekv/', json={'price_key': f'{PRICE_KEY}:bootcamp', 'price_value': 400.0, 'currency': 'RUB', 'club_id': club['club_id']}).json()
+    with engine.connect() as conn:
+        price_id = conn.scalar(select(models.PriceKV.price_id).where(models.PriceKV.club_id == club['club_id']))
+    yield room['room_id'], player['player_id'], price_id, price
+    rollup = models.UsageRollup
+    with engine.begin() as conn:
+        conn.execute(delete(models.Booking).where(models.Booking.room_id == room['room_id']))
+        conn.execute(delete(rollup).where(rollup.scope == 'room', rollup.scope_id == room['room_id']))
+        conn.execute(delete(rollup).where(rollup.scope == 'club', rollup.scope_id == club['club_id']))
+        conn.execute(delete(models.PriceKV).where(models.PriceKV.club_id == club['club_id']))
+        conn.execute(delete(models.Player).where(models.Player.player_id == player['player_id']))
+        conn.execute(delete(models.Room).where(models.Room.room_id == room['room_id']))
+        conn.execute(delete(models.Arena).where(models.Arena.arena_id == arena['arena_id']))
+        conn.execute(delete(models.Club).where(models.Club.club_id == club['club_id']))
+
+
+def booking(room_id, player_id, hour, days=0):
+    start = DAY + timedelta(days=days, hours=hour)
+    return {'player_id': player_id, 'room_id': room_id, 'start_time': start.isoformat(), 'end_time': (start + timedelta(hours=1)).isoformat()}
+
+
+def revenue(client, room_id):
+    params = {'grain': 'day', 'from': DAY.isoformat(), 'to': (DAY + timedelta(days=3)).isoformat()}
+    return sum(bucket['revenue'] for bucket in client.get(f'/analytics/rooms/{room_id}', params=params).json())
+
+
+def test_revenue_keeps_the_rate_each_booking_was_made_at(client, room):
+    room_id, player_id, price_id, price = room
+    client.post('/bookings/', json=booking(room_id, player_id, 0))
+    client.put(f'/pricekv/{price_id}', json={**price, 'price_value': 1000.0})
+    client.post('/bookings/', json=booking(room_id, player_id, 2))
+    assert revenue(client, room_id) == 1400.0
+    with SessionLocal() as db:
+        analytics.compact(db, DAY, DAY)
+    assert revenue(client, room_id) == 1400.0
+
+
+def test_bulk_writes_compact_only_the_window_they_touch(client, room, monkeypatch):
+    room_id, player_id, _, _ = room
+    windows = []
+    monkeypatch.setattr(analytics.compactor, 'request', lambda since=None, until=None: windows.append((since, until)))
+    created = client.post('/bookings/bulk', json=[booking(room_id, player_id, 0), booking(room_id, player_id, 4, days=1)]).json()
+    assert windows == [(DAY, DAY + timedelta(days=1, hours=5))]
+    moved = {**booking(room_id, player_id, 0, days=2), 'booking_id': created['ids'][0]}
+    client.put('/bookings/bulk', json=[moved])
+    assert windows[-1] == (DAY, DAY + timedelta(days=2, hours=1))
+    client.request('DELETE', '/bookings/bulk', json=[created['ids'][1]])
+    assert windows[-1] == (DAY + timedelta(days=1, hours=4), DAY + timedelta(days=1, hours=5))
+    client.post('/clubs/bulk', json=[{'name': 'Not a fact'}])
+    assert len(windows) == 3
+
+
+def test_compaction_counts_bookings_not_hour_pieces(client, room):
+    room_id, player_id, _, _ = room
+    long = {**booking(room_id, player_id, 0, days=1), 'end_time': (DAY + timedelta(days=1, hours=3)).isoformat()}
+    client.post('/bookings/', json=long)
+    with SessionLocal() as db:
+        stats = analytics.compact(db, DAY + timedelta(days=1), DAY + timedelta(days=1))
+    assert stats['bookings'] == 1
+    assert revenue(client, room_id) == 1200.0
+
+
+def test_compact_endpoint_needs_the_admin_token(client, monkeypatch):
+    params = {'from': DAY.isoformat(), 'to': DAY.isoformat()}
+    monkeypatch.setattr(admin, 'ADMIN_TOKEN', None)
+    assert client.post('/analytics/compact', params=params).status_code == 403
+    monkeypatch.setattr(admin, 'ADMIN_TOKEN', 'secret')
+    assert client.post('/analytics/compact', params=params).status_code == 401
+    assert client.post('/analytics/compact', params=params, headers={'X-Admin-Token': 'wrong'}).status_code == 401
+    response = client.post('/analytics/compact', params=params, headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200 and 'rollups' in response.json()
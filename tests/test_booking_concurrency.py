@@ -0,0 +1,85 @@
+"""Concurrent bookings of one room never overlap, and only lock errors are retried."""
+import sqlite3
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import aliased
+from app import models
+from app.database import SessionLocal, engine
+from app.locks import is_lock_error, with_room_lock
+
+DAY = datetime(2030, 1, 1, 10, 0)
+
+
+@pytest.fixture
+def client(schema):
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def room(client):
+    club = client.post('/clubs/', json={'name': 'Concurrency club'}).json()
+    arena = client.post('/arenas/', json={'club_id': club['club_id'], 'name': 'Arena', 'capacity': 10, 'address': None}).json()
+    room = client.post('/rooms/', json={'arena_id': arena['arena_id'], 'name': 'Room'}).json()
+    player = client.post('/players/', json={'first_name': 'Con', 'last_name': 'Current', 'email': f'{uuid.uuid4().hex}@example.com'}).json()
+    yield room['room_id'], player['player_id']
+    with engine.begin() as conn:
+        conn.execute(delete(models.Booking).where(models.Booking.room_id == room['room_id']))
+        conn.execute(delete(models.Player).where(models.Player.player_id == player['player_id']))
+        conn.execute(delete(models.Room).where(models.Room.room_id == room['room_id']))
+        conn.execute(delete(models.Arena).where(models.Arena.arena_id == arena['arena_id']))
+        conn.execute(delete(models.Club).where(models.Club.club_id == club['club_id']))
+
+
+def overlaps(room_id):
+    a, b = aliased(models.Booking), aliased(models.Booking)
+    stmt = select(func.count()).select_from(a).join(b, and_(
+        a.room_id == b.room_id, a.booking_id < b.booking_id,
+        a.start_time < b.end_time, b.start_time < a.end_time,
+        a.status != 'cancelled', b.status != 'cancelled',
+    )).where(a.room_id == room_id)
+    with SessionLocal() as db:
+        return db.scalar(stmt)
+
+
+def test_concurrent_overlapping_bookings_are_serialized(client, room):
+    room_id, player_id = room
+
+    def book(i):
+        start = DAY + timedelta(minutes=15 * (i % 8))
+        payload = {'player_id': player_id, 'room_id': room_id,
+                   'start_time': start.isoformat(), 'end_time': (start + timedelta(hours=1)).isoformat()}
+        return client.post('/bookings/', json=payload).status_code
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        statuses = Counter(pool.map(book, range(64)))
+    assert set(statuses) <= {201, 400, 409}
+    assert statuses[201] >= 1
+    assert overlaps(room_id) == 0
+
+
+def test_lock_errors_are_recognised():
+    locked = OperationalError('UPDATE', {}, sqlite3.OperationalError('database is locked'))
+    duplicate = IntegrityError('INSERT', {}, sqlite3.IntegrityError('UNIQUE constraint failed: Booking.booking_id'))
+    assert is_lock_error(locked)
+    assert not is_lock_error(duplicate)
+
+
+def test_integrity_errors_are_not_retried(room):
+    room_id, _ = room
+    calls = []
+
+    def work():
+        calls.append(1)
+        raise IntegrityError('INSERT', {}, sqlite3.IntegrityError('UNIQUE constraint failed'))
+
+    with SessionLocal() as db, pytest.raises(IntegrityError):
+        with_room_lock(db, room_id, work)
+    assert len(calls) == 1
@@ -0,0 +1,60 @@
+"""Writes bump their tables' ChangeVersion in the committing transaction."""
+import uuid
+import pytest
+from sqlalchemy import insert, text, update
+from app import change_tracking, models
+from app.database import SessionLocal, engine
+from app.versions import get_version
+
+
+def version(name='Player'):
+    with SessionLocal() as db:
+        return get_version(db, name)
+
+
+def player(**values):
+    return {'first_name': 'Track', 'last_name': 'Changes', 'email': f'{uuid.uuid4().hex}@example.com', **values}
+
+
+def test_orm_commit_bumps(players_table):
+    before = version()
+    with SessionLocal() as db:
+        db.add(models.Player(**player()))
+        db.commit()
+    assert version() == before + 1
+
+
+def test_engine_begin_writes_bump(players_table):
+    before = version()
+    with engine.begin() as conn:
+        conn.execute(insert(models.Player), [player(), player()])
+    with engine.begin() as conn:
+        conn.execute(text('UPDATE "Player" SET rating = 1200'))
+    assert version() == before + 2
+
+
+def test_rollback_and_untracked_writes_do_not_bump(players_table):
+    before = version()
+    with SessionLocal() as db:
+        db.add(models.Player(**player()))
+        db.flush()
+        db.rollback()
+        db.execute(update(models.Player).values(rating=models.Player.rating)
+                   .execution_options(synchronize_session=False, **{change_tracking.TRACK_CHANGES_OPTION: False}))
+        db.commit()
+    assert version() == before
+
+
+def test_failed_bump_fails_the_write(players_table, monkeypatch):
+    def broken(conn, tables):
+        raise RuntimeError('version table unavailable')
+    monkeypatch.setattr(change_tracking, 'bump_versions', broken)
+    email = player()['email']
+    with SessionLocal() as db:
+        db.add(models.Player(**player(email=email)))
+        with pytest.raises(RuntimeError):
+            db.commit()
+        db.rollback()
+    monkeypatch.undo()
+    with SessionLocal() as db:
+        assert db.query(models.Player).filter_by(email=email).count() == 0
@@ -0,0 +1,43 @@
+"""Streaming exports: exact content types and the rows themselves."""
+import csv
+import io
+import json
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from app import models
+from app.database import engine
+
+
+@pytest.fixture
+def client(schema):
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def club(client):
+    club = client.post('/clubs/', json={'name': f'Export {uuid.uuid4().hex}', 'city': 'Kazan'}).json()
+    yield club
+    with engine.begin() as conn:
+        conn.execute(delete(models.Club).where(models.Club.club_id == club['club_id']))
+
+
+def test_csv_export(client, club):
+    response = client.get('/clubs/export', params={'format': 'csv'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'text/csv; charset=utf-8'
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert any(row['name'] == club['name'] for row in rows)
+
+
+def test_ndjson_export_gzip(client, club):
+    response = client.get('/clubs/export', params={'gzip': 'true'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert response.headers['content-encoding'] == 'gzip'
+    # the client undoes the Content-Encoding
+    names = [json.loads(line)['name'] for line in response.text.splitlines()]
+    assert club['name'] in names
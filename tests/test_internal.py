@@ -0,0 +1,47 @@
+"""Operator endpoints under /internal: state changes need the admin token."""
+import pytest
+from fastapi.testclient import TestClient
+from app import admin
+from app.pool_metrics import pool_metrics
+
+
+@pytest.fixture
+def client(schema):
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+def test_pool_stats_are_read_only(client):
+    client.get('/clubs/')
+    before = client.get('/internal/pool').json()['checkouts']
+    client.get('/internal/pool', params={'reset': 'true'})
+    assert pool_metrics.checkouts >= before > 0
+
+
+def test_pool_reset_needs_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(admin, 'ADMIN_TOKEN', None)
+    assert client.post('/internal/pool/reset').status_code == 403
+    monkeypatch.setattr(admin, 'ADMIN_TOKEN', 'secret')
+    assert client.post('/internal/pool/reset').status_code == 401
+    assert client.post('/internal/pool/reset', headers={'X-Admin-Token': 'wrong'}).status_code == 401
+    client.get('/clubs/')
+    response = client.post('/internal/pool/reset', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200 and response.json()['checkouts'] > 0
+    assert pool_metrics.checkouts < response.json()['checkouts']
+
+
+def test_query_stats_reset_needs_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(admin, 'ADMIN_TOKEN', 'secret')
+    client.get('/clubs/')
+    client.get('/internal/queries', params={'reset': 'true'})
+    assert client.get('/internal/queries').json()
+    assert client.post('/internal/queries/reset').status_code == 401
+    assert client.post('/internal/queries/reset', headers={'X-Admin-Token': 'secret'}).status_code == 200
+
+
+def test_ratings_recompute_needs_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(admin, 'ADMIN_TOKEN', 'secret')
+    assert client.post('/internal/ratings/recompute').status_code == 401
+    response = client.post('/internal/ratings/recompute', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200 and 'rated_matches' in response.json()
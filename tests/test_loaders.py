@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+from sqlalchemy import event, func, select
+from app import models
+from app.database import SessionLocal, engine
+from app.etl.loaders import DataLoader
+from app.etl.orchestrator import ETLOrchestrator
+
+
+def players(ids):
+    return [{'first_name': f'First{i}', 'last_name': f'Last{i}', 'email': f'player{i}@example.com', 'rating': 1000} for i in ids]
+
+
+def player_count():
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(models.Player))
+
+
+@pytest.fixture
+def commits():
+    counted = []
+    listener = lambda session: counted.append(1)
+    event.listen(SessionLocal, 'after_commit', listener)
+    yield counted
+    event.remove(SessionLocal, 'after_commit', listener)
+
+
+def test_commit_per_file_commits_once_for_all_chunks(tmp_path, players_table, commits):
+    loader = DataLoader(output_dir=tmp_path, errors_dir=tmp_path, commit_per_file=True)
+    with loader.file_transaction():
+        for start in range(0, 3000, 500):
+            loader.bulk_insert_players(players(range(start, start + 500)))
+        assert player_count() == 0
+    assert len(commits) == 1
+    assert player_count() == 3000
+
+
+def test_commit_per_file_rolls_back_the_whole_file(tmp_path, players_table):
+    (tmp_path / 'input').mkdir()
+    # the last chunk repeats an email of the first one
+    rows = pd.DataFrame(players(range(100)) + players([0]))
+    rows.to_csv(tmp_path / 'input' / 'a.csv', index=False)
+    etl = ETLOrchestrator(input_dir=tmp_path / 'input', output_dir=tmp_path / 'output', processed_dir=tmp_path / 'processed',
+                          errors_dir=tmp_path / 'errors', chunk_size=25, commit_per_file=True, manifest=False)
+    with pytest.raises(Exception):
+        etl.run_players()
+    assert player_count() == 0
+    assert (tmp_path / 'input' / 'a.csv').exists()
+
+
+def test_without_commit_per_file_each_batch_commits(tmp_path, players_table, commits):
+    loader = DataLoader(output_dir=tmp_path, errors_dir=tmp_path)
+    with loader.file_transaction():
+        loader.bulk_insert_players(players(range(10)))
+        loader.bulk_insert_players(players(range(10, 20)))
+    assert len(commits) == 2
+
+
+def emails():
+    with engine.connect() as conn:
+        return sorted(conn.scalars(select(models.Player.email)))
+
+
+def test_upsert_matches_emails_stripped_and_case_insensitively(tmp_path, players_table):
+    loader = DataLoader(output_dir=tmp_path, errors_dir=tmp_path, upsert=True)
+    loader.bulk_insert_players(players(range(3)))
+    stats = loader.upsert_players([
+        {'first_name': 'Renamed', 'last_name': 'Last0', 'email': ' Player0@Example.com ', 'rating': 1000},
+        {'first_name': 'First1', 'last_name': 'Last1', 'email': 'PLAYER1@EXAMPLE.COM', 'rating': 1000},
+        {'first_name': 'New', 'last_name': 'Player', 'email': 'New@Example.com', 'rating': 1000},
+        {'first_name': 'Newer', 'last_name': 'Player', 'email': 'new@example.com ', 'rating': 1000},
+    ])
+    assert stats == {'created': 1, 'updated': 1, 'unchanged': 1}
+    assert emails() == ['new@example.com', 'player0@example.com', 'player1@example.com', 'player2@example.com']
+
+
+def test_upsert_and_skip_existing_match_stored_emails_by_search_key(tmp_path, players_table):
+    DataLoader(output_dir=tmp_path, errors_dir=tmp_path).bulk_insert_players([
+        {'first_name': 'Ivan', 'last_name': 'Petrov', 'email': 'Ivan@Example.com', 'rating': 1000},
+        {'first_name': 'Пётр', 'last_name': 'Ёлкин', 'email': 'Ёлкин@Пример.рф', 'rating': 1000}])
+    incoming = [{'first_name': 'Ivan', 'last_name': 'Petrov', 'email': 'IVAN@example.com', 'rating': 1200},
+                {'first_name': 'Пётр', 'last_name': 'Ёлкин', 'email': 'елкин@пример.РФ', 'rating': 1000}]
+    skipped = DataLoader(output_dir=tmp_path, errors_dir=tmp_path, skip_existing=True).upsert_players(incoming, update_existing=False)
+    assert skipped == {'created': 0, 'updated': 0, 'unchanged': 2}
+    stats = DataLoader(output_dir=tmp_path, errors_dir=tmp_path, upsert=True).upsert_players(incoming)
+    assert stats == {'created': 0, 'updated': 1, 'unchanged': 1}
+    assert emails() == ['Ivan@Example.com', 'Ёлкин@Пример.рф']
+
+
+def test_upsert_updates_and_inserts_in_one_transaction(tmp_path, players_table, monkeypatch):
+    loader = DataLoader(output_dir=tmp_path, errors_dir=tmp_path, upsert=True)
+    loader.bulk_insert_players(players(range(2)))
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('insert failed')
+    monkeypatch.setattr(loader, '_core_insert', fail)
+    changed = players(range(3))
+    changed[0]['rating'] = 1500
+    with pytest.raises(RuntimeError):
+        loader.upsert_players(changed)
+    with engine.connect() as conn:
+        assert conn.scalar(select(models.Player.rating).where(models.Player.email == 'player0@example.com')) == 1000
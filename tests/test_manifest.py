@@ -0,0 +1,63 @@
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+from app.etl.manifest import IngestManifest
+from app.etl.orchestrator import MANIFEST_NAME, ETLOrchestrator
+
+
+def test_row_hashes_do_not_depend_on_the_inferred_dtype():
+    floats = pd.DataFrame({'rating': [1500.0, np.nan, 2.5], 'name': ['a', None, 'c'],
+                           'dob': pd.to_datetime(['1990-01-01', None, '1990-01-01 10:00'], format='ISO8601')})
+    objects = pd.DataFrame({'rating': pd.Series([1500, None, 2.5], dtype=object), 'name': pd.Series(['a', np.nan, 'c'], dtype=object),
+                            'dob': [date(1990, 1, 1), None, datetime(1990, 1, 1, 10)]})
+    text = pd.DataFrame({'rating': ['1500', '', '2.5'], 'name': ['a', '', 'c'], 'dob': ['1990-01-01', '', '1990-01-01 10:00:00']})
+    ints = pd.DataFrame({'rating': pd.array([1500, None, 2], dtype='Int64')})
+    expected = IngestManifest.hash_rows(floats).tolist()
+    assert IngestManifest.hash_rows(objects).tolist() == expected
+    assert IngestManifest.hash_rows(text).tolist() == expected
+    assert IngestManifest.hash_rows(ints).tolist()[:2] == IngestManifest.hash_rows(floats[['rating']]).tolist()[:2]
+    assert len(set(expected)) == 3
+
+
+def etl(tmp_path, **kwargs):
+    return ETLOrchestrator(input_dir=tmp_path / 'input', output_dir=tmp_path / 'output', processed_dir=tmp_path / 'processed',
+                           errors_dir=tmp_path / 'errors', chunk_size=20, **kwargs)
+
+
+def write(path, rows):
+    pd.DataFrame(rows, columns=['first_name', 'last_name', 'email', 'rating']).to_csv(path, index=False)
+
+
+def rows(ids, valid=True):
+    return [(f'First{i}', f'Last{i}', f'player{i}@example.com' if valid else f'player{i}.example.com', 1000) for i in ids]
+
+
+def test_only_loaded_rows_are_recorded_and_the_manifest_is_closed(tmp_path, players_table):
+    (tmp_path / 'input').mkdir()
+    write(tmp_path / 'input' / 'a.csv', rows(range(30)) + rows(range(30, 40), valid=False))
+    run = etl(tmp_path)
+    assert run.run_players() == {'processed': 1, 'created': 30, 'errors': 10}
+    assert run.manifest._conn is None
+    manifest = IngestManifest(tmp_path / 'processed' / MANIFEST_NAME)
+    assert manifest.conn.execute('SELECT COUNT(*) FROM rows').fetchone() == (30,)
+    manifest.close()
+    # the invalid rows are reported again by a later export that repeats them
+    write(tmp_path / 'input' / 'b.csv', rows(range(20, 40), valid=False) + rows(range(30)))
+    assert etl(tmp_path).run_players() == {'processed': 1, 'created': 0, 'errors': 20}
+
+
+def test_rerun_after_a_crash_before_the_manifest_write_does_not_duplicate(tmp_path, players_table, monkeypatch):
+    (tmp_path / 'input').mkdir()
+    write(tmp_path / 'input' / 'a.csv', rows(range(50)))
+    crashing = etl(tmp_path, skip_existing=True)
+
+    def crash(hashes):
+        raise OSError('disk full')
+    monkeypatch.setattr(crashing.manifest, 'add_rows', crash)
+    try:
+        crashing.run_players()
+    except OSError:
+        pass
+    monkeypatch.undo()
+    assert (tmp_path / 'input' / 'a.csv').exists()
+    assert etl(tmp_path, skip_existing=True).run_players() == {'processed': 1, 'created': 30, 'errors': 0}
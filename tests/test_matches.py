@@ -0,0 +1,78 @@
+"""Match results drive ratings and the cached leaderboards."""
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from app import models
+from app.database import engine
+
+
+@pytest.fixture
+def client(schema):
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def tournament(client):
+    club = client.post('/clubs/', json={'name': 'Ratings club'}).json()
+    tournament = client.post('/tournaments/', json={'club_id': club['club_id'], 'name': 'Cup', 'start_date': None,
+                                                    'end_date': None, 'prize_pool': None}).json()
+    players = [client.post('/players/', json={'first_name': name, 'last_name': 'Rated', 'email': f'{uuid.uuid4().hex}@example.com'}).json()['player_id']
+               for name in ('Winner', 'Loser', 'Substitute')]
+    yield tournament['tournament_id'], club['club_id'], players
+    with engine.begin() as conn:
+        ids = players
+        conn.execute(delete(models.LeaderboardEntry).where(models.LeaderboardEntry.player_id.in_(ids)))
+        conn.execute(delete(models.MatchResult).where(models.MatchResult.loser_player_id.in_(ids)))
+        conn.execute(delete(models.Match).where(models.Match.tournament_id == tournament['tournament_id']))
+        conn.execute(delete(models.Player).where(models.Player.player_id.in_(ids)))
+        conn.execute(delete(models.Tournament).where(models.Tournament.tournament_id == tournament['tournament_id']))
+        conn.execute(delete(models.Club).where(models.Club.club_id == club['club_id']))
+
+
+def _match(tournament_id, winner, loser=None, **extra):
+    body = {'tournament_id': tournament_id, 'session_id': None, 'round': 'final', 'winner_player_id': winner, **extra}
+    if loser is not None:
+        body['loser_player_id'] = loser
+    return body
+
+
+def test_update_without_loser_keeps_the_result(client, tournament):
+    tournament_id, _, (winner, loser, _) = tournament
+    match = client.post('/matches/', json=_match(tournament_id, winner, loser)).json()
+    assert match['loser_player_id'] == loser
+    rating = client.get(f'/players/{winner}').json()['rating']
+    assert rating > 1000
+
+    updated = client.put(f"/matches/{match['match_id']}", json=_match(tournament_id, winner, round='grand final'))
+    assert updated.status_code == 200
+    assert updated.json()['loser_player_id'] == loser and updated.json()['round'] == 'grand final'
+    assert client.get(f"/matches/{match['match_id']}").json()['loser_player_id'] == loser
+    assert client.get(f'/players/{winner}').json()['rating'] == rating
+
+    assert client.put(f"/matches/{match['match_id']}", json=_match(tournament_id, loser)).status_code == 400
+
+
+def test_leaderboard_follows_player_renames(client, tournament):
+    tournament_id, club_id, (winner, loser, _) = tournament
+    client.post('/matches/', json=_match(tournament_id, winner, loser))
+    for path in (f'/tournaments/{tournament_id}/leaderboard', f'/clubs/{club_id}/leaderboard'):
+        assert client.get(path).json()[0]['first_name'] == 'Winner'
+    player = client.get(f'/players/{winner}').json()
+    client.put(f'/players/{winner}', json={**player, 'first_name': 'Champion'})
+    for path in (f'/tournaments/{tournament_id}/leaderboard', f'/clubs/{club_id}/leaderboard'):
+        assert client.get(path).json()[0]['first_name'] == 'Champion'
+
+
+def test_changing_only_the_loser_changes_the_etags(client, tournament):
+    tournament_id, _, (winner, loser, substitute) = tournament
+    match = client.post('/matches/', json=_match(tournament_id, winner, loser)).json()
+    paths = (f"/matches/{match['match_id']}", '/matches/', f'/tournaments/{tournament_id}/matches', f'/players/{winner}/matches_won')
+    etags = {path: client.get(path).headers['ETag'] for path in paths}
+    client.put(f"/matches/{match['match_id']}", json=_match(tournament_id, winner, substitute))
+    for path, etag in etags.items():
+        response = client.get(path, headers={'If-None-Match': etag})
+        assert response.status_code == 200, path
+    assert client.get(f"/matches/{match['match_id']}").json()['loser_player_id'] == substitute
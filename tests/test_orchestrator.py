@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from app import models
+from app.database import engine
+from app.etl.loaders import DataLoader
+from app.etl.orchestrator import ETLOrchestrator
+from app.etl.transformers import DataTransformer
+
+
+def write_players(path, ids):
+    pd.DataFrame({'First Name': [f'First{i}' for i in ids], 'Last Name': [f'Last{i}' for i in ids],
+                  'E-mail': [f'player{i}@example.com' for i in ids], 'Rating': [1000 + i for i in ids]}).to_csv(path, index=False)
+
+
+def orchestrator(tmp_path, **kwargs):
+    return ETLOrchestrator(input_dir=tmp_path / 'input', output_dir=tmp_path / 'output', processed_dir=tmp_path / 'processed',
+                           errors_dir=tmp_path / 'errors', chunk_size=50, **kwargs)
+
+
+def player_count():
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(models.Player))
+
+
+def test_parallel_run_loads_overlapping_files_once(tmp_path, players_table):
+    (tmp_path / 'input').mkdir()
+    write_players(tmp_path / 'input' / 'a.csv', range(0, 300))
+    write_players(tmp_path / 'input' / 'b.csv', range(200, 500))
+    write_players(tmp_path / 'input' / 'c.csv', range(100, 400))
+    result = orchestrator(tmp_path, workers=3, db_writers=3).run_players()
+    assert result == {'processed': 3, 'created': 500, 'errors': 0}
+    assert player_count() == 500
+    assert sorted(p.name for p in (tmp_path / 'processed').glob('*.csv')) == ['a.csv', 'b.csv', 'c.csv']
+
+
+class RejectOdd(DataTransformer):
+    def transform_players(self, df):
+        valid_df, invalid_df = super().transform_players(df)
+        odd = valid_df['rating'] % 2 == 1
+        rejected = valid_df.loc[odd].assign(_errors='odd rating')
+        return valid_df.loc[~odd], pd.concat([invalid_df, rejected], ignore_index=True)
+
+
+def test_parallel_run_uses_the_configured_transformer(tmp_path, players_table):
+    (tmp_path / 'input').mkdir()
+    write_players(tmp_path / 'input' / 'a.csv', range(0, 100))
+    write_players(tmp_path / 'input' / 'b.csv', range(100, 200))
+    etl = orchestrator(tmp_path, workers=2)
+    etl.transformer = RejectOdd()
+    assert etl.run_players() == {'processed': 2, 'created': 100, 'errors': 100}
+    errors = pd.read_csv(tmp_path / 'errors' / 'errors_a.csv')
+    assert len(errors) == 50 and '__row_hash' not in errors
+
+
+def test_sequential_rerun_skips_ingested_rows(tmp_path, players_table):
+    (tmp_path / 'input').mkdir()
+    write_players(tmp_path / 'input' / 'a.csv', range(0, 120))
+    assert orchestrator(tmp_path).run_players()['created'] == 120
+    write_players(tmp_path / 'input' / 'b.csv', range(60, 180))
+    assert orchestrator(tmp_path).run_players()['created'] == 60
+    assert player_count() == 180
+
+
+def test_orm_loads_with_the_manifest_on_keep_their_error_handling(tmp_path, players_table, monkeypatch):
+    def core_insert(*args, **kwargs):
+        raise AssertionError('use_core=False must not insert through Core')
+    monkeypatch.setattr(DataLoader, '_core_insert', core_insert)
+    (tmp_path / 'input').mkdir()
+    write_players(tmp_path / 'input' / 'a.csv', range(0, 60))
+    assert orchestrator(tmp_path, use_core=False).run_players()['created'] == 60
+    # same emails, new ratings: new row hashes, so only the unique email stops them
+    pd.DataFrame({'First Name': ['First0'], 'Last Name': ['Last0'], 'E-mail': ['player0@example.com'],
+                  'Rating': [1500]}).to_csv(tmp_path / 'input' / 'b.csv', index=False)
+    with pytest.raises(IntegrityError):
+        orchestrator(tmp_path, use_core=False).run_players()
+    assert orchestrator(tmp_path, use_core=False, skip_existing=True).run_players()['created'] == 0
+    assert player_count() == 60
@@ -0,0 +1,35 @@
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, Integer, Numeric, String
+from app.pagination import parse_filter_value
+
+
+@pytest.mark.parametrize('column_type, raw, expected', [
+    (Boolean(), 'false', False),
+    (Boolean(), 'False', False),
+    (Boolean(), '0', False),
+    (Boolean(), 'true', True),
+    (Boolean(), '1', True),
+    (Date(), '2024-03-01', date(2024, 3, 1)),
+    (DateTime(), '2024-03-01T10:30:00', datetime(2024, 3, 1, 10, 30)),
+    (DateTime(), '2024-03-01', datetime(2024, 3, 1)),
+    (Integer(), '42', 42),
+    (Float(), '2.5', 2.5),
+    (Numeric(), '2.50', Decimal('2.50')),
+    (String(), 'vip', 'vip'),
+])
+def test_filter_values_parse_per_type(column_type, raw, expected):
+    assert parse_filter_value(Column('c', column_type), raw) == expected
+
+
+@pytest.mark.parametrize('column_type, raw', [
+    (Boolean(), 'maybe'),
+    (Date(), '01.03.2024'),
+    (DateTime(), 'yesterday'),
+    (Integer(), 'x'),
+    (Numeric(), 'x'),
+])
+def test_invalid_filter_values_raise_value_error(column_type, raw):
+    with pytest.raises(ValueError):
+        parse_filter_value(Column('c', column_type), raw)
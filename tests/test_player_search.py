@@ -0,0 +1,68 @@
+"""Prefix search over the normalized Player keys, and the trigram index."""
+from sqlalchemy import insert, select, text, update
+from app import models
+from app.database import SessionLocal, engine
+from app.player_search import TrigramIndex, _fields, backfill_search_keys, prefix_search
+
+
+def add_players(*names):
+    rows = [{'first_name': first, 'last_name': last, 'email': f'{email}@example.com'} for first, last, email in names]
+    with SessionLocal() as db:
+        db.add_all(models.Player(**row) for row in rows)
+        db.commit()
+
+
+def search(q, limit=10):
+    with SessionLocal() as db:
+        return [(p.first_name, p.last_name) for p in prefix_search(db, q, limit)]
+
+
+def test_case_and_yo_insensitive(players_table):
+    add_players(('Пётр', 'Ёлкин', 'petr'), ('Anna', 'Smith', 'anna'))
+    assert search('елк') == search('ЁЛК') == [('Пётр', 'Ёлкин')]
+    assert search('петр') == [('Пётр', 'Ёлкин')]
+    assert search('SMI') == [('Anna', 'Smith')]
+
+
+def test_ranking_survives_the_limit(players_table):
+    # many prefix hits inserted first: the exact match must still come back on top
+    add_players(*[(f'Zed{i}', f'Smithson{i:03d}', f'zed{i}') for i in range(200)])
+    add_players(('Ann', 'Smithers', 'smith.first'), ('Smith', 'Zzz', 'smith.last'), ('Bob', 'Smith', 'bob'))
+    assert search('smith', 3) == [('Bob', 'Smith'), ('Smith', 'Zzz'), ('Ann', 'Smithers')]
+    assert search('smith bob') == [('Bob', 'Smith')]
+
+
+def test_keys_follow_every_write_path(players_table):
+    add_players(('Ivan', 'Petrov', 'ivan'))
+    with engine.begin() as conn:
+        conn.execute(insert(models.Player), [{'first_name': 'Олег', 'last_name': 'Core', 'email': 'oleg@example.com'}])
+    with SessionLocal() as db:
+        player = db.scalars(select(models.Player).where(models.Player.email == 'ivan@example.com')).one()
+        player.last_name = 'Ёжиков'
+        db.commit()
+        db.execute(update(models.Player), [{'player_id': player.player_id, 'first_name': 'Иван', **models.search_keys({'first_name': 'Иван'})}])
+        db.commit()
+    assert search('ежик') == [('Иван', 'Ёжиков')]
+    assert search('олег') == [('Олег', 'Core')]
+
+
+def test_backfill_fills_missing_keys(players_table):
+    with engine.begin() as conn:
+        conn.execute(text('INSERT INTO "Player" (first_name, last_name, email) VALUES (\'Raw\', \'Legacy\', \'raw@example.com\')'))
+    assert search('legacy') == []
+    assert backfill_search_keys(engine) == 1
+    assert search('legacy') == [('Raw', 'Legacy')]
+    assert backfill_search_keys(engine) == 0
+
+
+def test_trigram_updates_do_not_duplicate_postings():
+    index = TrigramIndex()
+    index.ready = True
+    index.apply({1: _fields('Ivan', 'Petrov', 'ivan@example.com')}, set())
+    for _ in range(3):
+        index.apply({1: _fields('Ivan', 'Petrova', 'ivan@example.com')}, set())
+        index.apply({1: _fields('Ivan', 'Petrov', 'ivan@example.com')}, set())
+    assert all(list(ids) == [1] for ids in index._postings.values())
+    index.apply({}, {1})
+    index.apply({1: _fields('Ivan', 'Petrov', 'ivan@example.com')}, set())
+    assert all(list(ids) == [1] for ids in index._postings.values())
@@ -0,0 +1,70 @@
+"""Bookings and sessions are priced through the PriceKV cache when written."""
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+from app import models
+from app.cache import price_cache
+from app.database import engine
+from app.pricing import PRICE_KEY
+
+DAY = datetime(2031, 1, 1, 10, 0)
+
+
+@pytest.fixture
+def client(schema):
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def room(client):
+    club = client.post('/clubs/', json={'name': 'Pricing club'}).json()
+    arena = client.post('/arenas/', json={'club_id': club['club_id'], 'name': 'Arena', 'capacity': 10, 'address': None}).json()
+    room = client.post('/rooms/', json={'arena_id': arena['arena_id'], 'name': 'Room', 'room_type': 'vip'}).json()
+    player = client.post('/players/', json={'first_name': 'Price', 'last_name': 'Check', 'email': f'{uuid.uuid4().hex}@example.com'}).json()
+    price = client.post('/pricekv/', json={'price_key': f'{PRICE_KEY}:vip', 'price_value': 500.0, 'currency': 'RUB', 'club_id': club['club_id']}).json()
+    with engine.connect() as conn:
+        price_id = conn.scalar(select(models.PriceKV.price_id).where(models.PriceKV.club_id == club['club_id']))
+    yield room['room_id'], player['player_id'], price_id, price
+    with engine.begin() as conn:
+        conn.execute(delete(models.Booking).where(models.Booking.room_id == room['room_id']))
+        conn.execute(delete(models.GameSession).where(models.GameSession.room_id == room['room_id']))
+        conn.execute(delete(models.PriceKV).where(models.PriceKV.club_id == club['club_id']))
+        conn.execute(delete(models.Player).where(models.Player.player_id == player['player_id']))
+        conn.execute(delete(models.Room).where(models.Room.room_id == room['room_id']))
+        conn.execute(delete(models.Arena).where(models.Arena.arena_id == arena['arena_id']))
+        conn.execute(delete(models.Club).where(models.Club.club_id == club['club_id']))
+
+
+def booking(room_id, player_id, hour):
+    start = DAY + timedelta(hours=hour)
+    return {'player_id': player_id, 'room_id': room_id, 'start_time': start.isoformat(), 'end_time': (start + timedelta(hours=1)).isoformat()}
+
+
+def test_bookings_are_priced_from_the_cache(client, room):
+    room_id, player_id, price_id, price = room
+    first = client.post('/bookings/', json=booking(room_id, player_id, 0)).json()
+    hits = price_cache.hits
+    second = client.post('/bookings/', json=booking(room_id, player_id, 2)).json()
+    assert first['hourly_rate'] == second['hourly_rate'] == 500.0
+    assert price_cache.hits > hits
+
+    client.put(f'/pricekv/{price_id}', json={**price, 'price_value': 650.0})
+    third = client.post('/bookings/', json=booking(room_id, player_id, 4)).json()
+    assert third['hourly_rate'] == 650.0
+    # earlier bookings keep the rate they were made at
+    assert client.get(f"/bookings/{first['booking_id']}").json()['hourly_rate'] == 500.0
+
+
+def test_sessions_and_bulk_bookings_are_priced(client, room):
+    room_id, player_id, _, _ = room
+    session = client.post('/sessions/', json={'room_id': room_id, 'started_at': DAY.isoformat(), 'ended_at': None,
+                                              'game_title': None, 'host_player_id': None}).json()
+    assert session['hourly_rate'] == 500.0
+    result = client.post('/bookings/bulk', json=[booking(room_id, player_id, 10), booking(room_id, player_id, 12)]).json()
+    assert not result['errors']
+    rates = {client.get(f'/bookings/{i}').json()['hourly_rate'] for i in result['ids']}
+    assert rates == {500.0}
@@ -0,0 +1,61 @@
+"""rows_response bodies are identical to FastAPI's response_model output."""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Optional
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, ConfigDict
+from app import models, schemas
+from app.serialization import rows_response
+
+
+class Priced(BaseModel):
+    item_id: int
+    name: str
+    amount: Decimal
+    ratio: float
+    at: datetime
+    day: Optional[date]
+    note: Optional[str]
+    model_config = ConfigDict(from_attributes=True)
+
+
+ROWS = [
+    SimpleNamespace(item_id=1, name='Ёжик «VIP»', amount=Decimal('12.50'), ratio=3, at=datetime(2024, 5, 1, 10, 30, tzinfo=timezone.utc),
+                    day=date(2024, 5, 1), note=None),
+    SimpleNamespace(item_id=2, name='b', amount=Decimal('1E+3'), ratio=1e16, at=datetime(2024, 5, 1, 10, 30, 0, 123456, tzinfo=timezone(timedelta(hours=3))),
+                    day=None, note='x'),
+    SimpleNamespace(item_id=3, name='c', amount=Decimal('0.1'), ratio=0.1, at=datetime(2024, 5, 1), day=None, note=''),
+]
+
+
+def make_client(schema, rows):
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get('/model', response_model=list[schema])
+    def by_model():
+        return rows
+
+    @app.get('/rows', response_model=list[schema])
+    def by_rows(response: Response):
+        response.headers['X-Next-After'] = '3'
+        return rows_response(schema, rows, response)
+
+    return TestClient(app)
+
+
+def test_bodies_match_response_model():
+    client = make_client(Priced, ROWS)
+    expected, actual = client.get('/model'), client.get('/rows')
+    assert actual.content == expected.content
+    assert actual.headers['X-Next-After'] == '3'
+    assert actual.headers['content-type'] == expected.headers['content-type']
+
+
+def test_orm_rows_match_response_model():
+    rows = [models.Booking(booking_id=i, player_id=1, room_id=2, start_time=datetime(2024, 1, 1, i), end_time=datetime(2024, 1, 1, i + 1),
+                           status='confirmed', hourly_rate=500 if i % 2 else 499.5) for i in range(1, 5)]
+    client = make_client(schemas.BookingRead, rows)
+    assert client.get('/rows').content == client.get('/model').content
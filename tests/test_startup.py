@@ -0,0 +1,65 @@
+"""Startup smoke tests: the schema, its indexes and the app itself come up."""
+import os
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+from app import models
+from app.database import Base
+from app.indexes import index_definitions
+from app.startup import ensure_schema, schema_fingerprint
+from tests.conftest import ROOT
+
+
+def test_index_definitions_come_from_the_models():
+    names = {index.name for index in index_definitions()}
+    assert {'ix_Booking_room_time', 'ix_Player_last_name_key', 'ix_Player_first_name_key', 'ix_Player_email_key'} <= names
+
+
+def test_index_definitions_skip_models_that_are_not_mapped(monkeypatch):
+    monkeypatch.delattr(models, 'Booking')
+    names = {index.name for index in index_definitions()}
+    assert 'ix_Booking_room_time' not in names and 'ix_Player_last_name_key' in names
+
+
+def test_ensure_schema_creates_then_verifies(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    try:
+        assert schema_fingerprint(Base.metadata) == schema_fingerprint(Base.metadata)
+        assert ensure_schema(engine, fast=True) == 'created'
+        assert ensure_schema(engine, fast=True) == 'verified'
+        indexes = {i['name']: i['column_names'] for i in inspect(engine).get_indexes('Booking')}
+        assert indexes['ix_Booking_room_time'] == ['room_id', 'start_time', 'end_time']
+    finally:
+        engine.dispose()
+
+
+def test_app_starts_and_serves_the_list_endpoints():
+    from app.main import app
+    with TestClient(app) as client:
+        for path in ('/clubs/', '/rooms/', '/players/', '/bookings/', '/matches/', '/sessions/', '/pricekv/'):
+            assert client.get(path).status_code == 200, path
+
+
+def test_fast_start_app_starts(tmp_path):
+    # FAST_START is read at import time, so it gets its own interpreter
+    script = ('from fastapi.testclient import TestClient\n'
+              'from app.main import app\n'
+              'for _ in range(2):\n'
+              '    with TestClient(app) as client:\n'
+              '        assert client.get("/bookings/").status_code == 200\n')
+    env = dict(os.environ, FAST_START='1', DATABASE_URL=f"sqlite:///{tmp_path / 'fast.db'}", PYTHONPATH=ROOT)
+    child = subprocess.run([sys.executable, '-c', script], env=env, cwd=tmp_path, capture_output=True, text=True, timeout=120)
+    assert child.returncode == 0, child.stderr[-2000:]
+
+
+def test_ensure_schema_adds_columns_to_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql('CREATE TABLE "Booking" (booking_id INTEGER PRIMARY KEY, player_id INTEGER, room_id INTEGER, '
+                                 'start_time DATETIME, end_time DATETIME, status VARCHAR(20))')
+        assert ensure_schema(engine, fast=True) == 'created'
+        assert 'hourly_rate' in {c['name'] for c in inspect(engine).get_columns('Booking')}
+    finally:
+        engine.dispose()
@@ -0,0 +1,110 @@
+"""Parity of the vectorized player validation with the row-by-row reference."""
+import math
+import random
+from datetime import date, datetime
+import pandas as pd
+import pytest
+from app.etl.transformers import DataTransformer
+
+FIRST = ['Ivan', '  Anna ', '', '   ', None, float('nan'), 'Пётр', 0, 42]
+LAST = ['Ivanov', 'Petrova  ', '', None, float('nan'), 'Ёлкин', 3.5]
+EMAIL = ['ivan@example.com', ' anna@example.com ', 'broken.example.com', '', None, float('nan'), 12, 'a@b']
+PHONE = ['+7 900 1234567', '8(900)123-45-67', '12', 'abc', '', None, float('nan'), 79001234567]
+DOB = ['1990-01-31', '31.01.1990', '1990/01/31', '31/01/1990', '1990-13-01', '31-01-1990', 'soon', '', None,
+       float('nan'), pd.NaT, date(1990, 1, 31), datetime(1990, 1, 31, 12, 30), pd.Timestamp('1991-02-03'), 19900131]
+RATING = [1200, '1500', ' 1700 ', '+3', '-5', -1, 0, '0', 1500.0, 1500.7, '15.5', 'abc', '', None, float('nan'), True,
+          '1_000', '1 000', '١٢٣', '１２', 1e20, -1e20, float('inf'), 2 ** 63, '99999999999999999999', '-00012']
+
+
+def corpus(n, seed):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'First Name': [rng.choice(FIRST) for _ in range(n)],
+        'Last Name': [rng.choice(LAST) for _ in range(n)],
+        'E-mail': [rng.choice(EMAIL) for _ in range(n)],
+        'Phone': [rng.choice(PHONE) for _ in range(n)],
+        'DOB': [rng.choice(DOB) for _ in range(n)],
+        'Rating': [rng.choice(RATING) for _ in range(n)],
+    })
+
+
+def records(df):
+    """Comparable rows: every missing marker becomes None."""
+    rows = df.to_dict(orient='records')
+    for row in rows:
+        for key, value in row.items():
+            if value is None or value is pd.NaT or (isinstance(value, float) and math.isnan(value)):
+                row[key] = None
+    return rows
+
+
+def assert_parity(df):
+    transformer = DataTransformer()
+    expected_valid, expected_invalid = transformer.transform_players_rows(df.copy())
+    valid, invalid = transformer.transform_players_vectorized(df.copy())
+    assert records(valid) == records(expected_valid)
+    assert records(invalid) == records(expected_invalid)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_vectorized_matches_rows_on_mixed_cells(seed):
+    assert_parity(corpus(2000, seed))
+
+
+def test_vectorized_matches_rows_on_typed_columns():
+    # the dtypes read_csv / read_excel produce: str, float with NaN, datetime64, int
+    df = pd.DataFrame({
+        'first_name': pd.Series(['Ivan', None, ' Oleg '], dtype='str'),
+        'last_name': ['Ivanov', 'Petrova', float('nan')],
+        'email': ['ivan@example.com', 'anna@example.com', 'oleg@example.com'],
+        'phone_number': [float('nan'), float('nan'), float('nan')],
+        'date_of_birth': pd.to_datetime(['1990-01-31', None, '1985-06-01']),
+        'rating': [1200.0, float('nan'), 900.0],
+    })
+    assert_parity(df)
+    valid, invalid = DataTransformer().transform_players(df)
+    assert list(invalid['_errors']) == ['first_name is required', 'last_name is required']
+    assert valid['rating'].tolist() == [1200]
+
+
+def test_missing_values_are_blank():
+    df = pd.DataFrame({'first_name': ['Ivan'], 'last_name': [float('nan')], 'email': ['ivan@example.com'],
+                       'phone_number': [None], 'date_of_birth': [float('nan')], 'rating': [float('nan')]})
+    for transform in (DataTransformer().transform_players_rows, DataTransformer().transform_players_vectorized):
+        valid, invalid = transform(df.copy())
+        assert valid.empty
+        assert invalid['_errors'].tolist() == ['last_name is required']
+
+
+def test_date_cells_are_valid_dates():
+    df = pd.DataFrame({'first_name': ['A', 'B'], 'last_name': ['A', 'B'], 'email': ['a@example.com', 'b@example.com'],
+                       'date_of_birth': [datetime(1990, 1, 31, 12, 30), date(1991, 2, 3)]})
+    for transform in (DataTransformer().transform_players_rows, DataTransformer().transform_players_vectorized):
+        valid, invalid = transform(df.copy())
+        assert len(valid) == 2 and invalid.empty
+
+
+def test_ratings_follow_int_parsing():
+    df = pd.DataFrame({'first_name': ['A'] * 6, 'last_name': ['B'] * 6, 'email': [f'{i}@example.com' for i in range(6)],
+                       'rating': ['1_000', '١٢٣', '1e3', 1e20, -1e20, float('inf')]})
+    assert_parity(df)
+    valid, invalid = DataTransformer().transform_players(df)
+    assert valid['rating'].tolist() == [1000, 123]
+    assert invalid['_errors'].tolist() == ['rating must be integer', 'rating is out of range', 'rating is out of range', 'rating must be integer']
+
+
+def test_float_column_past_int64_is_out_of_range():
+    df = pd.DataFrame({'first_name': ['A', 'B'], 'last_name': ['A', 'B'], 'email': ['a@example.com', 'b@example.com'],
+                       'rating': [1e20, 1500.0]})
+    assert_parity(df)
+    valid, invalid = DataTransformer().transform_players(df)
+    assert valid['rating'].tolist() == [1500] and invalid['_errors'].tolist() == ['rating is out of range']
+
+
+def test_long_digit_strings_keep_every_digit_up_to_the_int64_bound():
+    values = ['123456789012345678', '9223372036854775807', '-9223372036854775808', '9223372036854775808']
+    df = pd.DataFrame({'first_name': ['A'] * 4, 'last_name': ['B'] * 4, 'email': [f'{i}@example.com' for i in range(4)], 'rating': values})
+    assert_parity(df)
+    valid, invalid = DataTransformer().transform_players(df)
+    assert valid['rating'].tolist() == [123456789012345678, 2 ** 63 - 1]
+    assert invalid['_errors'].tolist() == ['rating must be non-negative', 'rating is out of range']